@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class CustomAuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'custom_auth'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .cache import check_user_cache
+
+        checks.register(check_user_cache, checks.Tags.caches)
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+
+
+class UserCache:
+    """Cache of authenticated users by id.
+
+    Saves the user SELECT that `AuthenticationMiddleware` runs on every
+    request. Entries are deleted when a user is saved, deleted or logs
+    out, so a password change stops other sessions of the user from
+    verifying against a cached password hash.
+    """
+
+    prefix = "auth:user"
+
+    def __init__(self, alias: str, timeout: int | None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, user_id) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def get(self, user_id):
+        return self.cache.get(self.key(user_id))
+
+    async def aget(self, user_id):
+        return await self.cache.aget(self.key(user_id))
+
+    def set(self, user) -> None:
+        self.cache.set(self.key(user.pk), user, self.timeout)
+
+    async def aset(self, user) -> None:
+        await self.cache.aset(self.key(user.pk), user, self.timeout)
+
+    def delete(self, user_id) -> None:
+        self.cache.delete(self.key(user_id))
+
+
+# Each process has its own, a logout or password change in one process
+# wouldn't reach the users cached by the others
+PROCESS_LOCAL_CACHES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+def check_user_cache(app_configs, **kwargs) -> list[checks.CheckMessage]:
+    """CACHED_AUTH_USER needs a cache shared by all processes"""
+
+    if not settings.CACHED_AUTH_USER:
+        return []
+    backend = settings.CACHES[settings.AUTH_USER_CACHE]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Error(
+        f"CACHED_AUTH_USER needs a cache shared by all processes, {settings.AUTH_USER_CACHE!r} uses {backend}",
+        hint="Set AUTH_CACHE_BACKEND and AUTH_CACHE_LOCATION to a shared cache such as Redis, "
+             "or turn CACHED_AUTH_USER off.",
+        id="custom_auth.E001",
+    )]
+
+
+user_cache = UserCache(
+    alias=settings.AUTH_USER_CACHE,
+    timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+)
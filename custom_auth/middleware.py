@@ -0,0 +1,60 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .cache import user_cache
+
+
+def verified(request, user) -> bool:
+    """Whether cached user can be trusted for the session, as `auth.get_user` checks it"""
+
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    return (
+        user is not None
+        and request.session.get(BACKEND_SESSION_KEY) in settings.AUTHENTICATION_BACKENDS
+        and bool(session_hash)
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    )
+
+
+def get_user(request):
+    if not hasattr(request, "_cached_user"):
+        user_id = request.session.get(SESSION_KEY)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if not verified(request, user):
+            # Fallback secrets, flushing of stale sessions etc. are left to Django
+            user = auth.get_user(request)
+            if user.is_authenticated:
+                user_cache.set(user)
+        request._cached_user = user
+    return request._cached_user
+
+
+async def auser(request):
+    if not hasattr(request, "_acached_user"):
+        user_id = await request.session.aget(SESSION_KEY)
+        user = await user_cache.aget(user_id) if user_id is not None else None
+        if not verified(request, user):
+            user = await auth.aget_user(request)
+            if user.is_authenticated:
+                await user_cache.aset(user)
+        request._acached_user = user
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """`AuthenticationMiddleware` loading the user from `user_cache`.
+
+    The session hash is still verified on every request against the
+    cached user, sessions that don't verify go through `auth.get_user`.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(auser, request)
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import user_cache
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_saved_user(sender, instance, **kwargs):
+    # Also covers new users, ids can be reused (e.g. after rollback)
+    user_cache.delete(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        user_cache.delete(user.pk)
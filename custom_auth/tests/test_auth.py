@@ -1,8 +1,12 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth.models import User
 
-from todo_list.tests.utils import create_user
+from custom_auth.cache import check_user_cache, user_cache
+from todo_list.tests.utils import create_user, create_project, create_task
 
 
 class LoginTestCase(TestCase):
@@ -94,3 +98,94 @@ class ChangePasswordTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'account/password_change.html')
 
+
+
+CACHED_AUTH_MIDDLEWARE = [
+    'custom_auth.middleware.CachedAuthenticationMiddleware'
+    if name == 'django.contrib.auth.middleware.AuthenticationMiddleware' else name
+    for name in settings.MIDDLEWARE
+]
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    MIDDLEWARE=CACHED_AUTH_MIDDLEWARE,
+    )
+class CachedAuthenticationTestCase(TestCase):
+    """Test users and sessions loaded from cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.task = create_task(1, create_project(1, cls.user))
+        cls.headers = {"HX-Request": 'true'}
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def toggle(self, client):
+        return client.post(
+            reverse('projects:task_completed', kwargs={"pk": self.task.id}),
+            headers=self.headers,
+            )
+
+    def auth_queries(self, client) -> list[str]:
+        """Queries on session and user tables made by a toggle request"""
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.toggle(client).status_code, 200)
+        return [
+            query["sql"] for query in context.captured_queries
+            if "django_session" in query["sql"] or "auth_user" in query["sql"]
+            ]
+
+    def test_htmx_request_without_session_and_user_queries(self):
+        self.toggle(self.client)
+        self.assertIsNotNone(user_cache.get(self.user.id))
+        self.assertEqual(self.auth_queries(self.client), [])
+
+    def test_user_save_clears_cache(self):
+        self.toggle(self.client)
+        self.user.first_name = "Changed"
+        self.user.save()
+        self.assertIsNone(user_cache.get(self.user.id))
+
+    def test_logout_clears_cache(self):
+        self.toggle(self.client)
+        self.client.post(reverse('account_logout'))
+        self.assertIsNone(user_cache.get(self.user.id))
+        self.assertEqual(self.toggle(self.client).status_code, 302)
+
+    def test_password_change_logs_out_other_sessions(self):
+        other = Client()
+        other.force_login(self.user)
+        self.toggle(other)
+        response = self.client.post(
+            reverse('account_change_password'),
+            data={"oldpassword": '1234',
+                  "password1": 'Qwer12345679',
+                  "password2": 'Qwer12345679',
+                  }
+            )
+        self.assertRedirects(response, reverse('projects:projects_list'), fetch_redirect_response=False)
+        self.assertEqual(self.toggle(self.client).status_code, 200)
+        self.assertEqual(self.toggle(other).status_code, 302)
+
+
+class UserCacheCheckTestCase(SimpleTestCase):
+    """Test CACHED_AUTH_USER is refused with a cache of one process"""
+
+    def check_ids(self, backend):
+        caches = {**settings.CACHES, 'auth': {'BACKEND': backend}}
+        with override_settings(CACHED_AUTH_USER=True, CACHES=caches):
+            return [message.id for message in check_user_cache(None)]
+
+    def test_local_memory_cache(self):
+        self.assertEqual(self.check_ids('django.core.cache.backends.locmem.LocMemCache'), ['custom_auth.E001'])
+
+    def test_shared_cache(self):
+        self.assertEqual(self.check_ids('django.core.cache.backends.redis.RedisCache'), [])
+
+    @override_settings(CACHED_AUTH_USER=False)
+    def test_not_cached(self):
+        self.assertEqual(check_user_cache(None), [])
@@ -1,8 +1,16 @@
 from allauth.account.views import PasswordChangeView
 from django.urls import reverse
 
+from .cache import user_cache
+
 
 class CustomPasswordChangeView(PasswordChangeView):
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        # Other sessions of the user must not verify against the old password
+        user_cache.delete(self.request.user.pk)
+        return response
+
     def get_success_url(self):
-        return reverse('projects:projects_list')
\ No newline at end of file
+        return reverse('projects:projects_list')
@@ -0,0 +1,44 @@
+// Live updates from the other tabs of the user, see todo_list/events.py.
+// Each tab has an id, sent with its requests, so the server doesn't echo
+// its own changes back to it.
+
+if (!window.liveUpdates) {
+  window.liveUpdates = true;
+
+  const tab = window.crypto && crypto.randomUUID
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+
+  document.addEventListener("htmx:configRequest", (event) => {
+    event.detail.headers["X-Tab-Id"] = tab;
+  });
+
+  const container = document.querySelector("[data-events-url]");
+  if (container && window.EventSource) {
+    const source = new EventSource(`${container.dataset.eventsUrl}?tab=${encodeURIComponent(tab)}`);
+
+    source.addEventListener("swap", (event) => {
+      for (const swap of JSON.parse(event.data)) {
+        const target = document.querySelector(swap.target);
+        if (target) {
+          htmx.swap(target, swap.html || "", { swapStyle: swap.swap });
+        } else if (swap.insert && !document.getElementById("next-projects")) {
+          // New project, shown once the last page of projects is loaded
+          const end = document.getElementById("new-project");
+          if (end) {
+            htmx.swap(end, swap.html, { swapStyle: "beforebegin" });
+          }
+        }
+      }
+    });
+
+    // Changed somewhere the stream didn't see, reload the projects shown
+    source.addEventListener("refresh", () => {
+      htmx.ajax("GET", location.href, {
+        target: "#project_list",
+        select: "#project_list",
+        swap: "outerHTML",
+      });
+    });
+  }
+}
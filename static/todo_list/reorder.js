@@ -0,0 +1,70 @@
+// Drag and drop of task rows. The dropped row is deleted and the response
+// places it again out of band, as for a priority change (see TaskMoveView).
+// Rows of a project are siblings, so neighbours are the rows around the drop.
+
+let dragged = null;
+
+function taskRow(event) {
+  return event.target instanceof Element ? event.target.closest("[data-task]") : null;
+}
+
+function dropRow(event) {
+  const row = taskRow(event);
+  if (!dragged || !row || row === dragged || row.parentElement !== dragged.parentElement) {
+    return null;
+  }
+  return row;
+}
+
+function neighbour(row, direction) {
+  let element = row[direction];
+  while (element && (element === dragged || !element.matches("[data-task]"))) {
+    element = element[direction];
+  }
+  return element;
+}
+
+document.addEventListener("dragstart", (event) => {
+  dragged = taskRow(event);
+  if (dragged) {
+    event.dataTransfer.effectAllowed = "move";
+    event.dataTransfer.setData("text/plain", dragged.dataset.task);
+  }
+});
+
+document.addEventListener("dragend", () => {
+  dragged = null;
+});
+
+document.addEventListener("dragover", (event) => {
+  if (dropRow(event)) {
+    event.preventDefault();
+    event.dataTransfer.dropEffect = "move";
+  }
+});
+
+document.addEventListener("drop", (event) => {
+  const row = dropRow(event);
+  const container = row && row.closest("[data-task-urls]");
+  if (!container) {
+    return;
+  }
+  event.preventDefault();
+  const rect = row.getBoundingClientRect();
+  const [above, below] = event.clientY > rect.top + rect.height / 2
+    ? [row, neighbour(row, "nextElementSibling")]
+    : [neighbour(row, "previousElementSibling"), row];
+  const values = {};
+  if (above) {
+    values.after = above.dataset.task;
+  }
+  if (below) {
+    values.before = below.dataset.task;
+  }
+  htmx.ajax("POST", container.getAttribute("data-task-url-move").replace("{id}", dragged.dataset.task), {
+    source: dragged,
+    target: dragged,
+    swap: "delete",
+    values: values,
+  });
+});
@@ -0,0 +1,50 @@
+// Actions of compact task rows, see templates/todo_list/partials/compact_task_row.html.
+// Rows carry only data-task and data-action, URLs come from data-task-url-*
+// attributes of the closest [data-task-urls] container.
+
+document.addEventListener("htmx:configRequest", (event) => {
+  const token = document.querySelector('meta[name="csrf-token"]');
+  if (token && token.content) {
+    event.detail.headers["X-CSRFToken"] = token.content;
+  }
+});
+
+const ACTIONS = {
+  completed: { verb: "POST", url: "completed", swap: "none" },
+  // The row is moved by an out-of-band swap of the response
+  up: { verb: "POST", url: "priority", values: { priority: 1 }, target: "row", swap: "delete" },
+  down: { verb: "POST", url: "priority", values: { priority: -1 }, target: "row", swap: "delete" },
+  delete: { verb: "POST", url: "delete", target: "row", swap: "delete" },
+  update: { verb: "GET", url: "update", target: "row", swap: "outerHTML" },
+};
+
+function runTaskAction(element, eventName) {
+  const name = element.dataset.action;
+  const action = ACTIONS[name];
+  // Checkbox posts when it changes, buttons when they are clicked
+  if (!action || (name === "completed") !== (eventName === "change")) {
+    return;
+  }
+  const row = element.closest("[data-task]");
+  const container = element.closest("[data-task-urls]");
+  if (!row || !container) {
+    return;
+  }
+  const url = container.getAttribute(`data-task-url-${action.url}`).replace("{id}", row.dataset.task);
+  const target = { row: row }[action.target] || element;
+  htmx.ajax(action.verb, url, {
+    source: element,
+    target: target,
+    swap: action.swap,
+    values: action.values || {},
+  });
+}
+
+for (const eventName of ["click", "change"]) {
+  document.addEventListener(eventName, (event) => {
+    const element = event.target.closest("[data-task] [data-action]");
+    if (element) {
+      runTaskAction(element, eventName);
+    }
+  });
+}
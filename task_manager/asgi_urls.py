@@ -0,0 +1,15 @@
+"""
+URL configuration of the ASGI application.
+
+Same as `task_manager.urls`, but todo_list is served by its async views.
+"""
+from django.urls import path, include
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+
+urlpatterns = [
+    path('projects/', include('todo_list.async_urls'))
+    if getattr(pattern, 'app_name', None) == 'projects' else pattern
+    for pattern in wsgi_urlpatterns
+]
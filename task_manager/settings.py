@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -59,6 +62,35 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+# Users of sessions are loaded from AUTH_USER_CACHE instead of the database,
+# see custom_auth/middleware.py. Needs a cache shared by all processes, the
+# `custom_auth.E001` check rejects the default local memory one.
+CACHED_AUTH_USER = config('CACHED_AUTH_USER', default=False, cast=bool)
+
+if CACHED_AUTH_USER:
+    MIDDLEWARE[MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware')] = (
+        'custom_auth.middleware.CachedAuthenticationMiddleware'
+    )
+
+# Per request timings in Server-Timing headers and logs, see todo_list/middleware.py.
+# PROFILING_SAMPLE_RATE of requests are also dumped as cProfile stats to PROFILING_DIR.
+PROFILING = config('PROFILING', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+
+if PROFILING:
+    MIDDLEWARE.insert(0, 'todo_list.middleware.ProfilingMiddleware')
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {'class': 'logging.StreamHandler'},
+        },
+        'loggers': {
+            'todo_list.profiling': {'handlers': ['console'], 'level': 'INFO'},
+        },
+    }
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 AUTHENTICATION_BACKENDS = [
@@ -74,7 +106,8 @@ ACCOUNT_EMAIL_VERIFICATION = "none"
 
 LOGIN_REDIRECT_URL = "projects:projects_list"
 
-ROOT_URLCONF = 'task_manager.urls'
+# ASGI application serves async views from its own URLconf, see asgi.py
+ROOT_URLCONF = config('ROOT_URLCONF', default='task_manager.urls')
 LOGOUT_REDIRECT_URL = 'account_login'
 
 TEMPLATES = [
@@ -100,13 +133,123 @@ WSGI_APPLICATION = 'task_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE selects `sqlite3` (default) or `postgresql`. PostgreSQL keeps
+# connections open for DB_CONN_MAX_AGE seconds and checks them before reuse.
+# DB_POOL=True uses a psycopg 3 connection pool instead, which is per process
+# and replaces persistent connections.
+
+DB_ENGINE = config('DB_ENGINE', default='sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = config('DB_POOL', default=False, cast=bool)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='task_manager'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
     }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+elif DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {},
+        }
+    }
+    # SQLITE_PROFILE=wal lets readers run next to a writer and makes
+    # transactions take the write lock up front, so they wait on busy_timeout
+    # instead of failing with "database is locked" when upgrading a read lock.
+    # SQLITE_PROFILE=default (the default) keeps SQLite's rollback journal and
+    # deferred transactions.
+    SQLITE_PROFILE = config('SQLITE_PROFILE', default='default')
+    if SQLITE_PROFILE == 'wal':
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            # Seconds, sets busy_timeout of the connection
+            'timeout': config('SQLITE_BUSY_TIMEOUT', default=5, cast=int),
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA mmap_size=134217728;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        }
+    elif SQLITE_PROFILE != 'default':
+        raise ImproperlyConfigured(f"Unsupported SQLITE_PROFILE: {SQLITE_PROFILE}")
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE: {DB_ENGINE}")
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'task_lists': {
+        'BACKEND': config(
+            'TASK_LIST_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': config('TASK_LIST_CACHE_LOCATION', default='task_lists'),
+    },
+    # Sessions and users, must be shared by all processes (e.g. Redis) when
+    # there are several, so a logout or password change is seen by all of them.
+    'auth': {
+        'BACKEND': config(
+            'AUTH_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': config('AUTH_CACHE_LOCATION', default='auth'),
+    },
 }
 
+# Cache alias and timeout (seconds) for rendered task lists of projects
+TASK_LIST_CACHE = 'task_lists'
+TASK_LIST_CACHE_TIMEOUT = config('TASK_LIST_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Cache alias and timeout (seconds) for users of sessions
+AUTH_USER_CACHE = 'auth'
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Where sessions are stored: db, cached_db (cache in front of db), cache or
+# signed_cookies (nothing stored on the server, can't be revoked before expiry)
+SESSION_STORE = config('SESSION_STORE', default='cached_db')
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSION_STORE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"Unsupported SESSION_STORE: {SESSION_STORE}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'auth'
+
+# True renders task rows without forms, their actions are posted by static/todo_list/task_rows.js
+# with the CSRF token of the csrf-token meta tag, see todo_list/templatetags/task_rows.py.
+COMPACT_TASK_ROWS = config('COMPACT_TASK_ROWS', default=False, cast=bool)
+
+# Seconds between checks of an idle live update stream, which also keep
+# proxies from closing it, see todo_list/events.py.
+EVENTS_HEARTBEAT = config('EVENTS_HEARTBEAT', default=15, cast=float)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -143,6 +286,38 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+
+# STATIC_MANIFEST=True links files by their content hashed names, which
+# `collectstatic` writes with gzip and brotli variants, see
+# todo_list/staticfiles.py. Run `collectstatic` before starting the server.
+STATIC_MANIFEST = config('STATIC_MANIFEST', default=not DEBUG, cast=bool)
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'todo_list.staticfiles.CompressedManifestStaticFilesStorage'
+            if STATIC_MANIFEST else
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Serve STATIC_ROOT from the application, compressed and with immutable cache
+# headers for hashed names, see StaticFilesMiddleware in todo_list/middleware.py.
+# Seconds other static files are cached.
+SERVE_STATIC = config('SERVE_STATIC', default=STATIC_MANIFEST, cast=bool)
+STATIC_MAX_AGE = config('STATIC_MAX_AGE', default=60, cast=int)
+
+if SERVE_STATIC:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'todo_list.middleware.StaticFilesMiddleware',
+    )
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Project, Task
+from .models import Job, Project, Task
 
 
 class TaskInLine(admin.TabularInline):
@@ -12,3 +12,8 @@ class ProjectAdmin(admin.ModelAdmin):
     inlines = [TaskInLine]
     list_display  = ["name", 'id']
 
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "status", "progress", "total", "attempts", "created_at", "started_at", "finished_at"]
+    list_filter = ["status", "name"]
@@ -0,0 +1,104 @@
+import json
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views import View
+
+from .forms import TaskExportForm
+from .models import Project, Task
+
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+
+
+class StreamingExportView(LoginRequiredMixin, View):
+    """Stream rows of the user as JSON array or NDJSON, tasks unless overridden.
+
+    Rows are read with a chunked iterator and written as they come,
+    so memory stays flat whatever the number of rows. Async versions
+    of the views (see async_views.py) stream with `astream`, the ASGI
+    handler would read a sync iterator into memory first.
+    NDJSON is chosen with `?format=ndjson` or `Accept: application/x-ndjson`.
+    """
+    http_method_names = ['get']
+    fields = ("id", "project_id", "content", "priority", "completed", "deadline")
+    chunk_size = 2000
+    raise_exception = True
+
+    def get_queryset(self):
+        return Task.objects.of_owner(self.request.user).order_by("project_id", "-priority", "rank", "id")
+
+    def get(self, request, *args, **kwargs):
+        return self.stream()
+
+    def stream(self) -> StreamingHttpResponse:
+        rows = self.get_queryset().values(*self.fields).iterator(chunk_size=self.chunk_size)
+        if self.wants_ndjson():
+            return StreamingHttpResponse(self.ndjson(rows), content_type=NDJSON)
+        return StreamingHttpResponse(self.json(rows), content_type=JSON)
+
+    def astream(self) -> StreamingHttpResponse:
+        rows = self.get_queryset().values(*self.fields).aiterator(chunk_size=self.chunk_size)
+        if self.wants_ndjson():
+            return StreamingHttpResponse(self.andjson(rows), content_type=NDJSON)
+        return StreamingHttpResponse(self.ajson(rows), content_type=JSON)
+
+    def wants_ndjson(self) -> bool:
+        if "format" in self.request.GET:
+            return self.request.GET["format"] == "ndjson"
+        return NDJSON in self.request.headers.get("Accept", "")
+
+    def dumps(self, row: dict) -> str:
+        return json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+    def ndjson(self, rows):
+        for row in rows:
+            yield self.dumps(row) + "\n"
+
+    def json(self, rows):
+        yield "["
+        separator = ""
+        for row in rows:
+            yield separator + self.dumps(row)
+            separator = ","
+        yield "]"
+
+    async def andjson(self, rows):
+        async for row in rows:
+            yield self.dumps(row) + "\n"
+
+    async def ajson(self, rows):
+        yield "["
+        separator = ""
+        async for row in rows:
+            yield separator + self.dumps(row)
+            separator = ","
+        yield "]"
+
+
+class ProjectExportView(StreamingExportView):
+    fields = ("id", "name")
+
+    def get_queryset(self):
+        return Project.objects.filter(owner=self.request.user).order_by("id")
+
+
+class TaskExportView(StreamingExportView):
+    """Tasks of the user, optionally of one project with `?project=<id>`"""
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_valid():
+            return HttpResponseBadRequest()
+        return self.stream()
+
+    def is_valid(self) -> bool:
+        self.filter_form = TaskExportForm(self.request.GET)
+        return self.filter_form.is_valid()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.filter_form.cleaned_data['project'] is not None:
+            queryset = queryset.filter(project_id=self.filter_form.cleaned_data['project'])
+        return queryset
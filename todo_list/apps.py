@@ -1,6 +1,35 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.models.signals import post_migrate
+
+
+def install_after_migrate(sender, using, **kwargs) -> None:
+    """Recreate search and timestamp triggers dropped with a rebuilt table.
+
+    Only at the latest migration of the app, the current trigger SQL may
+    use columns that earlier schemas don't have. Those have the triggers
+    their migrations created.
+    """
+
+    from . import search, timestamps
+
+    connection = connections[using]
+    loader = MigrationLoader(connection)
+    if not set(loader.graph.leaf_nodes(sender.label)) <= set(loader.applied_migrations):
+        return
+    search.install(connection)
+    timestamps.install(connection)
 
 
 class TodoListConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todo_list'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .staticfiles import check_vendor_files
+
+        post_migrate.connect(install_after_migrate, sender=self)
+        checks.register(check_vendor_files, checks.Tags.staticfiles)
@@ -0,0 +1,26 @@
+"""URLs of todo_list for the ASGI application.
+
+Same routes and names as `urls.py`, with async views where they exist.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import app_name, urlpatterns as sync_urlpatterns
+
+
+ASYNC_VIEWS = {
+    'projects_list': async_views.ProjectListView,
+    'task_create': async_views.TaskCreateView,
+    'task_completed': async_views.TaskCompletedUpdateView,
+    'task_priority': async_views.TaskPriorityUpdateView,
+    'task_delete': async_views.TaskDeleteView,
+    'events': async_views.EventStreamView,
+    'api_projects': async_views.ProjectExportView,
+    'api_tasks': async_views.TaskExportView,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name].as_view(), name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
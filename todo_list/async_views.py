@@ -0,0 +1,282 @@
+"""Async versions of the hottest views, served by the ASGI application.
+
+They do the same as the views of the same name in `views.py`, but read and
+write with the async ORM, so a request doesn't hold a worker thread
+while it waits for the database.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import aprefetch_related_objects
+from django.forms import modelform_factory
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotFound,
+    HttpResponseNotAllowed,
+    StreamingHttpResponse,
+)
+from django.shortcuts import render, redirect
+from django.views import View
+
+from . import api
+from .cache import task_list_cache, aset_task_list_fragments
+from .conditional import aowner_updated_at, not_modified, set_validators
+from .events import apublish, broker, format_event, render_swaps
+from .forms import PriorityTaskForm, ProjectCursorForm, TaskForm
+from .models import Project, Task
+from .pagination import (
+    PROJECTS_PAGE_SIZE,
+    projects_after,
+    split_page,
+    task_with_next,
+    split_task_with_next,
+    tasks_page_prefetch,
+    set_task_pages,
+)
+
+
+class AsyncLoginRequiredMixin:
+    """LoginRequiredMixin for async views, user is loaded without a thread hop"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            if getattr(self, "raise_exception", False):
+                raise PermissionDenied
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+
+def is_htmx(request) -> bool:
+    return request.headers.get("HX-Request") == "true"
+
+
+async def aprefetch_task_page(project: Project) -> Project:
+    await aprefetch_related_objects([project], tasks_page_prefetch())
+    set_task_pages([project])
+    return project
+
+
+async def aplaced_task_context(project_id: int, priority: int, rank: int, id: int) -> dict:
+    rows = [task async for task in task_with_next(project_id, priority, rank, id)]
+    task, next_task = split_task_with_next(rows, id)
+    return {"task": task, "next_task": next_task}
+
+
+async def arender_project_progress(request, project_id: int) -> HttpResponse:
+    """Task counters in the title of project, swapped out of band"""
+
+    project = await Project.objects.only("task_count", "completed_count").filter(pk=project_id).afirst()
+    if project is None:
+        return HttpResponse(status=200)
+    return render(request, "todo_list/partials/project_progress.html", {"project": project, "oob": True})
+
+
+def render_task_list_errors(request, project: Project, form) -> HttpResponse:
+    """Task list with form errors, swapped in place of the list whatever the request targeted"""
+
+    response = render(request, "todo_list/task_list.html", {"project": project, "form": form})
+    response["HX-Retarget"] = f"#test-{project.id}"
+    response["HX-Reswap"] = "outerHTML"
+    return response
+
+
+class ProjectListView(AsyncLoginRequiredMixin, View):
+
+    async def get(self, request, *args, **kwargs):
+        cursor_form = ProjectCursorForm(request.GET)
+        if not cursor_form.is_valid():
+            return HttpResponseBadRequest()
+        updated_at = await aowner_updated_at(request.user)
+        response = not_modified(request, updated_at)
+        if response is None:
+            response = await self.render_page(request, cursor_form.cleaned_data['after'])
+        return set_validators(request, response, updated_at)
+
+    async def render_page(self, request, after):
+        queryset = projects_after(Project.objects.filter(owner=request.user), after)
+        projects = [project async for project in queryset[:PROJECTS_PAGE_SIZE + 1]]
+        projects, next_project = split_page(projects, PROJECTS_PAGE_SIZE)
+        context = {
+            "projects": await aset_task_list_fragments(request, projects),
+            "next_project": next_project,
+        }
+        if is_htmx(request) and after is not None:
+            return render(request, "todo_list/partials/project_page.html", context)
+        return render(request, "todo_list/project_list.html", context)
+
+
+class TaskCreateView(AsyncLoginRequiredMixin, View):
+    http_method_names = ['get', 'post']
+    form_class = modelform_factory(Task, fields=['content'])
+
+    async def get_project(self):
+        return await Project.objects.filter(
+            pk=self.kwargs['project_id'],
+            owner=self.request.user,
+            ).afirst()
+
+    async def get(self, request, *args, **kwargs):
+        project = await self.get_project()
+        if project is None:
+            return HttpResponseNotFound()
+        if is_htmx(request):
+            context = {"project": project, "form": TaskForm()}
+            return render(request, "todo_list/partials/full_task_form.html", context)
+        else:
+            return redirect('projects:projects_list')
+
+    async def post(self, request, *args, **kwargs):
+        project = await self.get_project()
+        if project is None:
+            return HttpResponseNotFound()
+        form = self.form_class(request.POST)
+        if not form.is_valid():
+            return render_task_list_errors(request, await aprefetch_task_page(project), form)
+        form.instance.project = project
+        # Insert and counter update are one write transaction
+        await sync_to_async(transaction.atomic(form.instance.save))()
+        apublish(request, project.id)
+        if is_htmx(request):
+            task = form.instance
+            # Counters were changed by the insert
+            await project.arefresh_from_db(fields=["task_count", "completed_count"])
+            context = await aplaced_task_context(project.id, task.priority, task.rank, task.id)
+            context["project"] = project
+            return render(request, "todo_list/partials/created_task.html", context)
+        else:
+            return redirect('projects:projects_list')
+
+
+class TaskCompletedUpdateView(AsyncLoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    async def post(self, request, *args, **kwargs):
+        task = Task.objects.of_owner(request.user).filter(pk=self.kwargs['pk'])
+        project_id = await task.values_list("project_id", flat=True).afirst()
+        if project_id is None:
+            return HttpResponseNotFound()
+        if not is_htmx(request):
+            return HttpResponseNotAllowed(permitted_methods='hx-post')
+        # Transactions have no async API
+        await sync_to_async(Task.objects.toggle_completed)(self.kwargs['pk'], project_id)
+        # Queryset update sends no signals
+        await task_list_cache.abump(project_id)
+        apublish(request, project_id, self.kwargs['pk'])
+        return await arender_project_progress(request, project_id)
+
+
+class TaskPriorityUpdateView(AsyncLoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    async def post(self, request, *args, **kwargs):
+        form = PriorityTaskForm(request.POST)
+        updated = None
+        if is_htmx(request) and form.is_valid():
+            # Raw cursor of change_priority has no async version
+            updated = await sync_to_async(Task.objects.change_priority)(
+                self.kwargs['pk'],
+                request.user.id,
+                form.cleaned_data['priority'],
+                )
+        if updated is not None:
+            priority, project_id, rank = updated
+            await task_list_cache.abump(project_id)
+            apublish(request, project_id)
+            context = await aplaced_task_context(project_id, priority, rank, self.kwargs['pk'])
+            if context["task"] is None:
+                return HttpResponse(status=200)
+            return render(request, "todo_list/partials/placed_task.html", context)
+
+        task = await Task.objects.of_owner(request.user).filter(
+            pk=self.kwargs['pk'],
+            ).select_related("project").afirst()
+        if task is None:
+            return HttpResponseNotFound()
+        if not is_htmx(request):
+            return HttpResponseNotAllowed(permitted_methods='hx-post')
+        if not form.errors:
+            form.add_out_of_range_error()
+        return render_task_list_errors(request, await aprefetch_task_page(task.project), form)
+
+
+class TaskDeleteView(AsyncLoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    async def post(self, request, *args, **kwargs):
+        task = await Task.objects.of_owner(request.user).filter(pk=self.kwargs['pk']).afirst()
+        if task is None:
+            return HttpResponseNotFound()
+        # Deleted as instance, so signals update counters of its project
+        await task.adelete()
+        apublish(request, task.project_id, task.id)
+        if is_htmx(request):
+            return await arender_project_progress(request, task.project_id)
+        else:
+            return redirect('projects:projects_list')
+
+
+class EventStreamView(AsyncLoginRequiredMixin, View):
+    """Server-Sent Events with changes made in other tabs of the user.
+
+    The stream waits on the broker without a thread or a connection to
+    the database, see events.py. `?tab=<id>` is the id the tab sends
+    with its own requests.
+    """
+
+    # Milliseconds before EventSource reconnects after the stream broke
+    RETRY = 2000
+
+    async def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(self.stream(request), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Buffering proxies such as nginx would hold events back
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, request):
+        tab = request.GET.get("tab", "")
+        subscription = broker.subscribe(request.user.id)
+        try:
+            updated_at = await aowner_updated_at(request.user)
+            yield f"retry: {self.RETRY}\n\n"
+            while True:
+                events = await subscription.get_many(settings.EVENTS_HEARTBEAT)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    updated_at = await aowner_updated_at(request.user)
+                    yield format_event("refresh", {})
+                elif events:
+                    # Read before rendering, so later changes are seen at the next heartbeat
+                    updated_at = await aowner_updated_at(request.user)
+                    # Own changes only move the timestamp, the tab has them already
+                    events = [event for event in events if not tab or event["tab"] != tab]
+                    if events:
+                        yield format_event("swap", await render_swaps(request, events))
+                else:
+                    current = await aowner_updated_at(request.user)
+                    if current != updated_at:
+                        # Changed by another process or a job
+                        updated_at = current
+                        yield format_event("refresh", {})
+                    else:
+                        yield ": ping\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+
+class ProjectExportView(AsyncLoginRequiredMixin, api.ProjectExportView):
+
+    async def get(self, request, *args, **kwargs):
+        return self.astream()
+
+
+class TaskExportView(AsyncLoginRequiredMixin, api.TaskExportView):
+
+    async def get(self, request, *args, **kwargs):
+        if not self.is_valid():
+            return HttpResponseBadRequest()
+        return self.astream()
@@ -0,0 +1,189 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import aprefetch_related_objects, prefetch_related_objects
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Project
+from .pagination import tasks_page_prefetch, set_task_pages
+
+
+CSRF_PLACEHOLDER = "__task_list_csrf_token__"
+
+
+class TaskListCache:
+    """Cache of rendered task lists keyed by project version.
+
+    Every change of project tasks bumps project version, so a cached
+    fragment is never invalidated explicitly, it just stops being looked up.
+    Version starts from the clock, so a version evicted from the cache
+    never comes back with the same value.
+    CSRF token is stored as placeholder and substituted per request.
+    """
+
+    version_prefix = "task_list:version"
+    fragment_prefix = "task_list:fragment"
+    template_name = "todo_list/task_list.html"
+
+    def __init__(self, alias: str, timeout: int | None):
+        self.alias = alias
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version_key(self, project_id: int) -> str:
+        return f"{self.version_prefix}:{project_id}"
+
+    def fragment_key(self, project_id: int, version: int) -> str:
+        # Compact and full rows can be cached side by side while switching
+        rows = "compact" if settings.COMPACT_TASK_ROWS else "full"
+        return f"{self.fragment_prefix}:{rows}:{project_id}:{version}"
+
+    def bump(self, *project_ids: int) -> None:
+        """Make cached task lists of projects stale"""
+
+        for project_id in set(project_ids):
+            try:
+                self.cache.incr(self.version_key(project_id))
+            except ValueError:
+                self.cache.set(self.version_key(project_id), time.time_ns(), None)
+
+    async def abump(self, *project_ids: int) -> None:
+        for project_id in set(project_ids):
+            try:
+                await self.cache.aincr(self.version_key(project_id))
+            except ValueError:
+                await self.cache.aset(self.version_key(project_id), time.time_ns(), None)
+
+    def _version_keys(self, project_ids: list[int]) -> dict[str, int]:
+        return {self.version_key(project_id): project_id for project_id in project_ids}
+
+    def _fragment_keys(self, versions: dict[int, int]) -> dict[str, int]:
+        return {
+            self.fragment_key(project_id, version): project_id
+            for project_id, version in versions.items()
+        }
+
+    def versions(self, project_ids: list[int]) -> dict[int, int]:
+        keys = self._version_keys(project_ids)
+        found = self.cache.get_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in found}
+        if missing:
+            self.cache.set_many(missing, None)
+            found.update(missing)
+        return {keys[key]: version for key, version in found.items()}
+
+    async def aversions(self, project_ids: list[int]) -> dict[int, int]:
+        keys = self._version_keys(project_ids)
+        found = await self.cache.aget_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in found}
+        if missing:
+            await self.cache.aset_many(missing, None)
+            found.update(missing)
+        return {keys[key]: version for key, version in found.items()}
+
+    def _found_fragments(self, keys: dict[str, int], found: dict[str, str]) -> dict[int, str]:
+        self.count(hits=len(found), misses=len(keys) - len(found))
+        return {keys[key]: fragment for key, fragment in found.items()}
+
+    def get_many(self, project_ids: list[int]) -> tuple[dict[int, str], dict[int, int]]:
+        """Return cached fragments and current versions of projects"""
+
+        versions = self.versions(project_ids)
+        keys = self._fragment_keys(versions)
+        return self._found_fragments(keys, self.cache.get_many(keys)), versions
+
+    async def aget_many(self, project_ids: list[int]) -> tuple[dict[int, str], dict[int, int]]:
+        versions = await self.aversions(project_ids)
+        keys = self._fragment_keys(versions)
+        return self._found_fragments(keys, await self.cache.aget_many(keys)), versions
+
+    def _fragments_by_key(self, fragments: dict[int, str], versions: dict[int, int]) -> dict[str, str]:
+        return {
+            self.fragment_key(project_id, versions[project_id]): fragment
+            for project_id, fragment in fragments.items()
+        }
+
+    def set_many(self, fragments: dict[int, str], versions: dict[int, int]) -> None:
+        self.cache.set_many(self._fragments_by_key(fragments, versions), self.timeout)
+
+    async def aset_many(self, fragments: dict[int, str], versions: dict[int, int]) -> None:
+        await self.cache.aset_many(self._fragments_by_key(fragments, versions), self.timeout)
+
+    def count(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def render(self, request, project) -> str:
+        """Render task list of project with placeholder instead of CSRF token"""
+
+        return render_to_string(
+            self.template_name,
+            {"project": project, "csrf_token": CSRF_PLACEHOLDER},
+            request,
+        )
+
+    def with_token(self, request, fragment: str) -> str:
+        return mark_safe(fragment.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+task_list_cache = TaskListCache(
+    alias=settings.TASK_LIST_CACHE,
+    timeout=settings.TASK_LIST_CACHE_TIMEOUT,
+)
+
+
+def set_task_list_fragments(request, projects: list[Project]) -> list[Project]:
+    """Set rendered `task_list_html` on projects.
+
+    Tasks are fetched in one query and rendered only for projects
+    without a fresh cached fragment.
+    """
+
+    fragments, versions = task_list_cache.get_many([project.id for project in projects])
+    stale = [project for project in projects if project.id not in fragments]
+    if stale:
+        prefetch_related_objects(stale, tasks_page_prefetch())
+        rendered = render_stale(request, stale)
+        task_list_cache.set_many(rendered, versions)
+        fragments.update(rendered)
+    return set_fragments(request, projects, fragments)
+
+
+async def aset_task_list_fragments(request, projects: list[Project]) -> list[Project]:
+    fragments, versions = await task_list_cache.aget_many([project.id for project in projects])
+    stale = [project for project in projects if project.id not in fragments]
+    if stale:
+        await aprefetch_related_objects(stale, tasks_page_prefetch())
+        rendered = render_stale(request, stale)
+        await task_list_cache.aset_many(rendered, versions)
+        fragments.update(rendered)
+    return set_fragments(request, projects, fragments)
+
+
+def render_stale(request, projects: list[Project]) -> dict[int, str]:
+    set_task_pages(projects)
+    return {project.id: task_list_cache.render(request, project) for project in projects}
+
+
+def set_fragments(request, projects: list[Project], fragments: dict[int, str]) -> list[Project]:
+    for project in projects:
+        project.task_list_html = task_list_cache.with_token(request, fragments[project.id])
+    return projects
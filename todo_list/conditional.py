@@ -0,0 +1,83 @@
+"""Conditional GET of pages rendered from projects and tasks of the owner.
+
+Validators come from `OwnerTimestamp` and `Project.updated_at`, which
+database triggers keep current (see timestamps.py), so a client that
+already has the page gets 304 after one query and no rendering.
+Pages that show flash messages are neither answered with 304 nor
+given validators, the messages are not part of them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import OwnerTimestamp, Project
+
+
+def owner_updated_at(owner):
+    timestamps = OwnerTimestamp.objects.filter(owner=owner).values_list("updated_at", flat=True)
+    # Rows are created with users, bulk created users get one here
+    return timestamps.first() or OwnerTimestamp.objects.get_or_create(owner=owner)[0].updated_at
+
+
+async def aowner_updated_at(owner):
+    timestamps = OwnerTimestamp.objects.filter(owner=owner).values_list("updated_at", flat=True)
+    return (await timestamps.afirst()
+            or (await OwnerTimestamp.objects.aget_or_create(owner=owner))[0].updated_at)
+
+
+def project_updated_at(project_id: int, owner):
+    """Time project of owner last changed, None if there is no such project"""
+
+    return (Project.objects
+            .filter(id=project_id, owner=owner)
+            .values_list("updated_at", flat=True)
+            .first())
+
+
+def has_messages(request) -> bool:
+    return len(get_messages(request)) > 0
+
+
+def etag(request, updated_at) -> str:
+    # Template responses render after the ETag is set, the CSRF secret
+    # their tokens need is created now so both see the same one
+    get_token(request)
+    parts = [
+        request.user.pk,
+        updated_at.isoformat(),
+        request.headers.get("HX-Request") == "true",
+        settings.COMPACT_TASK_ROWS,
+        # Pages embed CSRF tokens, which stop working with a new secret
+        request.META.get("CSRF_COOKIE", ""),
+    ]
+    return '"%s"' % hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def set_validators(request, response, updated_at):
+    """Add ETag and Last-Modified, make browsers revalidate on every use"""
+
+    if not has_messages(request):
+        response.headers["ETag"] = etag(request, updated_at)
+        response.headers["Last-Modified"] = http_date(updated_at.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["HX-Request"])
+    return response
+
+
+def not_modified(request, updated_at):
+    """304 response when the client has the page as of updated_at, else None"""
+
+    if has_messages(request):
+        return None
+    response = get_conditional_response(
+        request,
+        etag=etag(request, updated_at),
+        last_modified=int(updated_at.timestamp()),
+    )
+    if response is None:
+        return None
+    return set_validators(request, response, updated_at)
@@ -0,0 +1,165 @@
+"""Live updates pushed to the other tabs of a user.
+
+Write views `publish` which project or task they changed. Once the
+transaction commits, the broker of this process hands the change to the
+event streams of the owner (see `EventStreamView` in async_views.py).
+Each stream renders the changed project or task row for its own tab
+and sends it as a Server-Sent Event, which static/todo_list/live.js
+swaps into the page. A tab sends its id with its requests, so it gets
+no events of its own changes, it already has their responses.
+
+The broker only reaches streams of the same process. Every
+EVENTS_HEARTBEAT seconds a stream compares the owner's timestamp (see
+timestamps.py) with the one of its last update, and asks the page to
+reload its projects when it moved without an event. That covers writes
+of other processes and of jobs.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .cache import aset_task_list_fragments
+from .models import Project, Task
+
+
+# Events a stream keeps while it renders, more make it reload instead
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Queue of events of one stream, filled from any thread"""
+
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop closed before the stream unsubscribed
+            pass
+
+    def _put(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get_many(self, timeout: float) -> list[dict]:
+        """Wait up to timeout for events, return them all at once"""
+
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+
+class Broker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, owner_id: int) -> Subscription:
+        subscription = Subscription(owner_id)
+        with self.lock:
+            self.subscriptions[owner_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            subscriptions = self.subscriptions[subscription.owner_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.owner_id]
+
+    def publish(self, owner_id: int, event: dict) -> None:
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(owner_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+
+broker = Broker()
+
+
+def publish(request, project_id: int, task_id: int | None = None) -> None:
+    """Tell other tabs of the user that a project, or one task of it, changed.
+
+    A project event replaces the whole project with its first page of
+    tasks, use it when rows were added, removed or reordered.
+    """
+
+    event = change(request, project_id, task_id)
+    transaction.on_commit(partial(broker.publish, request.user.id, event))
+
+
+def apublish(request, project_id: int, task_id: int | None = None) -> None:
+    """`publish` for async views, their writes are committed by the time they call it"""
+
+    broker.publish(request.user.id, change(request, project_id, task_id))
+
+
+def change(request, project_id: int, task_id: int | None) -> dict:
+    return {
+        "project": project_id,
+        "task": task_id,
+        "tab": request.headers.get("X-Tab-Id", ""),
+    }
+
+
+def format_event(name: str, data) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def render_swaps(request, events: list[dict]) -> list[dict]:
+    """Swaps of page elements that apply events for the tab of request"""
+
+    project_ids = {event["project"] for event in events}
+    whole_projects = {event["project"] for event in events if event["task"] is None}
+    # A project event covers task events of the project
+    task_ids = {
+        event["task"] for event in events
+        if event["task"] is not None and event["project"] not in whole_projects
+    }
+
+    projects = {
+        project.id: project async for project in
+        Project.objects.filter(id__in=project_ids, owner=request.user)
+    }
+    tasks = {
+        task.id: task async for task in
+        Task.objects.filter(id__in=task_ids, owner=request.user, project__deleted_at=None)
+    }
+    await aset_task_list_fragments(request, [projects[id] for id in whole_projects if id in projects])
+
+    swaps = []
+    for id in sorted(project_ids):
+        project = projects.get(id)
+        if project is None:
+            swaps.append({"target": f"#project-{id}", "swap": "delete"})
+        elif id in whole_projects:
+            html = render_to_string("todo_list/project.html", {"project": project}, request)
+            # Not on the page yet, e.g. created in the other tab
+            swaps.append({"target": f"#project-{id}", "swap": "outerHTML", "html": html, "insert": True})
+        else:
+            html = render_to_string("todo_list/project_title.html", {"project": project}, request)
+            swaps.append({"target": f"#project-update-{id}", "swap": "outerHTML", "html": html})
+    for id in sorted(task_ids):
+        task = tasks.get(id)
+        if task is None:
+            swaps.append({"target": f"#task-{id}", "swap": "delete"})
+        else:
+            html = render_to_string("todo_list/partials/one_task.html", {"task": task}, request)
+            swaps.append({"target": f"#task-{id}", "swap": "outerHTML", "html": html})
+    return swaps
@@ -0,0 +1,92 @@
+"""Tasks of all projects of an owner filtered by due window, status and priority.
+
+Every combination is read from one of the `task_owner_*` indexes of Task:
+
+* sorted by deadline: (owner, [completed,] deadline, id, priority)
+* sorted by priority: (owner, [completed,] -priority, deadline, id)
+
+Equality columns come first and sort columns next, so pages are read in
+index order and LIMIT stops the scan early. The due window is a range on
+deadline and the minimum priority a range or trailing column, both are
+checked in the index without reading table rows. Tasks of projects
+being deleted are skipped by the primary key join to their project.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Q, QuerySet
+
+from .models import Task
+
+
+DUE_CHOICES = [
+    ("any", "Any time"),
+    ("overdue", "Overdue"),
+    ("today", "Due today"),
+    ("week", "Due this week"),
+    ("later", "Due later"),
+]
+STATUS_CHOICES = [
+    ("open", "Open"),
+    ("completed", "Completed"),
+    ("all", "All"),
+]
+SORT_CHOICES = [
+    ("deadline", "Deadline"),
+    ("priority", "Priority"),
+]
+
+SORT_ORDERINGS = {
+    "deadline": ("deadline", "id"),
+    "priority": ("-priority", "deadline", "id"),
+}
+
+
+def due_filter(due: str, today: date) -> Q:
+    """Deadline window relative to today, the week is today and six days after"""
+
+    week_end = today + timedelta(days=7)
+    return {
+        "any": Q(),
+        "overdue": Q(deadline__lt=today),
+        "today": Q(deadline=today),
+        "week": Q(deadline__gte=today, deadline__lt=week_end),
+        "later": Q(deadline__gte=week_end),
+    }[due]
+
+
+def filter_tasks(owner, due: str, status: str, min_priority: int | None, today: date) -> QuerySet:
+    """Tasks of owner in the due window and status, with at least min_priority"""
+
+    queryset = Task.objects.filter(due_filter(due, today), owner=owner, project__deleted_at=None)
+    if status != "all":
+        queryset = queryset.filter(completed=status == "completed")
+    if min_priority is not None:
+        queryset = queryset.filter(priority__gte=min_priority)
+    return queryset
+
+
+def sorted_tasks_after(
+    queryset: QuerySet,
+    sort: str,
+    priority: int | None,
+    deadline: date | None,
+    after: int | None,
+) -> QuerySet:
+    """Tasks in order of sort, starting right after the cursor.
+
+    The cursor is the last task of the previous page. Its leading column
+    is also given as a plain bound, which databases use as an index range.
+    """
+
+    queryset = queryset.order_by(*SORT_ORDERINGS[sort])
+    if deadline is None or after is None:
+        return queryset
+    after_deadline = Q(deadline__gt=deadline) | Q(deadline=deadline, id__gt=after)
+    if sort == "deadline":
+        return queryset.filter(after_deadline, deadline__gte=deadline)
+    if priority is None:
+        return queryset
+    return queryset.filter(
+        Q(priority__lt=priority) | Q(after_deadline, priority=priority),
+        priority__lte=priority,
+    )
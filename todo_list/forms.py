@@ -1,23 +1,28 @@
 from django import forms
+from django.db import transaction
+from django.utils import timezone
 
+from .filters import DUE_CHOICES, SORT_CHOICES, STATUS_CHOICES
 from .models import Project, Task
 
 
 class PriorityTaskForm(forms.ModelForm):
     
-    def __init__(self, *args, instance=None, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.task = instance
+    # Range of priority is checked by the UPDATE itself, see TaskQuerySet.change_priority
+    out_of_range_errors = {
+        1: "Priority is maximum",
+        -1: "Priority is minimum",
+    }
 
     def clean_priority(self, **kwargs):
-        priority_db = self.task.priority
         change_val = self.cleaned_data['priority']
-        if  change_val == 1 and priority_db == 10:
-            raise forms.ValidationError("Priority is maximum")
-        if  change_val == -1 and priority_db == 0:
-            raise forms.ValidationError("Priority is minimum")
+        if change_val not in self.out_of_range_errors:
+            raise forms.ValidationError("Priority can be changed by one")
         return change_val
-        
+
+    def add_out_of_range_error(self):
+        self.add_error('priority', self.out_of_range_errors[self.cleaned_data['priority']])
+
 
     class Meta:
         model = Task
@@ -59,3 +64,196 @@ class ProjectForm(forms.ModelForm):
                 'placeholder': 'Your new project name',
             }),
         }
+
+
+class ProjectCursorForm(forms.Form):
+    after = forms.IntegerField(required=False, min_value=0)
+
+
+class TaskCursorForm(forms.Form):
+    priority = forms.IntegerField()
+    rank = forms.IntegerField()
+    after = forms.IntegerField(min_value=0)
+
+
+class TaskMoveForm(forms.Form):
+    """Neighbours of a dragged task, the tasks right above and below where it was dropped"""
+
+    after = forms.IntegerField(required=False, min_value=1)
+    before = forms.IntegerField(required=False, min_value=1)
+
+    def __init__(self, *args, task_id: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task_id = task_id
+
+    def clean(self):
+        cleaned_data = super().clean()
+        neighbours = [cleaned_data.get("after"), cleaned_data.get("before")]
+        if neighbours == [None, None]:
+            raise forms.ValidationError("Task needs a neighbour")
+        if self.task_id in neighbours or neighbours[0] == neighbours[1]:
+            raise forms.ValidationError("Neighbours must be other tasks")
+        return cleaned_data
+
+
+class TaskSearchForm(forms.Form):
+    # Deep offsets make the database skip ranked rows, keep them bounded
+    MAX_PAGE = 100
+
+    q = forms.CharField(required=False, max_length=200)
+    page = forms.IntegerField(required=False, min_value=1, max_value=MAX_PAGE)
+
+
+class TaskFilterForm(forms.Form):
+    """Filters of the task view, empty fields mean the first choice.
+
+    `priority`, `deadline` and `after` are the cursor of the next page.
+    """
+
+    due = forms.ChoiceField(
+        choices=DUE_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': "form-select"}),
+        )
+    status = forms.ChoiceField(
+        choices=STATUS_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': "form-select"}),
+        )
+    min_priority = forms.IntegerField(
+        required=False,
+        min_value=Task.MIN_PRIORITY,
+        max_value=Task.MAX_PRIORITY,
+        widget=forms.NumberInput(attrs={
+            'class': "form-control",
+            'placeholder': 'Min priority',
+        }),
+        )
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': "form-select"}),
+        )
+
+    priority = forms.IntegerField(required=False)
+    deadline = forms.DateField(required=False)
+    after = forms.IntegerField(required=False, min_value=0)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for name in ("due", "status", "sort"):
+            if name in cleaned_data and not cleaned_data[name]:
+                cleaned_data[name] = self.fields[name].choices[0][0]
+        cursor = ["deadline", "after"]
+        if cleaned_data.get("sort") == "priority":
+            cursor.append("priority")
+        given = [name for name in cursor if cleaned_data.get(name) is not None]
+        if given and len(given) != len(cursor):
+            raise forms.ValidationError("Incomplete cursor")
+        return cleaned_data
+
+
+class TaskExportForm(forms.Form):
+    project = forms.IntegerField(required=False, min_value=0)
+
+
+class IdListField(forms.Field):
+    """List of ids sent as repeated parameter, e.g. `?tasks=1&tasks=2`"""
+    widget = forms.MultipleHiddenInput
+
+    def __init__(self, *args, max_length: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_length = max_length
+
+    def to_python(self, value):
+        try:
+            ids = {int(id) for id in value or []}
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Enter a list of ids")
+        if len(ids) > self.max_length:
+            raise forms.ValidationError(f"Select at most {self.max_length} items")
+        return sorted(ids)
+
+
+class BulkTaskForm(forms.Form):
+    """Apply one operation to many tasks of the owner in one transaction"""
+
+    # Stays below DATA_UPLOAD_MAX_NUMBER_FIELDS together with other fields
+    MAX_TASKS = 500
+
+    COMPLETE = "complete"
+    UNCOMPLETE = "uncomplete"
+    DELETE = "delete"
+    SET_PRIORITY = "set_priority"
+    MOVE = "move"
+    SET_DEADLINE = "set_deadline"
+
+    OPERATIONS = [
+        (COMPLETE, "Complete"),
+        (UNCOMPLETE, "Uncomplete"),
+        (DELETE, "Delete"),
+        (SET_PRIORITY, "Set priority"),
+        (MOVE, "Move to project"),
+        (SET_DEADLINE, "Set deadline"),
+    ]
+
+    tasks = IdListField(max_length=MAX_TASKS)
+    operation = forms.ChoiceField(choices=OPERATIONS)
+    priority = forms.IntegerField(
+        required=False,
+        min_value=Task.MIN_PRIORITY,
+        max_value=Task.MAX_PRIORITY,
+        )
+    project = forms.ModelChoiceField(queryset=Project.objects.none(), required=False)
+    deadline = forms.DateField(required=False)
+
+    # Operations that change task counters of projects
+    COUNTED_OPERATIONS = {COMPLETE, UNCOMPLETE, DELETE, MOVE}
+
+    required_fields = {
+        SET_PRIORITY: "priority",
+        MOVE: "project",
+        SET_DEADLINE: "deadline",
+    }
+
+    def __init__(self, *args, owner, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.owner = owner
+        self.fields['project'].queryset = Project.objects.filter(owner=owner)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        field = self.required_fields.get(cleaned_data.get('operation'))
+        if field and cleaned_data.get(field) is None and field not in self.errors:
+            self.add_error(field, "This field is required for the operation")
+        return cleaned_data
+
+    def save(self) -> tuple[int, set[int]]:
+        """Apply operation, return number of tasks and ids of changed projects"""
+
+        operation = self.cleaned_data['operation']
+        tasks = Task.objects.of_owner(self.owner).filter(id__in=self.cleaned_data['tasks'])
+        with transaction.atomic():
+            project_ids = set(tasks.values_list("project_id", flat=True).distinct())
+            if operation == self.DELETE:
+                count = tasks.delete()[1].get(Task._meta.label, 0)
+            else:
+                count = tasks.update(**self.get_changes(), updated_at=timezone.now())
+            if operation == self.MOVE:
+                project_ids.add(self.cleaned_data['project'].id)
+            if operation in self.COUNTED_OPERATIONS:
+                # Queryset updates and deletes send no signals for counters
+                Project.objects.filter(id__in=project_ids).recount()
+        return count, project_ids
+
+    def get_changes(self) -> dict:
+        operation = self.cleaned_data['operation']
+        if operation == self.COMPLETE:
+            return {"completed": True}
+        if operation == self.UNCOMPLETE:
+            return {"completed": False}
+        if operation == self.SET_PRIORITY:
+            return {"priority": self.cleaned_data['priority']}
+        if operation == self.MOVE:
+            return {"project": self.cleaned_data['project']}
+        return {"deadline": self.cleaned_data['deadline']}
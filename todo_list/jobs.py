@@ -0,0 +1,199 @@
+"""Jobs run outside requests by the `run_jobs` worker.
+
+Jobs are rows of `Job`, so a request queues one in its own transaction
+and nothing but the database is needed. Workers claim a job with an
+UPDATE that only one of them can win. A running job that stopped
+reporting progress for STALE_AFTER (its worker died) is claimed again,
+so handlers must be safe to run twice. A job that raised is queued again
+after RETRY_DELAY, doubled for every further attempt, until it has run
+MAX_ATTEMPTS times. Then it stays failed.
+
+Every finished job is logged as JSON on the `todo_list.jobs` logger with
+its wait in the queue and run time, `list_jobs` shows queued, running
+and failed ones with their progress.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import task_list_cache
+from .models import Job, Project, Task
+
+
+logger = logging.getLogger("todo_list.jobs")
+
+STALE_AFTER = timedelta(minutes=5)
+
+MAX_ATTEMPTS = 5
+
+# Wait before the second attempt, doubled for each further one
+RETRY_DELAY = timedelta(seconds=30)
+
+# Tasks deleted per statement and transaction when purging a project
+PURGE_BATCH_SIZE = 1000
+
+HANDLERS = {}
+
+
+def handler(name: str):
+    """Register function as handler of jobs with name.
+
+    It's called with the job and the keyword arguments of `enqueue`.
+    """
+
+    def register(function):
+        HANDLERS[name] = function
+        return function
+
+    return register
+
+
+def enqueue(name: str, total: int | None = None, **arguments) -> Job:
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown job: {name}")
+    return Job.objects.create(name=name, arguments=arguments, total=total)
+
+
+def stale() -> Q:
+    return Q(status=Job.RUNNING, heartbeat_at__lt=timezone.now() - STALE_AFTER)
+
+
+def claimable() -> Q:
+    return (
+        Q(status=Job.QUEUED, run_after__lte=timezone.now())
+        | (stale() & Q(attempts__lt=MAX_ATTEMPTS))
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Wait before the next attempt of a job that failed attempts times"""
+
+    return RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def claim() -> Job | None:
+    """Mark the oldest claimable job running and return it"""
+
+    # Their workers died on every attempt
+    Job.objects.filter(stale(), attempts__gte=MAX_ATTEMPTS).update(
+        status=Job.FAILED,
+        error="Worker stopped reporting progress",
+        finished_at=timezone.now(),
+        )
+    for id in Job.objects.filter(claimable()).order_by("id").values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        # Another worker may have claimed it since it was read
+        claimed = Job.objects.filter(claimable(), pk=id).update(
+            status=Job.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F("attempts") + 1,
+            )
+        if claimed:
+            return Job.objects.get(pk=id)
+    return None
+
+
+def advance(job: Job, done: int) -> None:
+    """Add done units to progress of job, which also shows it's alive"""
+
+    job.progress += done
+    job.heartbeat_at = timezone.now()
+    Job.objects.filter(pk=job.pk).update(progress=job.progress, heartbeat_at=job.heartbeat_at)
+
+
+def run(job: Job) -> Job:
+    """Run claimed job and record how it ended"""
+
+    try:
+        HANDLERS[job.name](job, **job.arguments)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < MAX_ATTEMPTS:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.DONE
+    ended = timezone.now()
+    if job.status != Job.QUEUED:
+        job.finished_at = ended
+    Job.objects.filter(pk=job.pk).update(
+        status=job.status,
+        error=job.error,
+        run_after=job.run_after,
+        finished_at=job.finished_at,
+        )
+    logger.info(json.dumps({
+        "job": job.pk,
+        "name": job.name,
+        "status": job.status,
+        "attempts": job.attempts,
+        "progress": job.progress,
+        "total": job.total,
+        "wait_ms": round((job.started_at - job.created_at).total_seconds() * 1000, 3),
+        "run_ms": round((ended - job.started_at).total_seconds() * 1000, 3),
+    }))
+    return job
+
+
+def run_next() -> Job | None:
+    """Claim and run one job, None when there is nothing to do"""
+
+    job = claim()
+    if job is None:
+        return None
+    return run(job)
+
+
+def delete_project(project: Project) -> Job:
+    """Hide project now and queue deletion of its tasks and itself"""
+
+    with transaction.atomic():
+        Project.objects.filter(pk=project.pk).update(
+            deleted_at=timezone.now(),
+            updated_at=timezone.now(),
+            )
+        return enqueue("purge_project", total=project.task_count, project_id=project.pk)
+
+
+@handler("purge_project")
+def purge_project(job: Job, project_id: int) -> None:
+    """Delete tasks of project in batches, then the project.
+
+    Each batch is one short transaction, so other writers wait at most
+    one batch and memory doesn't grow with the size of the project.
+    """
+
+    while True:
+        with transaction.atomic():
+            deleted = Task.objects.purge(project_id, PURGE_BATCH_SIZE)
+        advance(job, deleted)
+        if deleted < PURGE_BATCH_SIZE:
+            break
+    # Tasks are gone, so the cascade has nothing left to load
+    Project.all_objects.filter(pk=project_id, deleted_at__isnull=False).delete()
+
+
+def queue_rebalance(project_id: int, priority: int) -> Job | None:
+    """Queue rebalance of ranks of tasks of project with priority, unless one is queued"""
+
+    arguments = {"project_id": project_id, "priority": priority}
+    if Job.objects.filter(name="rebalance_ranks", status=Job.QUEUED, arguments=arguments).exists():
+        return None
+    return enqueue("rebalance_ranks", **arguments)
+
+
+@handler("rebalance_ranks")
+def rebalance_ranks(job: Job, project_id: int, priority: int) -> None:
+    """Spread ranks of tasks moved into a crowded spot again, see TaskQuerySet.move"""
+
+    advance(job, Task.objects.rebalance(project_id, priority))
+    # Cursors of loaded pages hold ranks
+    task_list_cache.bump(project_id)
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from todo_list.models import Project, Task
+
+
+ROUTES = ["projects_list", "task_completed", "task_priority"]
+HANDLERS = ["wsgi", "asgi"]
+# Kinds of failed requests, everything but 2xx and 304 responses
+FAILURES = ["redirects", "client_errors", "server_errors", "exceptions"]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def failure(status_code: int) -> str | None:
+    """Kind of failure of a response, None for a success"""
+    if 200 <= status_code < 300 or status_code == 304:
+        return None
+    if status_code < 400:
+        # Including redirects to the login page
+        return "redirects"
+    if status_code < 500:
+        return "client_errors"
+    return "server_errors"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and latency of the WSGI handler with sync views "
+        "(thread pool) and the ASGI handler with async views (asyncio) "
+        "under the same concurrency. Requests are made in process, so only "
+        "Django and the database are measured, not a web server. Responses "
+        "other than 2xx and 304 and raised exceptions count as errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=500, help="Requests per route and handler")
+        parser.add_argument("--projects", type=int, default=20)
+        parser.add_argument("--tasks", type=int, default=20, help="Tasks per project")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+        parser.add_argument(
+            "--routes", type=lambda value: value.split(","), default=ROUTES,
+            help=f"Comma separated subset of {','.join(ROUTES)}",
+        )
+        parser.add_argument(
+            "--handlers", type=lambda value: value.split(","), default=HANDLERS,
+            help=f"Comma separated subset of {','.join(HANDLERS)}",
+        )
+
+    def handle(self, *args, **options):
+        for option, choices in [("routes", ROUTES), ("handlers", HANDLERS)]:
+            unknown = set(options[option]) - set(choices)
+            if unknown:
+                raise CommandError(f"Unknown {option}: {', '.join(sorted(unknown))}")
+        user = self.seed(options["projects"], options["tasks"])
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                results = self.run(user, options)
+        finally:
+            user.delete()
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'route':<16}{'handler':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+            f"{'3xx':>6}{'4xx':>6}{'5xx':>6}{'exc':>6}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['route']:<16}{result['handler']:<8}{result['rps']:>10.1f}"
+                f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>8}"
+                + "".join(f"{result['failures'][kind]:>6}" for kind in FAILURES)
+            )
+
+    def seed(self, projects: int, tasks: int):
+        user = get_user_model().objects.create_user(username=f"bench-{time.time_ns()}")
+        created = Project.objects.bulk_create(
+            Project(owner=user, name=f"Project {i}") for i in range(projects)
+        )
+        Task.objects.bulk_create(
+            Task(project=project, content=f"Task {i}", priority=i % 11)
+            for project in created
+            for i in range(tasks)
+        )
+        # bulk_create sends no signals for counters
+        Project.objects.filter(owner=user).recount()
+        return user
+
+    def run(self, user, options) -> list[dict]:
+        login = Client()
+        login.force_login(user)
+        session = login.cookies[settings.SESSION_COOKIE_NAME].value
+        task = Task.objects.filter(project__owner=user).first()
+        htmx = {"HX-Request": "true"}
+        routes = [
+            ("projects_list", "get", lambda: reverse("projects:projects_list"), {}),
+            ("task_completed", "post",
+             lambda: reverse("projects:task_completed", kwargs={"pk": task.id}), htmx),
+            ("task_priority", "post",
+             lambda: reverse("projects:task_priority", kwargs={"pk": task.id}), htmx),
+        ]
+        results = []
+        for name, method, url, headers in routes:
+            if name not in options["routes"]:
+                continue
+            if "wsgi" in options["handlers"]:
+                results.append(self.bench_wsgi(name, method, url(), headers, session, options))
+            if "asgi" in options["handlers"]:
+                with override_settings(ROOT_URLCONF="task_manager.asgi_urls"):
+                    results.append(asyncio.run(
+                        self.bench_asgi(name, method, url(), headers, session, options)
+                    ))
+        return results
+
+    def result(self, route, handler, latencies, failures: Counter, elapsed) -> dict:
+        return {
+            "route": route,
+            "handler": handler,
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "errors": sum(failures.values()),
+            "failures": {kind: failures[kind] for kind in FAILURES},
+        }
+
+    async def request_async(self, request, url, data, headers) -> str | None:
+        try:
+            response = await request(url, data=data, headers=headers)
+        except Exception:
+            return "exceptions"
+        return failure(response.status_code)
+
+    def request_sync(self, request, url, data, headers) -> str | None:
+        try:
+            response = request(url, data=data, headers=headers)
+        except Exception:
+            return "exceptions"
+        return failure(response.status_code)
+
+    def data(self, method, number: int) -> dict:
+        # Priority goes up and down, so it stays in range
+        return {"priority": 1 if number % 2 else -1} if method == "post" else {}
+
+    def bench_wsgi(self, route, method, url, headers, session, options) -> dict:
+        latencies, failures = [], Counter()
+        remaining = [options["requests"]]
+        lock = threading.Lock()
+
+        def worker():
+            # Exceptions of views are raised and counted, not turned into 500
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session
+            request = getattr(client, method)
+            try:
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                        number = remaining[0]
+                    start = time.perf_counter()
+                    kind = self.request_sync(request, url, self.data(method, number), headers)
+                    latency = time.perf_counter() - start
+                    with lock:
+                        latencies.append(latency)
+                        if kind is not None:
+                            failures[kind] += 1
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            for _ in range(options["concurrency"]):
+                executor.submit(worker)
+        return self.result(route, "wsgi", latencies, failures, time.perf_counter() - start)
+
+    async def bench_asgi(self, route, method, url, headers, session, options) -> dict:
+        latencies, failures = [], Counter()
+        remaining = [options["requests"]]
+
+        async def worker():
+            client = AsyncClient()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session
+            request = getattr(client, method)
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                number = remaining[0]
+                start = time.perf_counter()
+                kind = await self.request_async(request, url, self.data(method, number), headers)
+                latencies.append(time.perf_counter() - start)
+                if kind is not None:
+                    failures[kind] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+        return self.result(route, "asgi", latencies, failures, time.perf_counter() - start)
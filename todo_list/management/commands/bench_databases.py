@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+ENGINES = ["sqlite3", "postgresql"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the project list and toggle endpoints on "
+        "SQLite and PostgreSQL. Each engine runs in its own process with "
+        "DB_ENGINE set, migrates its database and runs bench_asgi with the "
+        "WSGI handler, so settings are exactly those used in production. "
+        "Other DB_* variables are taken from the environment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--engines", type=lambda value: value.split(","), default=ENGINES,
+            help=f"Comma separated subset of {','.join(ENGINES)}",
+        )
+        parser.add_argument("--sqlite-name", help="SQLite database file, DB_NAME by default")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=500, help="Requests per route and engine")
+        parser.add_argument("--projects", type=int, default=20)
+        parser.add_argument("--tasks", type=int, default=20, help="Tasks per project")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        unknown = set(options["engines"]) - set(ENGINES)
+        if unknown:
+            raise CommandError(f"Unknown engines: {', '.join(sorted(unknown))}")
+
+        results = []
+        for engine in options["engines"]:
+            for result in self.bench(engine, options):
+                results.append({"engine": engine, **result})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'engine':<12}{'route':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['engine']:<12}{result['route']:<16}{result['rps']:>10.1f}"
+                f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>8}"
+            )
+
+    def bench(self, engine: str, options) -> list[dict]:
+        env = {**os.environ, "DB_ENGINE": engine}
+        if engine == "sqlite3" and options["sqlite_name"]:
+            env["DB_NAME"] = options["sqlite_name"]
+        manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+
+        self.run(engine, manage + ["migrate", "--noinput", "-v", "0"], env)
+        output = self.run(engine, manage + [
+            "bench_asgi", "--json",
+            "--handlers", "wsgi",
+            "--routes", "projects_list,task_completed",
+            "--concurrency", str(options["concurrency"]),
+            "--requests", str(options["requests"]),
+            "--projects", str(options["projects"]),
+            "--tasks", str(options["tasks"]),
+        ], env)
+        return json.loads(output)
+
+    def run(self, engine: str, command: list[str], env: dict) -> str:
+        process = subprocess.run(command, env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(f"{engine}: {' '.join(command[2:4])} failed\n{process.stderr}")
+        return process.stdout
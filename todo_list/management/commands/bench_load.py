@@ -0,0 +1,298 @@
+import json
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from todo_list.models import Project, Task
+from todo_list.management.commands.bench_asgi import percentile
+
+
+PASSWORD = "bench-load-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users with projects and tasks, log them in and drive every "
+        "route of todo_list and custom_auth, htmx variants included, from "
+        "concurrent workers. Report throughput, p50/p95/p99 latency and "
+        "queries per request as JSON that can be diffed between versions. "
+        "Seeded data is deleted at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--projects", type=int, default=50, help="Projects per user")
+        parser.add_argument("--tasks", type=int, default=50, help="Tasks per project")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+        parser.add_argument(
+            "--routes", type=lambda value: value.split(","),
+            help="Comma separated route names, all by default",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        prefix = f"bench-load-{time.time_ns()}"
+        User = get_user_model()
+        try:
+            # Every client comes from one address, allauth would rate limit it
+            with override_settings(ALLOWED_HOSTS=["*"], ACCOUNT_RATE_LIMITS=False):
+                accounts = self.seed(prefix, options)
+                routes = self.routes(prefix, accounts, options)
+                if options["routes"]:
+                    unknown = set(options["routes"]) - {route[0] for route in routes}
+                    if unknown:
+                        raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+                    routes = [route for route in routes if route[0] in options["routes"]]
+                results = [self.bench(*route, options) for route in routes]
+        finally:
+            User.objects.filter(email__startswith=prefix).delete()
+
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "options": {
+                option: options[option]
+                for option in ["users", "projects", "tasks", "concurrency", "requests"]
+            },
+            "routes": results,
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{'route':<28}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['route']:<28}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                f"{result['queries_per_request']:>9.1f}{result['errors']:>8}"
+            )
+
+    def seed(self, prefix: str, options) -> list[dict]:
+        """Users with projects and tasks, plus spare rows for delete routes"""
+
+        accounts = []
+        spare = -(-options["requests"] // options["users"])
+        for i in range(options["users"]):
+            user = get_user_model().objects.create_user(
+                username=f"{prefix}-{i}",
+                email=f"{prefix}-{i}@example.com",
+                password=PASSWORD,
+            )
+            projects = Project.objects.bulk_create(
+                Project(owner=user, name=f"Project {j}")
+                for j in range(options["projects"] + spare)
+            )
+            projects, spare_projects = projects[:options["projects"]], projects[options["projects"]:]
+            tasks = Task.objects.bulk_create(
+                (Task(project=project, content=f"Task {k} of project {j}", priority=k % 11)
+                 for j, project in enumerate(projects)
+                 for k in range(options["tasks"])),
+                batch_size=1000,
+            )
+            spare_tasks = Task.objects.bulk_create(
+                Task(project=projects[0], content=f"Spare task {k}") for k in range(spare)
+            )
+            Project.objects.filter(owner=user).recount()
+            accounts.append({
+                "user": user,
+                "session": self.login(user),
+                "projects": [project.id for project in projects],
+                "tasks": [task.id for task in tasks],
+                # Delete routes take one spare row per request
+                "spare_projects": [project.id for project in spare_projects],
+                "spare_tasks": [task.id for task in spare_tasks],
+            })
+        return accounts
+
+    def login(self, user) -> str:
+        client = Client()
+        client.force_login(user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def routes(self, prefix: str, accounts: list[dict], options) -> list[tuple]:
+        """(name, method, headers, request) where request(number) gives url, data, session"""
+
+        htmx = {"HX-Request": "true"}
+        logout_sessions = [self.login(accounts[i % len(accounts)]["user"])
+                           for i in range(options["requests"])]
+
+        def account(number):
+            return accounts[number % len(accounts)]
+
+        def project(number):
+            projects = account(number)["projects"]
+            return projects[(number // len(accounts)) % len(projects)]
+
+        def task(number):
+            tasks = account(number)["tasks"]
+            return tasks[(number // len(accounts)) % len(tasks)]
+
+        def spare(number, kind):
+            return account(number)[kind][number // len(accounts)]
+
+        def page(name, **kwargs):
+            def request(number):
+                return reverse(name, kwargs=kwargs), {}, account(number)["session"]
+            return request
+
+        def on(name, key, select, data=None):
+            def request(number):
+                url = reverse(name, kwargs={key: select(number)})
+                return url, data(number) if data else {}, account(number)["session"]
+            return request
+
+        def anonymous(name, data=None):
+            def request(number):
+                return reverse(name), data(number) if data else {}, None
+            return request
+
+        return [
+            ("projects_list", "get", {}, page("projects:projects_list")),
+            ("projects_list:htmx_next", "get", htmx, lambda number: (
+                reverse("projects:projects_list"),
+                {"after": account(number)["projects"][0]},
+                account(number)["session"])),
+            ("projects_create:htmx", "get", htmx, page("projects:projects_create")),
+            ("projects_create:htmx_post", "post", htmx, lambda number: (
+                reverse("projects:projects_create"),
+                {"name": f"Bench {number}"},
+                account(number)["session"])),
+            ("projects_update:htmx", "get", htmx, on("projects:projects_update", "pk", project)),
+            ("projects_update:htmx_post", "post", htmx, on(
+                "projects:projects_update", "pk", project,
+                lambda number: {"name": f"Project {number}"})),
+            ("projects_delete:htmx_post", "post", htmx, on(
+                "projects:projects_delete", "pk",
+                lambda number: spare(number, "spare_projects"))),
+            ("task_list:htmx_next", "get", htmx, on(
+                "projects:task_list", "project_id", project,
+                lambda number: {"priority": 10, "rank": 0, "after": 0})),
+            ("task_create:htmx", "get", htmx, on("projects:task_create", "project_id", project)),
+            ("task_create:htmx_post", "post", htmx, on(
+                "projects:task_create", "project_id", project,
+                lambda number: {"content": f"Bench task {number}"})),
+            ("task_update:htmx", "get", htmx, on("projects:task_update", "pk", task)),
+            ("task_update:htmx_post", "post", htmx, on(
+                "projects:task_update", "pk", task,
+                lambda number: {"content": f"Task {number}", "deadline": "2030-01-01"})),
+            ("task_completed:htmx_post", "post", htmx, on("projects:task_completed", "pk", task)),
+            # Priority goes up and down, so it stays in range
+            ("task_priority:htmx_post", "post", htmx, on(
+                "projects:task_priority", "pk", task,
+                lambda number: {"priority": 1 if number // len(accounts) % 2 else -1})),
+            # First two tasks are of the first project when it has two or more
+            ("task_move:htmx_post", "post", htmx, lambda number: (
+                reverse("projects:task_move", kwargs={"pk": account(number)["tasks"][0]}),
+                {"after": account(number)["tasks"][1]},
+                account(number)["session"])),
+            ("task_delete:htmx_post", "post", htmx, on(
+                "projects:task_delete", "pk",
+                lambda number: spare(number, "spare_tasks"))),
+            ("task_bulk:htmx_post", "post", htmx, lambda number: (
+                reverse("projects:task_bulk"),
+                {"tasks": account(number)["tasks"][:20], "operation": "complete"},
+                account(number)["session"])),
+            ("task_search", "get", {}, lambda number: (
+                reverse("projects:task_search"), {"q": "task"}, account(number)["session"])),
+            ("task_search:htmx", "get", htmx, lambda number: (
+                reverse("projects:task_search"), {"q": "task 1", "page": 2},
+                account(number)["session"])),
+            ("task_filter", "get", {}, lambda number: (
+                reverse("projects:task_filter"), {"due": "week", "status": "open"},
+                account(number)["session"])),
+            ("task_filter:htmx", "get", htmx, lambda number: (
+                reverse("projects:task_filter"), {"sort": "priority", "min_priority": 1},
+                account(number)["session"])),
+            # Answered with 204 by the WSGI client, streams need the ASGI application
+            ("events", "get", {}, page("projects:events")),
+            ("api_projects", "get", {}, page("projects:api_projects")),
+            ("api_tasks:ndjson", "get", {}, lambda number: (
+                reverse("projects:api_tasks"),
+                {"project": project(number), "format": "ndjson"},
+                account(number)["session"])),
+            ("account_login", "get", {}, anonymous("account_login")),
+            ("account_login:post", "post", {}, anonymous(
+                "account_login",
+                lambda number: {"login": account(number)["user"].email, "password": PASSWORD})),
+            ("account_signup", "get", {}, anonymous("account_signup")),
+            ("account_signup:post", "post", {}, anonymous(
+                "account_signup",
+                lambda number: {
+                    "email": f"{prefix}-signup-{number}@example.com",
+                    "password1": PASSWORD,
+                    "password2": PASSWORD,
+                })),
+            ("account_logout:post", "post", {}, lambda number: (
+                reverse("account_logout"), {}, logout_sessions[number])),
+            # Changing the password would log out the other workers
+            ("account_change_password", "get", {}, page("account_change_password")),
+        ]
+
+    def bench(self, route, method, headers, request, options) -> dict:
+        latencies, queries, errors = [], [], [0]
+        remaining = [options["requests"]]
+        lock = threading.Lock()
+
+        def worker():
+            client = Client(raise_request_exception=False)
+            send = getattr(client, method)
+            try:
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                        number = remaining[0]
+                    url, data, session = request(number)
+                    client.cookies.clear()
+                    if session is not None:
+                        client.cookies[settings.SESSION_COOKIE_NAME] = session
+                    start = time.perf_counter()
+                    with CaptureQueriesContext(connection) as context:
+                        response = send(url, data=data, headers=headers)
+                        if response.streaming:
+                            b"".join(response.streaming_content)
+                    latency = time.perf_counter() - start
+                    with lock:
+                        latencies.append(latency)
+                        queries.append(len(context.captured_queries))
+                        errors[0] += response.status_code >= 400
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            workers = [executor.submit(worker) for _ in range(options["concurrency"])]
+        elapsed = time.perf_counter() - start
+        for future in workers:
+            future.result()
+        return {
+            "route": route,
+            "method": method.upper(),
+            "htmx": bool(headers),
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "queries_per_request": sum(queries) / len(queries) if queries else 0.0,
+            "max_queries": max(queries, default=0),
+            "errors": errors[0],
+        }
@@ -0,0 +1,79 @@
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import get_template, render_to_string
+
+from todo_list.models import Task
+from todo_list.templatetags.task_rows import ROW_URLS
+
+
+class Command(BaseCommand):
+    help = (
+        "Render rows of a large project and print rows/second and bytes/row "
+        "of compact and full rows of the task_row tag against a baseline "
+        "that reverses each URL, renders {% csrf_token %} and localizes ids "
+        "in every row. No database is used, tasks are built in memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=3, help="Renders per path, best one counts")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        tasks = [
+            Task(id=i + 1, project_id=1, content=f"Task {i}", priority=i % 11,
+                 completed=i % 3 == 0, deadline=date(2030, 1, 1))
+            for i in range(options["tasks"])
+        ]
+        context = {"tasks": tasks, "project_id": 1, "next_task": None, "csrf_token": "x" * 64}
+        baseline = self.baseline_template()
+        paths = [
+            ("compact", lambda: render_to_string(
+                "todo_list/partials/task_page.html", {**context, "compact_rows": True})),
+            ("task_row", lambda: render_to_string(
+                "todo_list/partials/task_page.html", {**context, "compact_rows": False})),
+            ("baseline", lambda: baseline.render(context)),
+        ]
+
+        results = []
+        for name, render in paths:
+            html = render()  # Warm up template and URL caches
+            best = min(self.time(render) for _ in range(max(1, options["repeat"])))
+            results.append({
+                "path": name,
+                "tasks": len(tasks),
+                "seconds": best,
+                "rows_per_sec": len(tasks) / best if best else 0.0,
+                "bytes_per_row": len(html.encode()) / len(tasks) if tasks else 0.0,
+            })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'path':<10}{'tasks':>8}{'ms':>10}{'rows/s':>12}{'bytes/row':>11}")
+        for result in results:
+            self.stdout.write(
+                f"{result['path']:<10}{result['tasks']:>8}{result['seconds'] * 1000:>10.1f}"
+                f"{result['rows_per_sec']:>12.0f}{result['bytes_per_row']:>11.0f}"
+            )
+
+    def time(self, render) -> float:
+        start = time.perf_counter()
+        render()
+        return time.perf_counter() - start
+
+    def baseline_template(self):
+        """Row template with URLs and CSRF input rendered by tags and localized ids"""
+
+        source = get_template("todo_list/partials/task_row.html").template.source
+        source = source.replace("{{csrf_input}}", "{% csrf_token %}")
+        source = source.replace("{{id}}", "{{task.id}}")
+        for key, name in ROW_URLS.items():
+            source = source.replace(f"{{{{urls.{key}}}}}", f"{{% url '{name}' task.id %}}")
+        return engines["django"].from_string(
+            "{% for task in tasks %}" + source + "{% endfor %}"
+        )
@@ -0,0 +1,102 @@
+import json
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.test.utils import CaptureQueriesContext
+
+from todo_list.models import Project, Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed one project with tasks of one priority and print the cost of "
+        "moving a task between two others with sparse ranks (TaskQuerySet.move), "
+        "against renumbering the tasks between the old and new place, and of "
+        "one rebalance of all ranks. Seeded data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=10000, help="Tasks of the project")
+        parser.add_argument("--moves", type=int, default=200, help="Moves per path")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'path':<10}{'tasks':>8}{'moves':>7}{'ms/move':>10}{'queries':>9}{'rows':>10}")
+        for result in results:
+            self.stdout.write(
+                f"{result['path']:<10}{result['tasks']:>8}{result['moves']:>7}"
+                f"{result['ms_per_move']:>10.3f}{result['queries_per_move']:>9.1f}"
+                f"{result['rows_per_move']:>10.1f}"
+            )
+
+    def run(self, options) -> list[dict]:
+        user = get_user_model().objects.create_user(username=f"reorder-{time.time_ns()}")
+        project = Project.objects.create(owner=user, name="Reorder")
+        Task.objects.bulk_create(
+            (Task(project=project, content=f"Task {i}") for i in range(options["tasks"])),
+            batch_size=1000,
+        )
+        ids = list(Task.objects.filter(project=project).values_list("id", flat=True))
+        rng = random.Random(options["seed"])
+
+        def moves():
+            return [tuple(rng.sample(ids, 2)) for _ in range(options["moves"])]
+
+        results = [self.measure("move", len(ids), moves(), lambda pk, after: self.move(user, pk, after))]
+        # One rebalance also gives renumber the dense ranks it expects
+        results.append(self.measure("rebalance", len(ids), [(project.id, 0)], Task.objects.rebalance))
+        results.append(self.measure("renumber", len(ids), moves(), lambda pk, after: self.renumber(project, pk, after)))
+        return results
+
+    def measure(self, path: str, tasks: int, moves: list[tuple[int, int]], move) -> dict:
+        rows = 0
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            for pk, after in moves:
+                rows += move(pk, after)
+            elapsed = time.perf_counter() - start
+        return {
+            "path": path,
+            "tasks": tasks,
+            "moves": len(moves),
+            "ms_per_move": elapsed * 1000 / len(moves),
+            "queries_per_move": len(context.captured_queries) / len(moves),
+            "rows_per_move": rows / len(moves),
+        }
+
+    def move(self, user, pk: int, after: int) -> int:
+        # The view queues a rebalance job for crowded spots, it runs outside requests
+        Task.objects.move(pk, user.id, after, None)
+        return 1
+
+    def renumber(self, project: Project, pk: int, after: int) -> int:
+        """Move with dense positions: shift every task between the old and new place"""
+
+        tasks = Task.objects.filter(project=project, priority=0)
+        rank = tasks.get(pk=pk).rank
+        target = tasks.get(pk=after).rank
+        if target > rank:
+            shifted = tasks.filter(rank__gt=rank, rank__lte=target).update(rank=models.F("rank") - Task.RANK_GAP)
+        else:
+            target += Task.RANK_GAP
+            shifted = tasks.filter(rank__gte=target, rank__lt=rank).update(rank=models.F("rank") + Task.RANK_GAP)
+        tasks.filter(pk=pk).update(rank=target)
+        return shifted + 1
@@ -0,0 +1,146 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from todo_list.models import Project, Task
+from todo_list.pagination import PROJECTS_PAGE_SIZE, TASKS_PAGE_SIZE, TASK_ORDERING
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large account, request every todo_list view and print "
+        "timings and EXPLAIN output of the queries each view runs. "
+        "Seeded data is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=200, help="Tasks per project")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per view for timings")
+        parser.add_argument("--keep", action="store_true", help="Keep seeded data")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Seeded data rolled back")
+
+    def run(self, options):
+        start = time.perf_counter()
+        user = self.seed(options["projects"], options["tasks"])
+        self.stdout.write(
+            f"Seeded {options['projects']} projects x {options['tasks']} tasks "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+        projects = list(Project.objects.filter(owner=user).order_by("id"))
+        project = projects[len(projects) // 2]
+        tasks = list(project.tasks.order_by(*TASK_ORDERING)[:TASKS_PAGE_SIZE])
+        task = tasks[-1]
+
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(user)
+        htmx = {"HX-Request": "true"}
+
+        views = [
+            ("projects_list", "get", reverse("projects:projects_list"), {}, {}),
+            ("projects_list next page", "get", reverse("projects:projects_list"),
+             {"after": projects[min(PROJECTS_PAGE_SIZE, len(projects)) - 1].id}, htmx),
+            ("task_list next page", "get",
+             reverse("projects:task_list", kwargs={"project_id": project.id}),
+             {"priority": task.priority, "rank": task.rank, "after": task.id}, htmx),
+            ("task_create", "post",
+             reverse("projects:task_create", kwargs={"project_id": project.id}),
+             {"content": "explain"}, htmx),
+            ("task_priority", "post",
+             reverse("projects:task_priority", kwargs={"pk": task.id}),
+             {"priority": 0}, htmx),
+            ("task_completed", "post",
+             reverse("projects:task_completed", kwargs={"pk": task.id}),
+             {"completed": True}, htmx),
+            ("task_search", "get", reverse("projects:task_search"),
+             {"q": "task"}, htmx),
+            ("task_filter", "get", reverse("projects:task_filter"),
+             {"due": "week", "status": "open"}, {}),
+            ("task_filter next page", "get", reverse("projects:task_filter"),
+             {"sort": "priority", "priority": task.priority,
+              "deadline": task.deadline, "after": task.id}, htmx),
+            ("task_update", "get",
+             reverse("projects:task_update", kwargs={"pk": task.id}), {}, htmx),
+            ("projects_update", "get",
+             reverse("projects:projects_update", kwargs={"pk": project.id}), {}, htmx),
+        ]
+        for name, method, url, data, headers in views:
+            self.explain_view(client, name, method, url, data, headers, options["repeat"])
+
+    def seed(self, projects: int, tasks: int):
+        user = get_user_model().objects.create_user(username=f"explain-{time.time_ns()}")
+        created = Project.objects.bulk_create(
+            (Project(owner=user, name=f"Project {i}") for i in range(projects)),
+            batch_size=1000,
+        )
+        for project in created:
+            Task.objects.bulk_create(
+                (
+                    Task(
+                        project=project,
+                        content=f"Task {i}",
+                        priority=i % 11,
+                        completed=i % 3 == 0,
+                    )
+                    for i in range(tasks)
+                ),
+                batch_size=1000,
+            )
+        # bulk_create sends no signals for counters
+        Project.objects.filter(owner=user).recount()
+        return user
+
+    def explain_view(self, client, name, method, url, data, headers, repeat):
+        request = getattr(client, method)
+        with CaptureQueriesContext(connection) as context:
+            response = request(url, data=data, headers=headers)
+        # Captured queries are read lazily from the log, which next requests reset
+        queries = list(context.captured_queries)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            request(url, data=data, headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name} {method.upper()} {url}"))
+        self.stdout.write(
+            f"status {response.status_code}, {len(queries)} queries, "
+            f"min {min(timings, default=0):.1f}ms, "
+            f"avg {sum(timings) / max(len(timings), 1):.1f}ms over {repeat} requests"
+        )
+        for query in queries:
+            sql = query["sql"]
+            self.stdout.write(f"\n  [{float(query['time']) * 1000:.2f}ms] {sql}")
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            for line in self.explain(sql):
+                self.stdout.write(f"    {line}")
+
+    def explain(self, sql: str) -> list[str]:
+        if connection.vendor == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        elif connection.vendor == "postgresql":
+            prefix = "EXPLAIN "
+        else:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
@@ -0,0 +1,229 @@
+import random
+from itertools import accumulate
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from todo_list import search, timestamps
+from todo_list.models import Project, Task
+
+
+VERBS = [
+    "Review", "Write", "Fix", "Plan", "Call", "Send", "Prepare", "Update",
+    "Book", "Buy", "Check", "Clean", "Organize", "Pay", "Read", "Test",
+]
+NOUNS = [
+    "report", "invoice", "meeting notes", "budget", "slides", "tickets",
+    "groceries", "car service", "dentist appointment", "newsletter",
+    "release", "backups", "documentation", "contract", "garden", "tax return",
+]
+AREAS = [
+    "Work", "Home", "Personal", "Health", "Finance", "Travel", "Study",
+    "Side project", "Family", "Shopping",
+]
+CONTENTS = [f"{verb} {noun}" for verb in VERBS for noun in NOUNS]
+# Most tasks keep the default priority, a few get bumped high
+PRIORITY_WEIGHTS = [40, 14, 10, 8, 6, 5, 4, 4, 3, 3, 3]
+PRIORITIES = list(range(len(PRIORITY_WEIGHTS)))
+PRIORITY_CUM_WEIGHTS = list(accumulate(PRIORITY_WEIGHTS))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users with many projects and tasks using batched "
+        "bulk_create in transactions. Projects and tasks per user follow "
+        "a long tailed distribution around the given means, priorities "
+        "lean to 0, deadlines spread from two months ago to four months "
+        "ahead and overdue tasks are mostly completed. Project counters "
+        "are computed while generating, then tables are analyzed so the "
+        "query planner picks indexes by the new data. On PostgreSQL users "
+        "are split over --processes. Into an empty database, or with "
+        "--unsafe-suspend-triggers, search and timestamp triggers are "
+        "dropped and tasks indexed once at the end, all in one transaction "
+        "and one process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--projects", type=int, default=100, help="Mean projects per user")
+        parser.add_argument("--tasks", type=int, default=100, help="Mean tasks per project")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT and transaction")
+        parser.add_argument("--processes", type=int, default=1, help="Worker processes on PostgreSQL")
+        parser.add_argument("--prefix", default=f"generated-{int(time.time())}", help="Username prefix")
+        parser.add_argument("--password", default="password", help="Password of every user")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--unsafe-suspend-triggers",
+            action="store_true",
+            help="Suspend triggers although the database has data, other writers wait for the whole run",
+        )
+
+    def handle(self, *args, **options):
+        for option in ["users", "projects", "tasks", "batch_size", "processes"]:
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be positive")
+        processes = options["processes"]
+        if processes > 1 and connection.vendor != "postgresql":
+            self.stderr.write(f"{connection.vendor} has a single writer, using one process")
+            processes = 1
+        # Triggers are only missing inside the transaction of the inserts,
+        # which holds the table locks, so it is worth it for a new database
+        suspend = options["unsafe_suspend_triggers"] or not Project.all_objects.exists()
+        if suspend and processes > 1:
+            self.stderr.write("Triggers are suspended in one transaction, using one process")
+            processes = 1
+
+        start = time.perf_counter()
+        # Hashing once instead of per user is what makes users cheap
+        password = make_password(options["password"])
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                username=f"{options['prefix']}-{i}",
+                email=f"{options['prefix']}-{i}@example.com",
+                password=password,
+            )
+            for i in range(options["users"])
+        )
+        numbered = [(number, user.id) for number, user in enumerate(users)]
+        chunks = [numbered[i::processes] for i in range(processes)]
+
+        if suspend:
+            # Triggers would index and touch projects row by row, one
+            # INSERT ... SELECT is faster and new projects are fresh anyway
+            with search.suspended(connection), timestamps.suspended(connection):
+                totals = [generate(chunks[0], options)]
+        elif processes == 1:
+            totals = [generate(chunks[0], options)]
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(processes, mp_context=get_context("fork")) as executor:
+                totals = list(executor.map(generate_in_process, chunks, [options] * processes))
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        projects = sum(total[0] for total in totals)
+        tasks = sum(total[1] for total in totals)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Generated {len(users)} users, {projects} projects and {tasks} tasks "
+            f"in {elapsed:.2f}s ({(projects + tasks) / elapsed:.0f} rows/s)"
+        )
+
+
+def generate(users: list[tuple[int, int]], options) -> tuple[int, int]:
+    """Projects and tasks for (number, id) of users, return how many of each were inserted"""
+
+    today = date.today()
+    batch_size = options["batch_size"]
+    insert_tasks = task_inserter()
+    projects, tasks = [], []
+    total_projects = total_tasks = 0
+
+    def flush():
+        with transaction.atomic():
+            Project.objects.bulk_create(projects, batch_size=batch_size)
+            insert_tasks(tasks)
+        projects.clear()
+        tasks.clear()
+
+    for user_number, user_id in users:
+        # Seeded by user, so data doesn't depend on number of processes
+        rng = random.Random(f"{options['seed']}-{user_number}")
+        for number in range(long_tail(rng, options["projects"])):
+            project = Project(
+                owner_id=user_id,
+                name=f"{rng.choice(AREAS)} {number + 1}",
+                task_count=0,
+                completed_count=0,
+            )
+            projects.append(project)
+            for _ in range(long_tail(rng, options["tasks"])):
+                deadline = today + timedelta(days=round(rng.triangular(-60, 120, 7)))
+                completed = rng.random() < (0.8 if deadline < today else 0.15)
+                tasks.append({
+                    "project": project,
+                    "owner": user_id,
+                    "content": CONTENTS[int(rng.random() * len(CONTENTS))],
+                    "priority": rng.choices(PRIORITIES, cum_weights=PRIORITY_CUM_WEIGHTS)[0],
+                    # In insert order like ranks by id, and below those of tasks created later
+                    "rank": (project.task_count + 1) * Task.RANK_GAP,
+                    "completed": completed,
+                    "deadline": deadline,
+                })
+                project.task_count += 1
+                project.completed_count += completed
+            if len(tasks) >= batch_size:
+                total_projects += len(projects)
+                total_tasks += len(tasks)
+                flush()
+    total_projects += len(projects)
+    total_tasks += len(tasks)
+    flush()
+    return total_projects, total_tasks
+
+
+def task_inserter():
+    """Function inserting task rows given as dicts with one executemany.
+
+    Building a model instance and compiling SQL per row costs more than
+    the INSERT itself. Columns not in the dicts get their field default,
+    `auto_now` columns the time of the call.
+    """
+
+    ops = connection.ops
+    fields = [field for field in Task._meta.concrete_fields if not field.primary_key]
+    prepare = {
+        "project": lambda project: project.id,
+        "owner": int,
+        "content": str,
+        "priority": int,
+        "rank": int,
+        "completed": bool,
+        "deadline": ops.adapt_datefield_value,
+    }
+    now = timezone.now()
+    defaults = {
+        field.name: field.get_db_prep_save(
+            now if getattr(field, "auto_now", False) else field.get_default(),
+            connection,
+            )
+        for field in fields if field.name not in prepare
+    }
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        ops.quote_name(Task._meta.db_table),
+        ", ".join(ops.quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+
+    def insert(tasks: list[dict]):
+        rows = [
+            [prepare[field.name](task[field.name]) if field.name in prepare
+             else defaults[field.name]
+             for field in fields]
+            for task in tasks
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    return insert
+
+
+def generate_in_process(users: list[tuple[int, int]], options) -> tuple[int, int]:
+    try:
+        return generate(users, options)
+    finally:
+        connections.close_all()
+
+
+def long_tail(rng: random.Random, mean: int) -> int:
+    """Positive count with given mean, most are small and a few are large"""
+
+    return max(1, round(rng.expovariate(1 / mean)))
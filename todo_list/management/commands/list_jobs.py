@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todo_list.jobs import MAX_ATTEMPTS
+from todo_list.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "List queued, running and failed jobs with their progress, how "
+        "long they waited for a worker and how long they have been running. "
+        "Failed jobs used up their attempts, queued ones may wait for a "
+        "retry. --all also lists done jobs, newest first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Include done jobs")
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--json", action="store_true", help="Print jobs as JSON")
+
+    def handle(self, *args, **options):
+        queryset = Job.objects.order_by("-id")
+        if not options["all"]:
+            queryset = queryset.filter(status__in=[Job.QUEUED, Job.RUNNING, Job.FAILED])
+        now = timezone.now()
+        rows = []
+        for job in queryset[:max(0, options["limit"])]:
+            started = job.started_at or now
+            rows.append({
+                "id": job.id,
+                "name": job.name,
+                "status": job.status,
+                "attempts": job.attempts,
+                "progress": job.progress,
+                "total": job.total,
+                # Seconds waited for a worker and run so far (or in total)
+                "wait": (started - job.created_at).total_seconds(),
+                "run": ((job.finished_at or now) - job.started_at).total_seconds() if job.started_at else 0.0,
+                # Seconds until a failed attempt is retried
+                "retry": max(0.0, (job.run_after - now).total_seconds()) if job.status == Job.QUEUED else 0.0,
+                "error": job.error.strip().splitlines()[-1] if job.error else "",
+            })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(
+            f"{'id':>6} {'name':<16}{'status':<9}{'attempts':>9}{'progress':>16}{'wait s':>9}{'run s':>9}"
+            f"{'retry s':>9}  error"
+        )
+        for row in rows:
+            total = row["total"] if row["total"] is not None else "?"
+            self.stdout.write(
+                f"{row['id']:>6} {row['name']:<16}{row['status']:<9}{f'{row['attempts']}/{MAX_ATTEMPTS}':>9}"
+                f"{f'{row['progress']}/{total}':>16}{row['wait']:>9.2f}{row['run']:>9.2f}{row['retry']:>9.0f}"
+                f"  {row['error']}"
+            )
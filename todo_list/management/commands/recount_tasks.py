@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+
+from todo_list.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Project.task_count and Project.completed_count in batches "
+        "of projects. With --check only report projects whose counters are "
+        "wrong and exit with an error if there are any."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--check", action="store_true", help="Report without fixing")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        checked = wrong = 0
+        after = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Project.objects
+                    .filter(id__gt=after)
+                    .order_by("id")
+                    .annotate(
+                        actual_tasks=Count("tasks"),
+                        actual_completed=Count("tasks", filter=Q(tasks__completed=True)),
+                        )
+                    .values_list(
+                        "id", "task_count", "completed_count",
+                        "actual_tasks", "actual_completed",
+                        )[:batch_size]
+                    )
+                if not batch:
+                    break
+                after = batch[-1][0]
+                checked += len(batch)
+
+                mismatched = []
+                for id, task_count, completed_count, tasks, completed in batch:
+                    if (task_count, completed_count) != (tasks, completed):
+                        mismatched.append(id)
+                        self.stdout.write(
+                            f"Project {id}: {completed_count}/{task_count} "
+                            f"stored, {completed}/{tasks} actual"
+                        )
+                wrong += len(mismatched)
+                if mismatched and not options["check"]:
+                    Project.objects.filter(id__in=mismatched).recount()
+
+        self.stdout.write(f"Checked {checked} projects, {wrong} with wrong counters")
+        if wrong and options["check"]:
+            raise CommandError(f"{wrong} projects have wrong task counters")
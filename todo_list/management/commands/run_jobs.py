@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from todo_list import jobs
+from todo_list.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued jobs one at a time, e.g. deletion of projects, and "
+        "print how long each waited in the queue and ran. Polls the queue "
+        "every --sleep seconds when it is empty. With --burst exit once "
+        "there is nothing to do. Several workers can run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds between polls of an empty queue")
+        parser.add_argument("--burst", action="store_true", help="Exit when the queue is empty")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Exit after this many jobs, 0 runs forever")
+
+    def handle(self, *args, **options):
+        if options["sleep"] < 0:
+            raise CommandError("--sleep can't be negative")
+        count = 0
+        try:
+            while not options["max_jobs"] or count < options["max_jobs"]:
+                # Long running worker, like a request it shouldn't keep broken connections
+                close_old_connections()
+                job = jobs.run_next()
+                if job is None:
+                    if options["burst"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+                count += 1
+                self.report(job)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Ran {count} jobs")
+
+    def report(self, job: Job):
+        wait = (job.started_at - job.created_at).total_seconds()
+        run = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        line = (
+            f"Job {job.id} {job.name} {job.status} after {job.attempts} attempts, "
+            f"{job.progress}/{job.total if job.total is not None else '?'} done, "
+            f"waited {wait:.2f}s, ran {run:.2f}s"
+        )
+        if job.status == Job.QUEUED:
+            line += f", retried in {(job.run_after - timezone.now()).total_seconds():.0f}s"
+        if job.status in (Job.QUEUED, Job.FAILED):
+            self.stderr.write(line)
+            self.stderr.write(job.error)
+        else:
+            self.stdout.write(line)
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from todo_list.models import Project, Task
+
+
+PROFILES = ["default", "wal"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Toggle tasks from writer threads while reader threads load the "
+        "project list, once per SQLITE_PROFILE, and report writes/sec, "
+        "reads/sec and 'database is locked' errors. Every profile runs in "
+        "its own process on a new SQLite file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", type=lambda value: value.split(","), default=PROFILES,
+            help=f"Comma separated subset of {','.join(PROFILES)}",
+        )
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+        # Set for the per profile process
+        parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            if connection.vendor != "sqlite":
+                raise CommandError("stress_sqlite needs DB_ENGINE=sqlite3")
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                self.stdout.write(json.dumps(self.stress(options)))
+            return
+
+        unknown = set(options["profiles"]) - set(PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(sorted(unknown))}")
+        with TemporaryDirectory() as directory:
+            results = [
+                self.run(profile, os.path.join(directory, f"{profile}.sqlite3"), options)
+                for profile in options["profiles"]
+            ]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'profile':<10}{'writes/s':>10}{'reads/s':>10}{'locked':>8}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['profile']:<10}{result['writes_per_sec']:>10.1f}"
+                f"{result['reads_per_sec']:>10.1f}{result['lock_errors']:>8}"
+                f"{result['other_errors']:>8}"
+            )
+
+    def run(self, profile: str, name: str, options) -> dict:
+        env = {**os.environ, "DB_ENGINE": "sqlite3", "DB_NAME": name, "SQLITE_PROFILE": profile}
+        manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+        commands = [
+            ["migrate", "--noinput", "-v", "0"],
+            ["stress_sqlite", "--worker",
+             "--writers", str(options["writers"]),
+             "--readers", str(options["readers"]),
+             "--seconds", str(options["seconds"])],
+        ]
+        for command in commands:
+            process = subprocess.run(manage + command, env=env, capture_output=True, text=True)
+            if process.returncode:
+                raise CommandError(f"{profile}: {command[0]} failed\n{process.stderr}")
+        return {"profile": profile, **json.loads(process.stdout)}
+
+    def stress(self, options) -> dict:
+        user = get_user_model().objects.create_user(username=f"stress-{time.time_ns()}")
+        project = Project.objects.create(owner=user, name="Stress")
+        tasks = Task.objects.bulk_create(
+            Task(project=project, content=f"Task {i}") for i in range(100)
+        )
+        Project.objects.filter(id=project.id).recount()
+        login = Client()
+        login.force_login(user)
+        session = login.cookies[settings.SESSION_COOKIE_NAME].value
+
+        counts = Counter()
+        lock = threading.Lock()
+        htmx = {"HX-Request": "true"}
+        projects_list = reverse("projects:projects_list")
+        deadline = time.perf_counter() + options["seconds"]
+
+        def worker(kind: str, number: int):
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        if kind == "writes":
+                            task = tasks[number % len(tasks)]
+                            number += options["writers"]
+                            url = reverse("projects:task_completed", kwargs={"pk": task.id})
+                            response = client.post(url, headers=htmx)
+                        else:
+                            response = client.get(projects_list)
+                        result = kind if response.status_code == 200 else "other_errors"
+                    except OperationalError as error:
+                        result = "lock_errors" if "locked" in str(error) else "other_errors"
+                    with lock:
+                        counts[result] += 1
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=("writes", i)) for i in range(options["writers"])
+        ] + [
+            threading.Thread(target=worker, args=("reads", i)) for i in range(options["readers"])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        return {
+            "seconds": elapsed,
+            "writes": counts["writes"],
+            "writes_per_sec": counts["writes"] / elapsed,
+            "reads": counts["reads"],
+            "reads_per_sec": counts["reads"] / elapsed,
+            "lock_errors": counts["lock_errors"],
+            "other_errors": counts["other_errors"],
+        }
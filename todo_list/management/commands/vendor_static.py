@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import re
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from todo_list.staticfiles import CDN_URL, VENDOR_FILES
+
+
+# Maps aren't vendored, and manifest storage fails on links to missing files
+SOURCE_MAP = re.compile(rb"\n?(/\*# sourceMappingURL=\S+ \*/|//# sourceMappingURL=\S+)\s*$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the pinned third party assets of "
+        "todo_list.staticfiles.VENDOR_FILES into static/vendor/ and check "
+        "them against their subresource integrity. Files without a pinned "
+        "integrity are not written, their hash is printed for review. Commit "
+        "the files, templates serve them instead of the CDN once they exist."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Download files that exist already")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds per download")
+
+    def handle(self, *args, **options):
+        root = Path(settings.STATICFILES_DIRS[0])
+        unpinned = []
+        for path, (cdn_path, integrity) in VENDOR_FILES.items():
+            target = root / path
+            if target.exists() and not options["force"]:
+                self.stdout.write(f"{path}: exists")
+                continue
+            try:
+                with urlopen(CDN_URL + cdn_path, timeout=options["timeout"]) as response:
+                    content = response.read()
+            except (URLError, TimeoutError) as error:
+                raise CommandError(f"{cdn_path}: {error}")
+            if integrity is None:
+                # Only a reviewed hash may be trusted, the file is not written
+                actual = base64.b64encode(hashlib.sha384(content).digest()).decode()
+                self.stdout.write(f"{path}: not pinned, downloaded file is sha384-{actual}")
+                unpinned.append(path)
+                continue
+            algorithm, expected = integrity.split("-", 1)
+            actual = base64.b64encode(hashlib.new(algorithm, content).digest()).decode()
+            if actual != expected:
+                raise CommandError(f"{cdn_path}: integrity is {algorithm}-{actual}, expected {integrity}")
+            if path.endswith((".css", ".js")):
+                content = SOURCE_MAP.sub(b"\n", content)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            self.stdout.write(f"{path}: {len(content)} bytes from {CDN_URL}{cdn_path}")
+        if unpinned:
+            raise CommandError(
+                f"No integrity in VENDOR_FILES for {', '.join(unpinned)}, "
+                f"check the hashes above against the published ones and add them"
+            )
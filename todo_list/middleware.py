@@ -0,0 +1,219 @@
+import cProfile
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.db import connections
+from django.http import FileResponse
+from django.template.base import Template
+from django.utils.cache import patch_vary_headers
+
+from .staticfiles import ENCODINGS
+
+
+logger = logging.getLogger("todo_list.profiling")
+
+# Timings of the request being handled in this context
+current = ContextVar("profiling_timings", default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+def timed_render(render):
+    """Add time of top level template renders to the current request.
+
+    Included templates render inside their parent, so only the
+    outermost render is counted.
+    """
+
+    def wrapper(self, context):
+        timings = current.get()
+        if timings is None:
+            return render(self, context)
+        timings.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template += time.perf_counter() - start
+
+    wrapper.timed = True
+    return wrapper
+
+
+class ProfilingMiddleware:
+    """Time database, templates, view and middleware of every request.
+
+    Timings go to a `Server-Timing` header and a JSON log line on the
+    `todo_list.profiling` logger. `PROFILING_SAMPLE_RATE` of requests are
+    also run under cProfile and dumped to `PROFILING_DIR`.
+
+    Put it first in MIDDLEWARE, so `total` covers the other middleware.
+    `view` starts when the view is called and `tpl` includes queries
+    run while rendering. Queries of async views made on other threads
+    are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.directory = Path(settings.PROFILING_DIR)
+        if not getattr(Template.render, "timed", False):
+            Template.render = timed_render(Template.render)
+
+    def __call__(self, request):
+        timings = Timings()
+        token = current.set(timings)
+        profile = cProfile.Profile() if random.random() < self.sample_rate else None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                if profile is not None:
+                    try:
+                        profile.enable()
+                    except ValueError:
+                        # Only one profiler can run at a time, skip this sample
+                        profile = None
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profile is not None:
+                        profile.disable()
+        finally:
+            current.reset(token)
+        end = time.perf_counter()
+        total = end - start
+        view = end - getattr(request, "profiling_view_start", end)
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+            f"tpl;dur={timings.template * 1000:.1f}",
+            f"view;dur={view * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+        path = self.dump(request, profile) if profile is not None else None
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": timings.queries,
+            "db_ms": round(timings.db * 1000, 3),
+            "template_ms": round(timings.template * 1000, 3),
+            "view_ms": round(view * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+            "profile": path,
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.profiling_view_start = time.perf_counter()
+
+    def dump(self, request, profile: cProfile.Profile) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^\w-]+", "_", request.path).strip("_") or "root"
+        path = self.directory / f"{time.time_ns()}-{request.method}-{slug}.prof"
+        profile.dump_stats(path)
+        return str(path)
+
+
+class StaticFilesMiddleware:
+    """Serve files collected to STATIC_ROOT, see staticfiles.py.
+
+    Files are listed once at startup, so `collectstatic` needs a restart.
+    A file is sent in the first encoding of ENCODINGS the client accepts
+    that has a variant. Names of the manifest carry a content hash and
+    are cached for a year as immutable, others for STATIC_MAX_AGE.
+
+    Put it right after SecurityMiddleware, so static requests skip
+    sessions and authentication.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else f"/{settings.STATIC_URL}"
+        self.max_age = settings.STATIC_MAX_AGE
+        self.files = self.find_files(Path(settings.STATIC_ROOT))
+        self.hashed_names = set()
+        if isinstance(staticfiles_storage, ManifestStaticFilesStorage):
+            self.hashed_names = set(staticfiles_storage.hashed_files.values())
+
+    @staticmethod
+    def find_files(root: Path) -> dict[str, dict[str, Path]]:
+        """Paths of every file under root by name, and then by encoding ("" is none)"""
+
+        files = {}
+        for directory, _, names in os.walk(root):
+            for file_name in names:
+                path = Path(directory, file_name)
+                name = path.relative_to(root).as_posix()
+                encoding = next((encoding for encoding, suffix in ENCODINGS.items() if name.endswith(suffix)), "")
+                if encoding:
+                    name = name.removesuffix(ENCODINGS[encoding])
+                files.setdefault(name, {})[encoding] = path
+        # Variants of files that are missing themselves aren't served
+        return {name: variants for name, variants in files.items() if "" in variants}
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        name = request.path.removeprefix(self.prefix)
+        variants = self.files.get(name)
+        if variants is None:
+            return self.get_response(request)
+
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        encoding = next((encoding for encoding in ENCODINGS if encoding in accepted and encoding in variants), "")
+        content_type, _ = mimetypes.guess_type(name)
+        response = FileResponse(
+            open(variants[encoding], "rb"),
+            content_type=content_type or "application/octet-stream",
+            )
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if len(variants) > 1:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        if name in self.hashed_names:
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings of an Accept-Encoding header, without those refused by q=0"""
+
+    accepted = set()
+    for item in header.split(","):
+        coding, *parameters = [part.strip() for part in item.split(";")]
+        refused = any(re.fullmatch(r"q=0(\.0*)?", parameter) for parameter in parameters)
+        if coding and not refused:
+            accepted.add(coding.lower())
+    return accepted
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:02
+
+import django.db.models.deletion
+import todo_list.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='projects', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.CharField(max_length=100)),
+                ('priority', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('deadline', models.DateField(default=todo_list.models.tomorrow)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='todo_list.project')),
+            ],
+            options={
+                'ordering': ['-priority'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:14
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_tasks(apps, schema_editor):
+    Project = apps.get_model('todo_list', 'Project')
+    Task = apps.get_model('todo_list', 'Task')
+    tasks = Task.objects.filter(project=models.OuterRef('pk')).order_by().values('project')
+
+    def count(tasks):
+        return Coalesce(
+            models.Subquery(tasks.annotate(count=models.Count('id')).values('count')),
+            0,
+        )
+
+    Project.objects.update(
+        task_count=count(tasks),
+        completed_count=count(tasks.filter(completed=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_list', '0002_task_project_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,263 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# Task triggers skip projects being deleted, recreate them with the new column.
+# Trigger SQL as it was before and after this migration, timestamps.py
+# holds the current one.
+
+TIMESTAMP_TRIGGERS_BEFORE = {
+    'sqlite': [
+        """
+        CREATE TRIGGER todo_list_task_touch_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds')) WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_touch_update
+        AFTER UPDATE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE id IN (old.project_id, new.project_id);
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_touch_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE id = old.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_insert
+        AFTER INSERT ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id = new.owner_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_update
+        AFTER UPDATE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id IN (old.owner_id, new.owner_id);
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_delete
+        AFTER DELETE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id = old.owner_id;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_list_task_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_project SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE id = OLD.project_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.project_id <> OLD.project_id) THEN
+                UPDATE todo_list_project SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond') WHERE id = NEW.project_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_touch();
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_list_project_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE owner_id = OLD.owner_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.owner_id <> OLD.owner_id) THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE owner_id = NEW.owner_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_project
+        FOR EACH ROW EXECUTE FUNCTION todo_list_project_touch();
+        """,
+    ],
+}
+
+TIMESTAMP_TRIGGERS = {
+    'sqlite': [
+        """
+        CREATE TRIGGER todo_list_task_touch_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds')) WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_touch_update
+        AFTER UPDATE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE id IN (old.project_id, new.project_id) AND deleted_at IS NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_touch_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE id = old.project_id AND deleted_at IS NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_insert
+        AFTER INSERT ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id = new.owner_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_update
+        AFTER UPDATE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id IN (old.owner_id, new.owner_id);
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_delete
+        AFTER DELETE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id = old.owner_id;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_list_task_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_project SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE id = OLD.project_id AND deleted_at IS NULL;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.project_id <> OLD.project_id) THEN
+                UPDATE todo_list_project SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond') WHERE id = NEW.project_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_touch();
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_list_project_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE owner_id = OLD.owner_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.owner_id <> OLD.owner_id) THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE owner_id = NEW.owner_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_project
+        FOR EACH ROW EXECUTE FUNCTION todo_list_project_touch();
+        """,
+    ],
+}
+
+DROP_TIMESTAMP_TRIGGERS = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS todo_list_task_touch_insert',
+        'DROP TRIGGER IF EXISTS todo_list_task_touch_update',
+        'DROP TRIGGER IF EXISTS todo_list_task_touch_delete',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch_insert',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch_update',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch_delete',
+    ],
+    'postgresql': [
+        'DROP TRIGGER IF EXISTS todo_list_task_touch ON todo_list_task',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch ON todo_list_project',
+        'DROP FUNCTION IF EXISTS todo_list_task_touch()',
+        'DROP FUNCTION IF EXISTS todo_list_project_touch()',
+    ],
+}
+
+
+def execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    execute(schema_editor, DROP_TIMESTAMP_TRIGGERS)
+
+
+def create_triggers_before(apps, schema_editor):
+    execute(schema_editor, TIMESTAMP_TRIGGERS_BEFORE)
+
+
+def create_triggers(apps, schema_editor):
+    execute(schema_editor, TIMESTAMP_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_list', '0006_task_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers_before),
+        migrations.AddField(
+            model_name='project',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('arguments', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('progress', models.IntegerField(default=0)),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='job_status_idx')],
+            },
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,264 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Triggers would reindex and touch every task of the backfill,
+# so they are dropped around it
+
+# Trigger SQL as it was at this migration. search.py and timestamps.py
+# hold the current one, which may use columns added later.
+
+SEARCH_TRIGGERS = {
+    'sqlite': [
+        """
+        CREATE TRIGGER todo_list_task_search_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            INSERT INTO todo_list_task_search (rowid, content, project_name)
+            SELECT new.id, new.content, name FROM todo_list_project WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_search_update
+        AFTER UPDATE OF content, project_id ON todo_list_task
+        WHEN old.content IS NOT new.content OR old.project_id IS NOT new.project_id
+        BEGIN
+            DELETE FROM todo_list_task_search WHERE rowid = old.id;
+            INSERT INTO todo_list_task_search (rowid, content, project_name)
+            SELECT new.id, new.content, name FROM todo_list_project WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_search_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            DELETE FROM todo_list_task_search WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name ON todo_list_project
+        WHEN old.name IS NOT new.name
+        BEGIN
+            UPDATE todo_list_task_search SET project_name = new.name
+            WHERE rowid IN (SELECT id FROM todo_list_task WHERE project_id = new.id);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_list_task_search_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM todo_list_task_search WHERE task_id = OLD.id;
+                RETURN NULL;
+            END IF;
+            INSERT INTO todo_list_task_search (task_id, document)
+            SELECT NEW.id, setweight(to_tsvector('simple', NEW.content), 'A') || setweight(to_tsvector('simple', p.name), 'B')
+            FROM todo_list_project p WHERE p.id = NEW.project_id
+            ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_search_update
+        AFTER INSERT OR DELETE OR UPDATE OF content, project_id ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_search_update();
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_list_project_search_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE todo_list_task_search s
+            SET document = setweight(to_tsvector('simple', t.content), 'A') || setweight(to_tsvector('simple', NEW.name), 'B')
+            FROM todo_list_task t
+            WHERE t.id = s.task_id AND t.project_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name ON todo_list_project
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION todo_list_project_search_update();
+        """,
+    ],
+}
+
+DROP_SEARCH_TRIGGERS = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS todo_list_task_search_insert',
+        'DROP TRIGGER IF EXISTS todo_list_task_search_update',
+        'DROP TRIGGER IF EXISTS todo_list_task_search_delete',
+        'DROP TRIGGER IF EXISTS todo_list_project_search_update',
+    ],
+    'postgresql': [
+        'DROP TRIGGER IF EXISTS todo_list_task_search_update ON todo_list_task',
+        'DROP TRIGGER IF EXISTS todo_list_project_search_update ON todo_list_project',
+        'DROP FUNCTION IF EXISTS todo_list_task_search_update()',
+        'DROP FUNCTION IF EXISTS todo_list_project_search_update()',
+    ],
+}
+
+TIMESTAMP_TRIGGERS = {
+    'sqlite': [
+        """
+        CREATE TRIGGER todo_list_task_touch_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds')) WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_touch_update
+        AFTER UPDATE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE id IN (old.project_id, new.project_id) AND deleted_at IS NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_touch_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE id = old.project_id AND deleted_at IS NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_insert
+        AFTER INSERT ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id = new.owner_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_update
+        AFTER UPDATE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id IN (old.owner_id, new.owner_id);
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_touch_delete
+        AFTER DELETE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = max(strftime('%Y-%m-%d %H:%M:%f', 'now'), strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))
+            WHERE owner_id = old.owner_id;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_list_task_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_project SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE id = OLD.project_id AND deleted_at IS NULL;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.project_id <> OLD.project_id) THEN
+                UPDATE todo_list_project SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond') WHERE id = NEW.project_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_touch();
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_list_project_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE owner_id = OLD.owner_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.owner_id <> OLD.owner_id) THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')
+                WHERE owner_id = NEW.owner_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_project
+        FOR EACH ROW EXECUTE FUNCTION todo_list_project_touch();
+        """,
+    ],
+}
+
+DROP_TIMESTAMP_TRIGGERS = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS todo_list_task_touch_insert',
+        'DROP TRIGGER IF EXISTS todo_list_task_touch_update',
+        'DROP TRIGGER IF EXISTS todo_list_task_touch_delete',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch_insert',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch_update',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch_delete',
+    ],
+    'postgresql': [
+        'DROP TRIGGER IF EXISTS todo_list_task_touch ON todo_list_task',
+        'DROP TRIGGER IF EXISTS todo_list_project_touch ON todo_list_project',
+        'DROP FUNCTION IF EXISTS todo_list_task_touch()',
+        'DROP FUNCTION IF EXISTS todo_list_project_touch()',
+    ],
+}
+
+
+def execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+RANK_GAP = 2 ** 16
+
+
+def drop_triggers(apps, schema_editor):
+    execute(schema_editor, DROP_SEARCH_TRIGGERS)
+    execute(schema_editor, DROP_TIMESTAMP_TRIGGERS)
+
+
+def set_task_ranks(apps, schema_editor):
+    Task = apps.get_model('todo_list', 'Task')
+    Task.objects.update(rank=models.F('id') * RANK_GAP)
+
+
+def create_triggers(apps, schema_editor):
+    execute(schema_editor, SEARCH_TRIGGERS)
+    execute(schema_editor, TIMESTAMP_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_list', '0007_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['-priority', 'rank', 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_project_priority_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(set_task_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', '-priority', 'rank', 'id'], name='task_project_priority_idx'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,259 @@
+from django.db import migrations
+
+
+# Search table with the owner of each task, so a search only ranks
+# matches of its owner. FTS5 can't add columns, the table is rebuilt.
+# Search table and triggers as they were before and after this
+# migration, search.py holds the current ones.
+
+SEARCH_TABLE_BEFORE = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS todo_list_task_search USING fts5(content, project_name, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        'CREATE TABLE IF NOT EXISTS todo_list_task_search (task_id bigint PRIMARY KEY, document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS todo_list_task_search_document_idx ON todo_list_task_search USING GIN (document)',
+    ],
+}
+
+SEARCH_TRIGGERS_BEFORE = {
+    'sqlite': [
+        """
+        CREATE TRIGGER todo_list_task_search_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            INSERT INTO todo_list_task_search (rowid, content, project_name)
+            SELECT new.id, new.content, name FROM todo_list_project WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_search_update
+        AFTER UPDATE OF content, project_id ON todo_list_task
+        WHEN old.content IS NOT new.content OR old.project_id IS NOT new.project_id
+        BEGIN
+            DELETE FROM todo_list_task_search WHERE rowid = old.id;
+            INSERT INTO todo_list_task_search (rowid, content, project_name)
+            SELECT new.id, new.content, name FROM todo_list_project WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_search_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            DELETE FROM todo_list_task_search WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name ON todo_list_project
+        WHEN old.name IS NOT new.name
+        BEGIN
+            UPDATE todo_list_task_search SET project_name = new.name
+            WHERE rowid IN (SELECT id FROM todo_list_task WHERE project_id = new.id);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_list_task_search_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM todo_list_task_search WHERE task_id = OLD.id;
+                RETURN NULL;
+            END IF;
+            INSERT INTO todo_list_task_search (task_id, document)
+            SELECT NEW.id, setweight(to_tsvector('simple', NEW.content), 'A') || setweight(to_tsvector('simple', p.name), 'B')
+            FROM todo_list_project p WHERE p.id = NEW.project_id
+            ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_search_update
+        AFTER INSERT OR DELETE OR UPDATE OF content, project_id ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_search_update();
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_list_project_search_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE todo_list_task_search s
+            SET document = setweight(to_tsvector('simple', t.content), 'A') || setweight(to_tsvector('simple', NEW.name), 'B')
+            FROM todo_list_task t
+            WHERE t.id = s.task_id AND t.project_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name ON todo_list_project
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION todo_list_project_search_update();
+        """,
+    ],
+}
+
+INDEX_TASKS_BEFORE = {
+    'sqlite': [
+        'DELETE FROM todo_list_task_search',
+        'INSERT INTO todo_list_task_search (rowid, content, project_name) SELECT t.id, t.content, p.name FROM todo_list_task t JOIN todo_list_project p ON p.id = t.project_id',
+    ],
+    'postgresql': [
+        'TRUNCATE todo_list_task_search',
+        """
+        INSERT INTO todo_list_task_search (task_id, document)
+        SELECT t.id, setweight(to_tsvector('simple', t.content), 'A') || setweight(to_tsvector('simple', p.name), 'B')
+        FROM todo_list_task t JOIN todo_list_project p ON p.id = t.project_id
+        """,
+    ],
+}
+
+SEARCH_TABLE = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS todo_list_task_search USING fts5(content, project_name, owner, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        'CREATE TABLE IF NOT EXISTS todo_list_task_search (task_id bigint PRIMARY KEY, owner_id bigint NOT NULL, document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS todo_list_task_search_owner_idx ON todo_list_task_search (owner_id)',
+        'CREATE INDEX IF NOT EXISTS todo_list_task_search_document_idx ON todo_list_task_search USING GIN (document)',
+    ],
+}
+
+SEARCH_TRIGGERS = {
+    'sqlite': [
+        """
+        CREATE TRIGGER todo_list_task_search_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            INSERT INTO todo_list_task_search (rowid, content, project_name, owner)
+            SELECT new.id, new.content, name, owner_id FROM todo_list_project WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_search_update
+        AFTER UPDATE OF content, project_id ON todo_list_task
+        WHEN old.content IS NOT new.content OR old.project_id IS NOT new.project_id
+        BEGIN
+            DELETE FROM todo_list_task_search WHERE rowid = old.id;
+            INSERT INTO todo_list_task_search (rowid, content, project_name, owner)
+            SELECT new.id, new.content, name, owner_id FROM todo_list_project WHERE id = new.project_id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_task_search_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            DELETE FROM todo_list_task_search WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name, owner_id ON todo_list_project
+        WHEN old.name IS NOT new.name OR old.owner_id IS NOT new.owner_id
+        BEGIN
+            UPDATE todo_list_task_search SET project_name = new.name, owner = new.owner_id
+            WHERE rowid IN (SELECT id FROM todo_list_task WHERE project_id = new.id);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_list_task_search_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM todo_list_task_search WHERE task_id = OLD.id;
+                RETURN NULL;
+            END IF;
+            INSERT INTO todo_list_task_search (task_id, owner_id, document)
+            SELECT NEW.id, p.owner_id, setweight(to_tsvector('simple', NEW.content), 'A') || setweight(to_tsvector('simple', p.name), 'B')
+            FROM todo_list_project p WHERE p.id = NEW.project_id
+            ON CONFLICT (task_id) DO UPDATE SET owner_id = EXCLUDED.owner_id, document = EXCLUDED.document;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_search_update
+        AFTER INSERT OR DELETE OR UPDATE OF content, project_id ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_search_update();
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_list_project_search_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE todo_list_task_search s
+            SET owner_id = NEW.owner_id,
+                document = setweight(to_tsvector('simple', t.content), 'A') || setweight(to_tsvector('simple', NEW.name), 'B')
+            FROM todo_list_task t
+            WHERE t.id = s.task_id AND t.project_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name, owner_id ON todo_list_project
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.owner_id IS DISTINCT FROM NEW.owner_id)
+        EXECUTE FUNCTION todo_list_project_search_update();
+        """,
+    ],
+}
+
+INDEX_TASKS = {
+    'sqlite': [
+        'DELETE FROM todo_list_task_search',
+        'INSERT INTO todo_list_task_search (rowid, content, project_name, owner) SELECT t.id, t.content, p.name, p.owner_id FROM todo_list_task t JOIN todo_list_project p ON p.id = t.project_id',
+    ],
+    'postgresql': [
+        'TRUNCATE todo_list_task_search',
+        """
+        INSERT INTO todo_list_task_search (task_id, owner_id, document)
+        SELECT t.id, p.owner_id, setweight(to_tsvector('simple', t.content), 'A') || setweight(to_tsvector('simple', p.name), 'B')
+        FROM todo_list_task t JOIN todo_list_project p ON p.id = t.project_id
+        """,
+    ],
+}
+
+DROP_SEARCH = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS todo_list_task_search_insert',
+        'DROP TRIGGER IF EXISTS todo_list_task_search_update',
+        'DROP TRIGGER IF EXISTS todo_list_task_search_delete',
+        'DROP TRIGGER IF EXISTS todo_list_project_search_update',
+        'DROP TABLE IF EXISTS todo_list_task_search',
+    ],
+    'postgresql': [
+        'DROP TRIGGER IF EXISTS todo_list_task_search_update ON todo_list_task',
+        'DROP TRIGGER IF EXISTS todo_list_project_search_update ON todo_list_project',
+        'DROP FUNCTION IF EXISTS todo_list_task_search_update()',
+        'DROP FUNCTION IF EXISTS todo_list_project_search_update()',
+        'DROP TABLE IF EXISTS todo_list_task_search',
+    ],
+}
+
+
+def execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+def install(apps, schema_editor):
+    execute(schema_editor, DROP_SEARCH)
+    execute(schema_editor, SEARCH_TABLE)
+    execute(schema_editor, SEARCH_TRIGGERS)
+    execute(schema_editor, INDEX_TASKS)
+
+
+def install_before(apps, schema_editor):
+    execute(schema_editor, DROP_SEARCH)
+    execute(schema_editor, SEARCH_TABLE_BEFORE)
+    execute(schema_editor, SEARCH_TRIGGERS_BEFORE)
+    execute(schema_editor, INDEX_TASKS_BEFORE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_list', '0008_task_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, install_before),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_list', '0009_task_search_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='run_after',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
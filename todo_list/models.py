@@ -1,7 +1,45 @@
 from datetime import datetime, timedelta
 
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth.models import User
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def tomorrow():
+    return (datetime.today() + timedelta(days=1)).date()
+
+
+class ProjectQuerySet(models.QuerySet):
+
+    def add_counts(self, tasks: int = 0, completed: int = 0) -> int:
+        """Change task counters of projects in one UPDATE"""
+
+        return self.update(
+            task_count=models.F("task_count") + tasks,
+            completed_count=models.F("completed_count") + completed,
+            )
+
+    def recount(self) -> int:
+        """Set task counters of projects from their tasks in one UPDATE"""
+
+        tasks = Task.objects.filter(project=models.OuterRef("pk")).order_by().values("project")
+
+        def count(tasks):
+            subquery = models.Subquery(tasks.annotate(count=models.Count("id")).values("count"))
+            return Coalesce(subquery, 0)
+
+        return self.update(
+            task_count=count(tasks),
+            completed_count=count(tasks.filter(completed=True)),
+            )
+
+
+class ProjectManager(models.Manager.from_queryset(ProjectQuerySet)):
+    """Projects except those being deleted in the background, see jobs.py"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
 
 
 class Project(models.Model):
@@ -11,28 +49,361 @@ class Project(models.Model):
         on_delete=models.CASCADE,
         )
     name = models.CharField(max_length=50)
+    # Denormalized counters, see signals.py and recount_tasks command
+    task_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    # Also set by database triggers on changes of tasks, see timestamps.py
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when deletion is queued, tasks are purged by a job
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ProjectManager()
+    all_objects = ProjectQuerySet.as_manager()
 
     def __str__(self):
         return f"Project: {self.name}"
 
+    class Meta:
+        indexes = [
+            # Projects of owner in id order (list and its keyset pages)
+            models.Index(fields=["owner", "id"], name="project_owner_id_idx"),
+        ]
+
+
+class TaskQuerySet(models.QuerySet):
+
+    def of_owner(self, owner) -> "TaskQuerySet":
+        """Tasks of owner (user or id), except those of projects being deleted"""
+
+        return self.filter(project__owner=owner, project__deleted_at=None)
+
+    def change_priority(self, pk: int, owner_id: int, change: int) -> tuple[int, int, int] | None:
+        """Change priority of owner's task by `change` in one UPDATE.
+
+        Update is skipped if new priority is out of MIN_PRIORITY..MAX_PRIORITY,
+        so concurrent changes can't lose updates or push priority out of range.
+        Return (new priority, project id, rank) or None if task was not updated.
+        """
+
+        connection = connections[self.db]
+        if not self._can_return_from_update(connection):
+            with transaction.atomic(using=self.db):
+                updated = self.of_owner(owner_id).filter(
+                    pk=pk,
+                    priority__gte=Task.MIN_PRIORITY - change,
+                    priority__lte=Task.MAX_PRIORITY - change,
+                    ).update(priority=models.F("priority") + change, updated_at=timezone.now())
+                if not updated:
+                    return None
+                return self.filter(pk=pk).values_list("priority", "project_id", "rank").get()
+
+        qn = connection.ops.quote_name
+        sql = (
+            f"UPDATE {qn(Task._meta.db_table)} "
+            f"SET {qn('priority')} = {qn('priority')} + %s, {qn('updated_at')} = %s "
+            f"WHERE {qn('id')} = %s AND {qn('priority')} + %s BETWEEN %s AND %s "
+            f"AND {qn('project_id')} IN ("
+            f"SELECT {qn('id')} FROM {qn(Project._meta.db_table)} "
+            f"WHERE {qn('owner_id')} = %s AND {qn('deleted_at')} IS NULL) "
+            f"RETURNING {qn('priority')}, {qn('project_id')}, {qn('rank')}"
+        )
+        params = [
+            change, connection.ops.adapt_datetimefield_value(timezone.now()),
+            pk, change, Task.MIN_PRIORITY, Task.MAX_PRIORITY, owner_id,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def toggle_completed(self, pk: int, project_id: int) -> bool | None:
+        """Flip completed of task and keep counter of its project right.
+
+        Counter change comes from the UPDATE that matched, so concurrent
+        toggles can't make it drift. Return new value or None if no task.
+        """
+
+        with transaction.atomic(using=self.db):
+            for completed in (True, False):
+                updated = self.filter(pk=pk, completed=not completed).update(
+                    completed=completed,
+                    updated_at=timezone.now(),
+                    )
+                if updated:
+                    Project.objects.filter(pk=project_id).add_counts(
+                        completed=1 if completed else -1,
+                        )
+                    return completed
+        return None
+
+    def move(self, pk: int, owner_id: int, after: int | None, before: int | None) -> tuple["Task", bool] | None:
+        """Place owner's task between task `after` (above it) and task `before` (below it).
+
+        The task keeps its priority if a neighbour has it, otherwise it
+        takes the priority of the task above, or below when there is none.
+        Its rank goes halfway between its neighbours in that priority, so
+        only its row is written. Return the task and whether the gap it
+        took is below REBALANCE_GAP, or None if a task is missing, isn't
+        owner's or is in another project.
+        """
+
+        ids = [id for id in (pk, after, before) if id is not None]
+        with transaction.atomic(using=self.db):
+            # Locked, so a move waits for a rebalance of the same tasks
+            tasks = {task.id: task for task in self.select_for_update(of=("self",)).of_owner(owner_id).filter(pk__in=ids)}
+            if len(tasks) != len(set(ids)):
+                return None
+            task, above, below = tasks[pk], tasks.get(after), tasks.get(before)
+            neighbours = [neighbour for neighbour in (above, below) if neighbour is not None]
+            if not neighbours or any(neighbour.project_id != task.project_id for neighbour in neighbours):
+                return None
+            if task.priority in {neighbour.priority for neighbour in neighbours}:
+                priority = task.priority
+            else:
+                priority = neighbours[0].priority
+
+            # The other bound is read from the database, the page may not show it
+            group = self.filter(project_id=task.project_id, priority=priority).exclude(pk=pk)
+            if above is not None and above.priority == priority:
+                lower = above.rank
+                upper = group.filter(
+                    models.Q(rank__gt=lower) | models.Q(rank=lower, id__gt=above.id),
+                    ).order_by("rank", "id").values_list("rank", flat=True).first()
+            else:
+                upper = below.rank
+                lower = group.filter(
+                    models.Q(rank__lt=upper) | models.Q(rank=upper, id__lt=below.id),
+                    ).order_by("-rank", "-id").values_list("rank", flat=True).first()
+
+            rank = Task.rank_between(lower, upper)
+            if rank is None:
+                # No rank left in between, the rebalance job didn't run yet
+                self.rebalance(task.project_id, priority)
+                return self.move(pk, owner_id, after, before)
+            self.filter(pk=pk).update(priority=priority, rank=rank, updated_at=timezone.now())
+            task.priority, task.rank = priority, rank
+        gap = min(abs(rank - bound) for bound in (lower, upper) if bound is not None)
+        return task, gap < Task.REBALANCE_GAP
+
+    def rebalance(self, project_id: int, priority: int) -> int:
+        """Spread ranks of tasks of project with priority RANK_GAP apart in their order.
+
+        Return number of tasks.
+        """
+
+        with transaction.atomic(using=self.db):
+            tasks = list(
+                self.select_for_update()
+                .filter(project_id=project_id, priority=priority)
+                .order_by("rank", "id")
+                .only("id", "rank")
+                )
+            for number, task in enumerate(tasks, 1):
+                task.rank = number * Task.RANK_GAP
+            self.bulk_update(tasks, ["rank"], batch_size=1000)
+        return len(tasks)
+
+    def purge(self, project_id: int, limit: int) -> int:
+        """Delete up to limit tasks of project in one statement, return how many.
+
+        Tasks are not loaded and no signals are sent, so it is only
+        meant for projects being deleted.
+        """
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(Task._meta.db_table)
+        sql = (
+            f"DELETE FROM {table} WHERE {qn('id')} IN ("
+            f"SELECT {qn('id')} FROM {table} WHERE {qn('project_id')} = %s LIMIT %s)"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [project_id, limit])
+            return cursor.rowcount
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            if obj.owner_id is None:
+                obj.owner_id = obj.project.owner_id
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            unranked = [obj for obj in objs if obj.rank is None and obj.pk is not None]
+            # Chunks keep the IN list below the parameter limit of SQLite
+            for start in range(0, len(unranked), 1000):
+                ids = [obj.pk for obj in unranked[start:start + 1000]]
+                self.filter(pk__in=ids).update(rank=models.F("id") * Task.RANK_GAP)
+            for obj in unranked:
+                obj.rank = obj.pk * Task.RANK_GAP
+        return objs
+
+    @staticmethod
+    def _can_return_from_update(connection) -> bool:
+        if connection.vendor == "postgresql":
+            return True
+        if connection.vendor == "sqlite":
+            return connection.Database.sqlite_version_info >= (3, 35)
+        return False
+
 
 class Task(models.Model):
+    MIN_PRIORITY = 0
+    MAX_PRIORITY = 10
+    # Ranks of new tasks are id * RANK_GAP, so they start in creation
+    # order with room for 16 halvings between any two. A move that
+    # leaves less than REBALANCE_GAP queues a rebalance, see jobs.py.
+    RANK_GAP = 2 ** 16
+    REBALANCE_GAP = 2 ** 6
+
     project = models.ForeignKey(
         Project,
         related_name="tasks",
         on_delete=models.CASCADE,
         )
+    # Owner of the project, so tasks of all projects of an owner can be
+    # filtered and sorted by one index. Set from project on save and
+    # bulk_create, tasks only move between projects of the same owner.
+    owner = models.ForeignKey(
+        User,
+        related_name="+",
+        on_delete=models.CASCADE,
+        db_index=False,
+        editable=False,
+        )
     content = models.CharField(max_length=100)
     priority = models.IntegerField(default=0)
+    # Order among tasks of the same priority, set right after insert
+    rank = models.BigIntegerField(null=True, editable=False)
     completed  = models.BooleanField(default=False)
-    deadline = models.DateField(
-        default=(datetime.today() + timedelta(days=1)).date(),
-        )
+    deadline = models.DateField(default=tomorrow)
+    # auto_now covers save() only, queryset updates set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
 
     def __str__(self):
         return f"Project: {self.content[:10]}..."
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Saved values, so signals can keep counters of projects right
+        instance._loaded_project_id = instance.__dict__.get("project_id")
+        instance._loaded_completed = instance.__dict__.get("completed")
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.owner_id is None or self.project_id != getattr(self, "_loaded_project_id", None):
+            self.owner_id = self.project.owner_id
+        if self.rank is not None:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            self.rank = self.pk * self.RANK_GAP
+            Task.objects.filter(pk=self.pk).update(rank=self.rank)
+
+    @classmethod
+    def rank_between(cls, lower: int | None, upper: int | None) -> int | None:
+        """Rank between two ranks, None is the end of the list. None if there is none."""
+
+        if lower is None and upper is None:
+            return cls.RANK_GAP
+        if lower is None:
+            return upper - cls.RANK_GAP
+        if upper is None:
+            return lower + cls.RANK_GAP
+        if upper - lower < 2:
+            return None
+        return (lower + upper) // 2
+
     class Meta:
-        ordering = ["-priority"]
+        ordering = ["-priority", "rank", "id"]
+        indexes = [
+            # Tasks of project in list order (-priority, rank, id)
+            models.Index(
+                fields=["project", "-priority", "rank", "id"],
+                name="task_project_priority_idx",
+                ),
+            # Tasks of project by status and deadline
+            models.Index(
+                fields=["project", "completed", "deadline"],
+                name="task_project_status_idx",
+                ),
+            # Tasks of owner filtered by due window, status and priority,
+            # see filters.py. Sort columns follow the equality columns,
+            # priority or deadline trail so their filter reads the index.
+            models.Index(
+                fields=["owner", "completed", "deadline", "id", "priority"],
+                name="task_owner_status_due_idx",
+                ),
+            models.Index(
+                fields=["owner", "deadline", "id", "priority"],
+                name="task_owner_due_idx",
+                ),
+            models.Index(
+                fields=["owner", "completed", "-priority", "deadline", "id"],
+                name="task_owner_status_priority_idx",
+                ),
+            models.Index(
+                fields=["owner", "-priority", "deadline", "id"],
+                name="task_owner_priority_idx",
+                ),
+        ]
+
+
+
 
+class OwnerTimestamp(models.Model):
+    """When projects of owner or their tasks last changed.
+
+    Kept by database triggers, see timestamps.py. Rows are created with
+    users, or by the first conditional request of the owner when users
+    were bulk created, earlier changes are older than the row anyway.
+    """
+    owner = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="todo_timestamp",
+        on_delete=models.CASCADE,
+        )
+    updated_at = models.DateTimeField(default=timezone.now)
 
+
+class Job(models.Model):
+    """Work run outside requests by the `run_jobs` worker, see jobs.py"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    # Units of work done and expected, e.g. tasks deleted
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Not claimed before, later than created_at when a failed attempt is retried
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Set on progress, a running job without it for long is claimed again
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.id}: {self.name} {self.status}"
+
+    class Meta:
+        indexes = [
+            # Next job to claim and jobs by status
+            models.Index(fields=["status", "id"], name="job_status_idx"),
+        ]
@@ -0,0 +1,94 @@
+from django.db.models import Prefetch, Q, QuerySet, prefetch_related_objects
+
+from .models import Project, Task
+
+
+PROJECTS_PAGE_SIZE = 20
+TASKS_PAGE_SIZE = 50
+SEARCH_PAGE_SIZE = 20
+
+TASK_ORDERING = ("-priority", "rank", "id")
+
+
+def projects_after(queryset: QuerySet, after: int | None) -> QuerySet:
+    """Projects ordered by id, starting right after the cursor"""
+
+    queryset = queryset.order_by("id")
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    return queryset
+
+
+def tasks_after(queryset: QuerySet, priority: int | None, rank: int | None, after: int | None) -> QuerySet:
+    """Tasks ordered by (-priority, rank, id), starting right after the cursor"""
+
+    queryset = queryset.order_by(*TASK_ORDERING)
+    if priority is not None and rank is not None and after is not None:
+        queryset = queryset.filter(
+            Q(priority__lt=priority)
+            | Q(priority=priority, rank__gt=rank)
+            | Q(priority=priority, rank=rank, id__gt=after)
+        )
+    return queryset
+
+
+def task_with_next(project_id: int, priority: int, rank: int, id: int) -> QuerySet:
+    """Task and the task right after it in list order, in one index range scan.
+
+    The next task is where the row of task goes in a list shown by pages,
+    see partials/placed_task.html.
+    """
+
+    return Task.objects.filter(
+        Q(priority__lt=priority)
+        | Q(priority=priority, rank__gt=rank)
+        | Q(priority=priority, rank=rank, id__gte=id),
+        project_id=project_id,
+    ).order_by(*TASK_ORDERING)[:2]
+
+
+def split_task_with_next(rows: list[Task], id: int) -> tuple[Task | None, Task | None]:
+    """Task and next task from rows of `task_with_next`, task is None if it's gone"""
+
+    if not rows or rows[0].id != id:
+        return None, None
+    return rows[0], rows[1] if len(rows) > 1 else None
+
+
+def split_page(rows: list, size: int) -> tuple[list, object | None]:
+    """Split rows fetched with one extra row into page and last row of the page.
+
+    Last row is returned only if there is a next page, so it can be used as cursor.
+    """
+
+    if len(rows) > size:
+        return rows[:size], rows[size - 1]
+    return rows, None
+
+
+def tasks_page_prefetch() -> Prefetch:
+    """Prefetch first page of tasks (plus one to detect next page) for every project"""
+
+    return Prefetch(
+        "tasks",
+        queryset=Task.objects.order_by(*TASK_ORDERING)[:TASKS_PAGE_SIZE + 1],
+        to_attr="prefetched_tasks",
+    )
+
+
+def set_task_pages(projects: list[Project]) -> list[Project]:
+    """Set `task_page` and `next_task` for projects with prefetched tasks"""
+
+    for project in projects:
+        project.task_page, project.next_task = split_page(
+            project.prefetched_tasks, TASKS_PAGE_SIZE,
+        )
+    return projects
+
+
+def prefetch_task_page(project: Project) -> Project:
+    """Load first page of tasks of already fetched project in one query"""
+
+    prefetch_related_objects([project], tasks_page_prefetch())
+    set_task_pages([project])
+    return project
@@ -0,0 +1,308 @@
+"""Full-text search over task content and project names.
+
+Every task has one row in a search table that the database keeps in
+sync with triggers, so queryset updates, bulk operations and cascading
+deletes are covered without signals:
+
+* SQLite: FTS5 virtual table, rowid is the task id, ranked by bm25.
+  The owner id is a token of its own column, matched together with
+  the words, so only the owner's matches are ranked.
+* PostgreSQL: table of weighted `tsvector` documents with a GIN index
+  and the owner id with a B-tree index, ranked by `ts_rank`.
+
+Other databases fall back to `icontains` lookups ordered by id.
+
+SQLite drops triggers together with their table when a migration
+rebuilds `todo_list_task` or `todo_list_project`, so `install` also runs
+after every `migrate` to the latest migration (see apps.py) and reindexes
+when triggers were missing. Migrations keep their own copy of the SQL,
+it has to match the schema of their time.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .models import Task
+
+
+SEARCH_TABLE = "todo_list_task_search"
+
+MAX_QUERY_WORDS = 10
+
+WORD_RE = re.compile(r"\w+")
+
+
+SQLITE_TRIGGERS = {
+    "todo_list_task_search_insert": f"""
+        CREATE TRIGGER todo_list_task_search_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, content, project_name, owner)
+            SELECT new.id, new.content, name, owner_id FROM todo_list_project WHERE id = new.project_id;
+        END
+    """,
+    "todo_list_task_search_update": f"""
+        CREATE TRIGGER todo_list_task_search_update
+        AFTER UPDATE OF content, project_id ON todo_list_task
+        WHEN old.content IS NOT new.content OR old.project_id IS NOT new.project_id
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+            INSERT INTO {SEARCH_TABLE} (rowid, content, project_name, owner)
+            SELECT new.id, new.content, name, owner_id FROM todo_list_project WHERE id = new.project_id;
+        END
+    """,
+    "todo_list_task_search_delete": f"""
+        CREATE TRIGGER todo_list_task_search_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        END
+    """,
+    "todo_list_project_search_update": f"""
+        CREATE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name, owner_id ON todo_list_project
+        WHEN old.name IS NOT new.name OR old.owner_id IS NOT new.owner_id
+        BEGIN
+            UPDATE {SEARCH_TABLE} SET project_name = new.name, owner = new.owner_id
+            WHERE rowid IN (SELECT id FROM todo_list_task WHERE project_id = new.id);
+        END
+    """,
+}
+
+POSTGRESQL_DOCUMENT = (
+    "setweight(to_tsvector('simple', {content}), 'A') || "
+    "setweight(to_tsvector('simple', {name}), 'B')"
+)
+
+POSTGRESQL_TRIGGERS = {
+    "todo_list_task_search_update": f"""
+        CREATE OR REPLACE FUNCTION todo_list_task_search_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {SEARCH_TABLE} WHERE task_id = OLD.id;
+                RETURN NULL;
+            END IF;
+            INSERT INTO {SEARCH_TABLE} (task_id, owner_id, document)
+            SELECT NEW.id, p.owner_id, {POSTGRESQL_DOCUMENT.format(content="NEW.content", name="p.name")}
+            FROM todo_list_project p WHERE p.id = NEW.project_id
+            ON CONFLICT (task_id) DO UPDATE SET owner_id = EXCLUDED.owner_id, document = EXCLUDED.document;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_search_update
+        AFTER INSERT OR DELETE OR UPDATE OF content, project_id ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_search_update();
+    """,
+    "todo_list_project_search_update": f"""
+        CREATE OR REPLACE FUNCTION todo_list_project_search_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE {SEARCH_TABLE} s
+            SET owner_id = NEW.owner_id,
+                document = {POSTGRESQL_DOCUMENT.format(content="t.content", name="NEW.name")}
+            FROM todo_list_task t
+            WHERE t.id = s.task_id AND t.project_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_search_update
+        AFTER UPDATE OF name, owner_id ON todo_list_project
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.owner_id IS DISTINCT FROM NEW.owner_id)
+        EXECUTE FUNCTION todo_list_project_search_update();
+    """,
+}
+
+
+def install(connection) -> None:
+    """Create search table and triggers, reindex if any trigger was missing"""
+
+    if connection.vendor == "sqlite":
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"USING fts5(content, project_name, owner, tokenize='unicode61 remove_diacritics 2')"
+        ]
+    elif connection.vendor == "postgresql":
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"(task_id bigint PRIMARY KEY, owner_id bigint NOT NULL, document tsvector NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_owner_idx ON {SEARCH_TABLE} (owner_id)",
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx "
+            f"ON {SEARCH_TABLE} USING GIN (document)",
+        ]
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    if create_triggers(connection):
+        reindex(connection)
+
+
+def create_triggers(connection) -> list[str]:
+    """Create missing triggers, return their names"""
+
+    if connection.vendor == "sqlite":
+        triggers = SQLITE_TRIGGERS
+        exists = "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN ({})"
+    elif connection.vendor == "postgresql":
+        triggers = POSTGRESQL_TRIGGERS
+        exists = "SELECT tgname FROM pg_trigger WHERE tgname IN ({})"
+    else:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(exists.format(", ".join(["%s"] * len(triggers))), list(triggers))
+        existing = {name for name, in cursor.fetchall()}
+        missing = [name for name in triggers if name not in existing]
+        for name in missing:
+            cursor.execute(triggers[name])
+    return missing
+
+
+def drop_triggers(connection) -> None:
+    if connection.vendor == "sqlite":
+        statements = [f"DROP TRIGGER IF EXISTS {name}" for name in SQLITE_TRIGGERS]
+    elif connection.vendor == "postgresql":
+        statements = [
+            "DROP TRIGGER IF EXISTS todo_list_task_search_update ON todo_list_task",
+            "DROP TRIGGER IF EXISTS todo_list_project_search_update ON todo_list_project",
+            "DROP FUNCTION IF EXISTS todo_list_task_search_update()",
+            "DROP FUNCTION IF EXISTS todo_list_project_search_update()",
+        ]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def uninstall(connection) -> None:
+    """Drop search table and triggers"""
+
+    if connection.vendor not in ("sqlite", "postgresql"):
+        return
+    drop_triggers(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def reindex(connection) -> None:
+    """Rebuild the search table from all tasks"""
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        elif connection.vendor == "postgresql":
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+    index_tasks(connection, after=0)
+
+
+def index_tasks(connection, after: int) -> None:
+    """Add tasks with id greater than after to the search table"""
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, content, project_name, owner) "
+                f"SELECT t.id, t.content, p.name, p.owner_id FROM todo_list_task t "
+                f"JOIN todo_list_project p ON p.id = t.project_id WHERE t.id > %s",
+                [after],
+            )
+        elif connection.vendor == "postgresql":
+            document = POSTGRESQL_DOCUMENT.format(content="t.content", name="p.name")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (task_id, owner_id, document) "
+                f"SELECT t.id, p.owner_id, {document} FROM todo_list_task t "
+                f"JOIN todo_list_project p ON p.id = t.project_id WHERE t.id > %s",
+                [after],
+            )
+
+
+@contextmanager
+def suspended(connection):
+    """Stop indexing while inserting many tasks, then index the new ones at once.
+
+    Only inserts are picked up, tasks updated or deleted meanwhile
+    are left as they were in the index. Triggers are dropped and created
+    again in one transaction with the inserts, so other connections
+    never write without them and an error rolls the drop back.
+    """
+
+    if connection.vendor not in ("sqlite", "postgresql"):
+        yield
+        return
+    with transaction.atomic(using=connection.alias):
+        last = Task.objects.using(connection.alias).order_by("-id").values_list("id", flat=True).first()
+        drop_triggers(connection)
+        yield
+        index_tasks(connection, after=last or 0)
+        create_triggers(connection)
+
+
+def query_words(query: str) -> list[str]:
+    """Words of a user query, safe to put into FTS5 or tsquery syntax"""
+
+    return WORD_RE.findall(query.lower())[:MAX_QUERY_WORDS]
+
+
+def search_tasks(owner, query: str, offset: int, limit: int) -> list[Task]:
+    """Tasks of owner matching all words of query as prefixes, best first.
+
+    Ranked results can't use a keyset cursor, the database has to rank
+    every match of the owner anyway, so pages are taken by offset. The
+    owner is part of the match, other owners' tasks are never ranked.
+    """
+
+    words = query_words(query)
+    if not words:
+        return []
+
+    connection = connections[Task.objects.db]
+    if connection.vendor == "sqlite":
+        # Words only match content and project name, the owner column
+        # only the owner's id
+        phrases = " ".join(f'"{word}"*' for word in words)
+        match = f'owner : "{owner.id}" AND {{content project_name}} : ({phrases})'
+        sql = (
+            f"SELECT t.id FROM {SEARCH_TABLE} s "
+            f"JOIN todo_list_task t ON t.id = s.rowid "
+            f"JOIN todo_list_project p ON p.id = t.project_id "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND p.deleted_at IS NULL "
+            f"ORDER BY bm25({SEARCH_TABLE}, 2.0, 1.0, 0.0), t.id "
+            f"LIMIT %s OFFSET %s"
+        )
+        params = [match, limit, offset]
+    elif connection.vendor == "postgresql":
+        match = " & ".join(f"{word}:*" for word in words)
+        sql = (
+            f"SELECT t.id FROM {SEARCH_TABLE} s "
+            f"JOIN todo_list_task t ON t.id = s.task_id "
+            f"JOIN todo_list_project p ON p.id = t.project_id, "
+            f"to_tsquery('simple', %s) q "
+            f"WHERE s.owner_id = %s AND s.document @@ q AND p.deleted_at IS NULL "
+            f"ORDER BY ts_rank(s.document, q) DESC, t.id "
+            f"LIMIT %s OFFSET %s"
+        )
+        params = [match, owner.id, limit, offset]
+    else:
+        condition = Q()
+        for word in words:
+            condition &= Q(content__icontains=word) | Q(project__name__icontains=word)
+        queryset = (
+            Task.objects
+            .of_owner(owner)
+            .filter(condition)
+            .select_related("project")
+            .order_by("id")
+        )
+        return list(queryset[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [id for id, in cursor.fetchall()]
+    tasks = Task.objects.select_related("project").in_bulk(ids)
+    return [tasks[id] for id in ids if id in tasks]
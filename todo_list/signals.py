@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import task_list_cache
+from .models import OwnerTimestamp, Project, Task
+
+
+@receiver(post_save, sender=User)
+def create_owner_timestamp(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        OwnerTimestamp.objects.create(owner=instance)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def bump_task_list_version(sender, instance, **kwargs):
+    task_list_cache.bump(instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+def bump_new_project_version(sender, instance, created, **kwargs):
+    # Ids can be reused (e.g. after rollback), never trust old fragments
+    if created:
+        task_list_cache.bump(instance.id)
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_project_id = getattr(instance, "_loaded_project_id", None)
+    loaded_completed = getattr(instance, "_loaded_completed", None)
+    if created:
+        Project.objects.filter(pk=instance.project_id).add_counts(
+            tasks=1,
+            completed=int(instance.completed),
+            )
+    elif loaded_project_id is not None and loaded_project_id != instance.project_id:
+        Project.objects.filter(pk=loaded_project_id).add_counts(
+            tasks=-1,
+            completed=-int(bool(loaded_completed)),
+            )
+        Project.objects.filter(pk=instance.project_id).add_counts(
+            tasks=1,
+            completed=int(instance.completed),
+            )
+    elif loaded_completed is not None and loaded_completed != instance.completed:
+        Project.objects.filter(pk=instance.project_id).add_counts(
+            completed=1 if instance.completed else -1,
+            )
+    instance._loaded_project_id = instance.project_id
+    instance._loaded_completed = instance.completed
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, origin=None, **kwargs):
+    # Deletes of querysets recount their projects themselves, and counters
+    # of a project don't matter when the project is deleted with its tasks
+    if origin is not instance:
+        return
+    Project.objects.filter(pk=instance.project_id).add_counts(
+        tasks=-1,
+        completed=-int(instance.completed),
+        )
@@ -0,0 +1,113 @@
+"""Self hosted, fingerprinted and precompressed static files.
+
+Third party assets are copied into static/vendor/ by the `vendor_static`
+command from the pinned CDN URLs of VENDOR_FILES, and are served like
+our own files. Templates link them with the tags of
+templatetags/vendor.py. Those fall back to the CDN until files are
+vendored, with subresource integrity where it is pinned. The
+`todo_list.W001`/`W002` checks list files that are missing or unpinned.
+
+With STATIC_MANIFEST, `collectstatic` stores files under their content
+hash (`base.3f2a9c1e.css`) with `CompressedManifestStaticFilesStorage`,
+and writes gzip and, with the `brotli` package installed, brotli
+variants next to them. Such names never change content, so
+`StaticFilesMiddleware` (todo_list/middleware.py) serves them from
+STATIC_ROOT as immutable, in the encoding the client accepts.
+"""
+import gzip
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core import checks
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+CDN_URL = "https://cdn.jsdelivr.net/npm/"
+
+# Static path: (CDN path, subresource integrity). None marks files whose
+# integrity isn't pinned yet, `vendor_static` refuses to write them and
+# templates load them from the CDN without it.
+VENDOR_FILES = {
+    "vendor/htmx/htmx.min.js": (
+        "htmx.org@2.0.6/dist/htmx.min.js",
+        "sha384-Akqfrbj/HpNVo8k11SXBb6TlBWmXXlYQrCSqEWmyKJe+hDm3Z/B2WVG4smwBkRVm",
+    ),
+    "vendor/bootstrap/bootstrap.min.css": (
+        "bootstrap@5.0.2/dist/css/bootstrap.min.css",
+        "sha384-EVSTQN3/azprG1Anm3QDgpJLIm9Nao0Yz1ztcQTwFspd3yD65VohhpuuCOmLASjC",
+    ),
+    "vendor/bootstrap/bootstrap.bundle.min.js": (
+        "bootstrap@5.0.2/dist/js/bootstrap.bundle.min.js",
+        "sha384-MrcW6ZMFYlzcLA8Nl+NtUVF0sA7MsXsP1UyJoMp4YLEuNSfAP+JcXn/tWtIaxVXM",
+    ),
+    "vendor/bootstrap-icons/bootstrap-icons.min.css": ("bootstrap-icons@1.11.3/font/bootstrap-icons.min.css", None),
+    # Paths relative to the stylesheet, which links them
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff2": ("bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2", None),
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff": ("bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff", None),
+}
+
+# Compressed file name suffix of each Content-Encoding, preferred first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+# Fonts and images are compressed already
+COMPRESSED_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".map", ".html")
+
+# Smaller files fit in a packet anyway
+MIN_COMPRESS_SIZE = 256
+
+
+def compress(content: bytes) -> dict[str, bytes]:
+    """Variants of content by encoding, only those smaller than content"""
+
+    variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(content)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(content)}
+
+
+def check_vendor_files(app_configs, **kwargs) -> list[checks.CheckMessage]:
+    """Vendored files are missing or not pinned, pages load those from the CDN"""
+
+    messages = []
+    missing = [path for path in VENDOR_FILES if finders.find(path) is None]
+    if missing:
+        messages.append(checks.Warning(
+            f"Third party static files are not vendored: {', '.join(missing)}",
+            hint="Run `python manage.py vendor_static` and commit static/vendor/.",
+            id="todo_list.W001",
+        ))
+    unpinned = [path for path, (_, integrity) in VENDOR_FILES.items() if integrity is None]
+    if unpinned:
+        messages.append(checks.Warning(
+            f"Third party static files have no pinned integrity: {', '.join(unpinned)}",
+            hint="`vendor_static` prints the integrity of downloaded files, add it to VENDOR_FILES.",
+            id="todo_list.W002",
+        ))
+    return messages
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also saves compressed variants of hashed files"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            if not hashed_name.endswith(COMPRESSED_EXTENSIONS):
+                continue
+            with self.open(hashed_name) as file:
+                content = file.read()
+            if len(content) < MIN_COMPRESS_SIZE:
+                continue
+            for encoding, data in compress(content).items():
+                name = hashed_name + ENCODINGS[encoding]
+                if self.exists(name):
+                    self.delete(name)
+                self._save(name, ContentFile(data))
+                yield hashed_name, name, True
@@ -0,0 +1,86 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.html import format_html, format_html_join
+
+
+register = template.Library()
+
+# URL names of the actions in a task row, by key used in task_row.html
+ROW_URLS = {
+    "completed": "projects:task_completed",
+    "priority": "projects:task_priority",
+    "move": "projects:task_move",
+    "delete": "projects:task_delete",
+    "update": "projects:task_update",
+}
+
+ROW_TEMPLATE = "todo_list/partials/task_row.html"
+COMPACT_ROW_TEMPLATE = "todo_list/partials/compact_task_row.html"
+
+# Reversed in place of the task id, then split around
+URL_ID = 2147483647
+
+
+@lru_cache(maxsize=16)
+def row_url_parts(urlconf, script_prefix: str) -> dict[str, tuple[str, str]]:
+    """Row URLs split around the task id, per URLconf and script prefix"""
+
+    parts = {}
+    for key, name in ROW_URLS.items():
+        before, after = reverse(name, kwargs={"pk": URL_ID}, urlconf=urlconf).split(str(URL_ID))
+        parts[key] = (before, after)
+    return parts
+
+
+def compact_rows(context) -> bool:
+    """Whether rows render compact, `compact_rows` in context overrides the setting"""
+
+    return context.get("compact_rows", settings.COMPACT_TASK_ROWS)
+
+
+@register.simple_tag(takes_context=True)
+def task_row(context, task):
+    """Render the row of a task.
+
+    Large projects render thousands of rows, so URLs are joined from
+    patterns reversed once instead of four `{% url %}` per row, the
+    CSRF input is built without the `{% csrf_token %}` tag and ids are
+    passed as strings, which skips number localization of `{{ task.id }}`.
+
+    Compact rows carry only the task id and data, their actions are
+    delegated to the URLs of `{% task_row_urls %}` on the container.
+    """
+
+    compact = compact_rows(context)
+    # Looked up once per render, as inclusion tags do
+    template = context.render_context.get((task_row, compact))
+    if template is None:
+        template = context.template.engine.get_template(
+            COMPACT_ROW_TEMPLATE if compact else ROW_TEMPLATE
+        )
+        context.render_context[(task_row, compact)] = template
+
+    id = str(task.id)
+    values = {"task": task, "id": id}
+    if not compact:
+        parts = row_url_parts(get_urlconf(), get_script_prefix())
+        token = context.get("csrf_token")
+        values["urls"] = {key: f"{before}{id}{after}" for key, (before, after) in parts.items()}
+        values["csrf_input"] = format_html(
+            '<input type="hidden" name="csrfmiddlewaretoken" value="{}">', token,
+        ) if token and token != "NOTPROVIDED" else ""
+    return template.render(context.new(values))
+
+
+@register.simple_tag
+def task_row_urls():
+    """`data-task-url-*` attributes with `{id}` in place of the task id"""
+
+    parts = row_url_parts(get_urlconf(), get_script_prefix())
+    return format_html_join(
+        " ", 'data-task-url-{}="{}{{id}}{}"',
+        ((key, before, after) for key, (before, after) in parts.items()),
+    )
@@ -0,0 +1,43 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from todo_list.staticfiles import CDN_URL, VENDOR_FILES
+
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def is_vendored(path: str) -> bool:
+    """Whether `vendor_static` copied path into the static files"""
+
+    return finders.find(path) is not None
+
+
+def vendor_source(path: str) -> tuple[str, str]:
+    """URL and integrity attributes of vendored file.
+
+    Until it's vendored, its CDN URL, with subresource integrity once
+    that is pinned in VENDOR_FILES.
+    """
+
+    if is_vendored(path):
+        return static(path), ""
+    cdn_path, integrity = VENDOR_FILES[path]
+    if integrity is None:
+        return CDN_URL + cdn_path, ""
+    return CDN_URL + cdn_path, format_html(' integrity="{}" crossorigin="anonymous"', integrity)
+
+
+@register.simple_tag
+def vendor_script(path: str) -> str:
+    return format_html('<script src="{}"{}></script>', *vendor_source(path))
+
+
+@register.simple_tag
+def vendor_stylesheet(path: str) -> str:
+    return format_html('<link rel="stylesheet" href="{}"{}>', *vendor_source(path))
@@ -0,0 +1,135 @@
+import json
+import warnings
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from todo_list import api, async_views
+
+from todo_list.tests.utils import (
+    QueryBudgetMixin,
+    create_user,
+    create_project,
+    create_task,
+)
+
+
+class ExportApiTestCase(QueryBudgetMixin, TestCase):
+    """Test streaming JSON API of projects and tasks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.project_b = create_project(2, cls.user)
+        cls.task = create_task(1, cls.project)
+        cls.task_b = create_task(2, cls.project_b)
+        user2 = create_user(2)
+        create_task(3, create_project(3, user2))
+
+    def content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_not_login_user(self):
+        response = self.client.get(reverse('projects:api_tasks'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_projects_json(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:api_projects'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(self.content(response)), [
+            {"id": self.project.id, "name": self.project.name},
+            {"id": self.project_b.id, "name": self.project_b.name},
+        ])
+
+    def test_tasks_ndjson(self):
+        self.client.force_login(self.user)
+        for params, headers in [({"format": "ndjson"}, {}),
+                                ({}, {"Accept": "application/x-ndjson"})]:
+            with self.subTest(params=params, headers=headers):
+                response = self.client.get(
+                    reverse('projects:api_tasks'),
+                    data=params,
+                    headers=headers,
+                    )
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+                rows = [json.loads(line) for line in self.content(response).splitlines()]
+                self.assertEqual([row["id"] for row in rows], [self.task.id, self.task_b.id])
+                self.assertEqual(rows[0]["deadline"], self.task.deadline.isoformat())
+
+    def test_base_view_streams_tasks_of_user(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        response = api.StreamingExportView.as_view()(request)
+        rows = json.loads(self.content(response))
+        self.assertEqual([row["id"] for row in rows], [self.task.id, self.task_b.id])
+
+    def test_tasks_of_project(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('projects:api_tasks'),
+            data={"project": self.project_b.id},
+            )
+        rows = json.loads(self.content(response))
+        self.assertEqual([row["id"] for row in rows], [self.task_b.id])
+
+    def test_tasks_invalid_project(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:api_tasks'), data={"project": "a"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tasks_query_budget(self):
+        self.client.force_login(self.user)
+        # session, user, tasks
+        with self.assertQueryBudget(3):
+            response = self.client.get(reverse('projects:api_tasks'))
+            self.content(response)
+
+
+@override_settings(ROOT_URLCONF='task_manager.asgi_urls')
+class AsyncExportApiTestCase(TestCase):
+    """Test the export API of the ASGI application streams from async iterators"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.tasks = [create_task(i, cls.project) for i in range(5)]
+
+    async def get(self, url, **kwargs):
+        await self.async_client.aforce_login(self.user)
+        # The ASGI handler warns when it has to read a sync iterator into memory
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            response = await self.async_client.get(url, **kwargs)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        return response, chunks
+
+    def test_urls_resolve_to_async_views(self):
+        self.assertIs(resolve(reverse('projects:api_tasks')).func.view_class, async_views.TaskExportView)
+        self.assertIs(resolve(reverse('projects:api_projects')).func.view_class, async_views.ProjectExportView)
+
+    async def test_not_login_user(self):
+        response = await self.async_client.get(reverse('projects:api_tasks'))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_tasks_json(self):
+        response, chunks = await self.get(reverse('projects:api_tasks'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        # Brackets and one chunk per row
+        self.assertEqual(len(chunks), len(self.tasks) + 2)
+        rows = json.loads(b"".join(chunks))
+        self.assertEqual([row["id"] for row in rows], [task.id for task in self.tasks])
+
+    async def test_projects_ndjson(self):
+        response, chunks = await self.get(reverse('projects:api_projects'), data={"format": "ndjson"})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(chunk) for chunk in chunks], [{"id": self.project.id, "name": self.project.name}])
+
+    async def test_tasks_invalid_project(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('projects:api_tasks'), data={"project": "x"})
+        self.assertEqual(response.status_code, 400)
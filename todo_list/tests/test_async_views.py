@@ -0,0 +1,109 @@
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from todo_list import async_views
+from todo_list.models import Project, Task
+from todo_list.tests.utils import create_user, create_project, create_task
+
+
+@override_settings(ROOT_URLCONF='task_manager.asgi_urls')
+class AsyncViewsTestCase(TestCase):
+    """Test async views served by the ASGI application"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+        user2 = create_user(2)
+        cls.task2 = create_task(2, create_project(2, user2))
+        cls.headers = {"HX-Request": 'true'}
+
+    def test_urls_resolve_to_async_views(self):
+        match = resolve(reverse('projects:projects_list'))
+        self.assertIs(match.func.view_class, async_views.ProjectListView)
+        self.assertTrue(match.func.view_class.view_is_async)
+
+    async def test_not_login_user(self):
+        response = await self.async_client.get(reverse('projects:projects_list'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, f"{reverse('account_login')}?next=/projects/")
+
+    async def test_projects_list(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('projects:projects_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.project.name)
+        self.assertContains(response, self.task.content)
+
+    async def test_create_task(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('projects:task_create', kwargs={"project_id": self.project.id}),
+            data={"content": "async task"},
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "async task")
+        self.assertTrue(await Task.objects.filter(content="async task").aexists())
+        self.assertContains(response, f'id="project-progress-{self.project.id}" hx-swap-oob="true">0/2 done')
+
+    async def test_completed(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('projects:task_completed', kwargs={"pk": self.task.id}),
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        await self.task.arefresh_from_db()
+        self.assertTrue(self.task.completed)
+        self.assertContains(response, f'id="project-progress-{self.project.id}" hx-swap-oob="true">1/1 done')
+
+    async def test_priority(self):
+        await self.async_client.aforce_login(self.user)
+        for change, priority in [(1, 1), (-1, 0), (-1, 0)]:
+            response = await self.async_client.post(
+                reverse('projects:task_priority', kwargs={"pk": self.task.id}),
+                data={"priority": change},
+                headers=self.headers,
+                )
+            self.assertEqual(response.status_code, 200)
+            await self.task.arefresh_from_db()
+            self.assertEqual(self.task.priority, priority)
+        self.assertContains(response, "Priority is minimum")
+
+    async def test_delete(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('projects:task_delete', kwargs={"pk": self.task.id}),
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await Task.objects.filter(id=self.task.id).aexists())
+        self.assertContains(response, f'id="project-progress-{self.project.id}" hx-swap-oob="true">0/0 done')
+
+    async def test_not_owner_user(self):
+        await self.async_client.aforce_login(self.user)
+        for name in ['task_completed', 'task_priority', 'task_delete']:
+            with self.subTest(name=name):
+                response = await self.async_client.post(
+                    reverse(f'projects:{name}', kwargs={"pk": self.task2.id}),
+                    data={"priority": 1},
+                    headers=self.headers,
+                    )
+                self.assertEqual(response.status_code, 404)
+        self.assertTrue(await Task.objects.filter(id=self.task2.id, priority=0).aexists())
+
+    async def test_project_being_deleted(self):
+        await Project.objects.filter(pk=self.project.pk).aupdate(deleted_at=timezone.now())
+        await self.async_client.aforce_login(self.user)
+        for name in ['task_completed', 'task_priority', 'task_delete']:
+            with self.subTest(name=name):
+                response = await self.async_client.post(
+                    reverse(f'projects:{name}', kwargs={"pk": self.task.id}),
+                    data={"priority": 1},
+                    headers=self.headers,
+                    )
+                self.assertEqual(response.status_code, 404)
+        self.assertTrue(await Task.objects.filter(id=self.task.id, priority=0, completed=False).aexists())
@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from todo_list.cache import CSRF_PLACEHOLDER, task_list_cache
+from todo_list.models import Task
+from todo_list.tests.utils import (
+    QueryBudgetMixin,
+    create_user,
+    create_project,
+    create_task,
+)
+
+
+class TaskListCacheTestCase(QueryBudgetMixin, TestCase):
+    """Test versioned cache of rendered task lists"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+        cls.headers = {"HX-Request": 'true'}
+
+    def setUp(self):
+        task_list_cache.cache.clear()
+        task_list_cache.reset_stats()
+        self.client.force_login(self.user)
+
+    def get_projects(self):
+        return self.client.get(reverse('projects:projects_list'))
+
+    def test_second_load_is_cached(self):
+        self.get_projects()
+        # session, user, projects
+        with self.assertQueryBudget(3):
+            response = self.get_projects()
+        self.assertTemplateNotUsed(response, 'todo_list/task_list.html')
+        self.assertContains(response, self.task.content)
+        self.assertEqual(task_list_cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_csrf_token_is_not_cached(self):
+        self.get_projects()
+        response = self.get_projects()
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+    def test_task_save_bumps_version(self):
+        self.get_projects()
+        Task.objects.filter(id=self.task.id).first().save()
+        response = self.get_projects()
+        self.assertTemplateUsed(response, 'todo_list/task_list.html')
+        self.assertEqual(task_list_cache.stats(), {"hits": 0, "misses": 2})
+
+    def test_task_delete_bumps_version(self):
+        self.get_projects()
+        self.client.post(
+            reverse('projects:task_delete', kwargs={"pk": self.task.id}),
+            headers=self.headers,
+            )
+        response = self.get_projects()
+        self.assertNotContains(response, self.task.content)
+
+    def test_completed_update_bumps_version(self):
+        self.get_projects()
+        self.client.post(
+            reverse('projects:task_completed', kwargs={"pk": self.task.id}),
+            data={"completed": True},
+            headers=self.headers,
+            )
+        response = self.get_projects()
+        self.assertTemplateUsed(response, 'todo_list/task_list.html')
+        self.assertContains(response, 'checked')
@@ -0,0 +1,375 @@
+import base64
+import hashlib
+import json
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from unittest import mock, skipUnless
+
+from custom_auth import urls as custom_auth_urls
+from todo_list import jobs, search, staticfiles, urls as todo_list_urls
+from todo_list.management.commands import bench_asgi
+from todo_list.models import Job, Project, Task
+from todo_list.tests.utils import create_projects_with_tasks, create_user
+
+
+class ExplainViewsCommandTestCase(TestCase):
+    """Test explain_views management command"""
+
+    def call(self, *args):
+        out = StringIO()
+        call_command("explain_views", *args, stdout=out)
+        return out.getvalue()
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite query plans")
+    def test_queries_use_indexes(self):
+        output = self.call("--projects", "30", "--tasks", "60", "--repeat", "1")
+        self.assertIn("project_owner_id_idx", output)
+        self.assertIn("task_project_priority_idx", output)
+
+    def test_seeded_data_is_rolled_back(self):
+        self.call("--projects", "2", "--tasks", "2", "--repeat", "0")
+        self.assertFalse(Project.objects.exists())
+
+
+class BenchAsgiCommandTestCase(TransactionTestCase):
+    """Test bench_asgi management command
+
+    Workers run in threads with their own connections, so data is committed.
+    """
+
+    def call(self, *args):
+        out = StringIO()
+        call_command(
+            "bench_asgi", "--requests", "2", "--concurrency", "1",
+            "--projects", "1", "--tasks", "1", "--json", *args,
+            stdout=out,
+            )
+        return json.loads(out.getvalue())
+
+    def test_json_output(self):
+        results = self.call()
+        self.assertEqual(
+            {(result["route"], result["handler"]) for result in results},
+            {(route, handler)
+             for route in ["projects_list", "task_completed", "task_priority"]
+             for handler in ["wsgi", "asgi"]},
+            )
+        for result in results:
+            self.assertEqual(result["requests"], 2)
+            self.assertEqual(result["errors"], 0)
+            self.assertEqual(set(result["failures"].values()), {0})
+
+    def test_failure_kinds(self):
+        for status_code, kind in [(200, None), (204, None), (304, None),
+                                  (302, "redirects"), (403, "client_errors"),
+                                  (404, "client_errors"), (500, "server_errors")]:
+            with self.subTest(status_code=status_code):
+                self.assertEqual(bench_asgi.failure(status_code), kind)
+
+    def test_exceptions_are_errors(self):
+        with mock.patch("django.test.Client.get", side_effect=RuntimeError):
+            [result] = self.call("--routes", "projects_list", "--handlers", "wsgi")
+        self.assertEqual(result["requests"], 2)
+        self.assertEqual(result["errors"], 2)
+        self.assertEqual(result["failures"]["exceptions"], 2)
+
+
+class RecountTasksCommandTestCase(TestCase):
+    """Test recount_tasks management command"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.projects = create_projects_with_tasks(5, cls.user, tasks_per_project=3)
+        Task.objects.filter(project=cls.projects[0]).update(completed=True)
+        Project.objects.filter(id__in=[cls.projects[0].id, cls.projects[3].id]).update(
+            task_count=0, completed_count=7,
+            )
+
+    def call(self, *args):
+        out = StringIO()
+        call_command("recount_tasks", "--batch-size", "2", *args, stdout=out)
+        return out.getvalue()
+
+    def counts(self):
+        return list(
+            Project.objects.order_by("id").values_list("task_count", "completed_count")
+            )
+
+    def test_check_reports_without_fixing(self):
+        before = self.counts()
+        with self.assertRaisesMessage(CommandError, "2 projects"):
+            self.call("--check")
+        self.assertEqual(self.counts(), before)
+
+    def test_recount(self):
+        output = self.call()
+        self.assertIn(f"Project {self.projects[0].id}: 7/0 stored, 3/3 actual", output)
+        self.assertIn("Checked 5 projects, 2 with wrong counters", output)
+        self.assertEqual(self.counts(), [(3, 3)] + [(3, 0)] * 4)
+        self.assertIn("0 with wrong counters", self.call("--check"))
+
+
+class BenchDatabasesCommandTestCase(TestCase):
+    """Test bench_databases management command
+
+    The benchmark runs in a subprocess against its own SQLite file.
+    """
+
+    def test_sqlite_json_output(self):
+        with TemporaryDirectory() as directory:
+            out = StringIO()
+            call_command(
+                "bench_databases", "--engines", "sqlite3",
+                "--sqlite-name", str(Path(directory) / "bench.sqlite3"),
+                "--requests", "2", "--concurrency", "1",
+                "--projects", "1", "--tasks", "1", "--json",
+                stdout=out,
+                )
+        results = json.loads(out.getvalue())
+        self.assertEqual(
+            [(result["engine"], result["route"], result["handler"]) for result in results],
+            [("sqlite3", "projects_list", "wsgi"), ("sqlite3", "task_completed", "wsgi")],
+            )
+        for result in results:
+            self.assertEqual(result["errors"], 0)
+
+    def test_unknown_engine(self):
+        with self.assertRaisesMessage(CommandError, "Unknown engines: mysql"):
+            call_command("bench_databases", "--engines", "mysql")
+
+
+class BenchRenderCommandTestCase(TestCase):
+    """Test bench_render management command"""
+
+    def test_json_output(self):
+        out = StringIO()
+        call_command("bench_render", "--tasks", "20", "--repeat", "1", "--json", stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual([result["path"] for result in results], ["compact", "task_row", "baseline"])
+        for result in results:
+            self.assertEqual(result["tasks"], 20)
+            self.assertGreater(result["rows_per_sec"], 0)
+        self.assertLess(results[0]["bytes_per_row"], results[1]["bytes_per_row"])
+
+
+class StressSqliteCommandTestCase(TestCase):
+    """Test stress_sqlite management command"""
+
+    def test_json_output(self):
+        out = StringIO()
+        call_command(
+            "stress_sqlite", "--seconds", "0.2", "--writers", "2", "--readers", "1", "--json",
+            stdout=out,
+            )
+        results = json.loads(out.getvalue())
+        self.assertEqual([result["profile"] for result in results], ["default", "wal"])
+        for result in results:
+            self.assertGreater(result["writes"], 0)
+            self.assertEqual(result["other_errors"], 0)
+
+    def test_unknown_profile(self):
+        with self.assertRaisesMessage(CommandError, "Unknown profiles: memory"):
+            call_command("stress_sqlite", "--profiles", "memory")
+
+
+class BenchLoadCommandTestCase(TransactionTestCase):
+    """Test bench_load management command
+
+    Workers run in threads with their own connections, so data is committed.
+    """
+
+    def test_every_route(self):
+        out = StringIO()
+        call_command(
+            "bench_load", "--users", "2", "--projects", "2", "--tasks", "2",
+            "--requests", "2", "--concurrency", "1", "--json",
+            stdout=out,
+            )
+        report = json.loads(out.getvalue())
+        routes = {result["route"].split(":")[0] for result in report["routes"]}
+        names = {pattern.name for pattern in todo_list_urls.urlpatterns + custom_auth_urls.urlpatterns}
+        self.assertEqual(routes, names)
+        for result in report["routes"]:
+            with self.subTest(route=result["route"]):
+                self.assertEqual(result["requests"], 2)
+                self.assertEqual(result["errors"], 0)
+                self.assertGreaterEqual(result["max_queries"], result["queries_per_request"])
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_unknown_route(self):
+        with self.assertRaisesMessage(CommandError, "Unknown routes: nope"):
+            call_command("bench_load", "--users", "1", "--projects", "1", "--tasks", "1",
+                         "--requests", "1", "--routes", "nope")
+
+
+class GenerateDataCommandTestCase(TestCase):
+    """Test generate_data management command"""
+
+    def call(self, *args):
+        out = StringIO()
+        call_command(
+            "generate_data", "--users", "3", "--projects", "4", "--tasks", "5",
+            "--batch-size", "7", *args,
+            stdout=out,
+            )
+        return out.getvalue()
+
+    def test_generated_rows(self):
+        output = self.call("--prefix", "gen")
+        users = get_user_model().objects.filter(username__startswith="gen-")
+        projects = Project.objects.filter(owner__in=users)
+        tasks = Task.objects.filter(project__in=projects)
+        self.assertEqual(users.count(), 3)
+        self.assertIn(f"{projects.count()} projects and {tasks.count()} tasks", output)
+        self.assertTrue(self.client.login(username="gen-0", password="password"))
+        self.assertFalse(tasks.exclude(priority__range=(Task.MIN_PRIORITY, Task.MAX_PRIORITY)).exists())
+        self.assertIn("0 with wrong counters", self.call_recount())
+        task = tasks.first()
+        self.assertIn(task, search.search_tasks(task.project.owner, task.content, offset=0, limit=100))
+
+    def test_same_seed_same_data(self):
+        self.call("--prefix", "a")
+        self.call("--prefix", "b")
+        rows = [
+            list(Task.objects
+                 .filter(project__owner__username__startswith=f"{prefix}-")
+                 .order_by("id")
+                 .values_list("content", "priority", "completed", "deadline"))
+            for prefix in ["a", "b"]
+        ]
+        self.assertEqual(rows[0], rows[1])
+
+    def test_triggers_stay_with_existing_data(self):
+        create_projects_with_tasks(1, create_user(1))
+        with mock.patch.object(search, "drop_triggers") as drop_triggers:
+            self.call("--prefix", "kept")
+        drop_triggers.assert_not_called()
+        task = Task.objects.filter(project__owner__username="kept-0").first()
+        self.assertIn(task, search.search_tasks(task.project.owner, task.content, offset=0, limit=100))
+
+    def test_failure_restores_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite triggers")
+        with mock.patch("todo_list.management.commands.generate_data.generate", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.call("--prefix", "failed")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertLessEqual(set(search.SQLITE_TRIGGERS), triggers)
+
+    def call_recount(self):
+        out = StringIO()
+        call_command("recount_tasks", "--check", stdout=out)
+        return out.getvalue()
+
+
+class JobCommandsTestCase(TestCase):
+    """Test run_jobs and list_jobs management commands"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = create_user(1)
+        create_projects_with_tasks(2, user, tasks_per_project=3)
+        # Counters are set after bulk create, so projects are read again
+        for project in Project.objects.filter(owner=user):
+            jobs.delete_project(project)
+
+    def call(self, name, *args):
+        out = StringIO()
+        call_command(name, *args, stdout=out)
+        return out.getvalue()
+
+    def test_list_queued_jobs(self):
+        rows = json.loads(self.call("list_jobs", "--json"))
+        self.assertEqual([row["status"] for row in rows], [Job.QUEUED, Job.QUEUED])
+        self.assertEqual([(row["progress"], row["total"]) for row in rows], [(0, 3), (0, 3)])
+
+    def test_run_jobs_burst(self):
+        output = self.call("run_jobs", "--burst")
+        self.assertIn("purge_project done after 1 attempts, 3/3 done", output)
+        self.assertIn("Ran 2 jobs", output)
+        self.assertFalse(Project.all_objects.exists())
+        self.assertEqual(json.loads(self.call("list_jobs", "--json")), [])
+        self.assertEqual(len(json.loads(self.call("list_jobs", "--all", "--json"))), 2)
+
+    def test_list_failed_jobs(self):
+        job = Job.objects.order_by("id").first()
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED,
+            attempts=jobs.MAX_ATTEMPTS,
+            error="Traceback (most recent call last):\nZeroDivisionError: division by zero\n",
+            )
+        rows = json.loads(self.call("list_jobs", "--json"))
+        self.assertEqual([row["status"] for row in rows], [Job.QUEUED, Job.FAILED])
+        self.assertEqual(rows[1]["error"], "ZeroDivisionError: division by zero")
+        self.assertIn(f"{jobs.MAX_ATTEMPTS}/{jobs.MAX_ATTEMPTS}", self.call("list_jobs"))
+
+
+class BenchReorderCommandTestCase(TestCase):
+    """Test bench_reorder management command"""
+
+    def test_json_output(self):
+        out = StringIO()
+        call_command("bench_reorder", "--tasks", "30", "--moves", "10", "--json", stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual([result["path"] for result in results], ["move", "rebalance", "renumber"])
+        move, rebalance, renumber = results
+        self.assertEqual(move["rows_per_move"], 1)
+        self.assertEqual(rebalance["rows_per_move"], 30)
+        self.assertGreater(renumber["rows_per_move"], 1)
+        self.assertFalse(Task.objects.exists())
+
+
+class VendorStaticCommandTestCase(TestCase):
+    """Test vendor_static management command"""
+
+    content = b"htmx = {};\n//# sourceMappingURL=htmx.min.js.map\n"
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        integrity = "sha384-" + base64.b64encode(hashlib.sha384(self.content).digest()).decode()
+        settings = override_settings(STATICFILES_DIRS=[self.root])
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for patcher in (
+            mock.patch.dict(staticfiles.VENDOR_FILES, {"vendor/htmx.min.js": ("htmx.min.js", integrity)}, clear=True),
+            mock.patch("todo_list.management.commands.vendor_static.urlopen", side_effect=self.urlopen),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def urlopen(self, url, timeout):
+        return BytesIO(self.content)
+
+    def test_downloads_and_strips_source_map(self):
+        call_command("vendor_static", stdout=StringIO())
+        self.assertEqual((self.root / "vendor" / "htmx.min.js").read_bytes(), b"htmx = {};\n")
+
+        out = StringIO()
+        call_command("vendor_static", stdout=out)
+        self.assertIn("exists", out.getvalue())
+
+    def test_unpinned_file_is_not_written(self):
+        with mock.patch.dict(staticfiles.VENDOR_FILES, {"vendor/htmx.min.js": ("htmx.min.js", None)}):
+            out = StringIO()
+            with self.assertRaises(CommandError):
+                call_command("vendor_static", stdout=out)
+        digest = base64.b64encode(hashlib.sha384(self.content).digest()).decode()
+        self.assertIn(f"not pinned, downloaded file is sha384-{digest}", out.getvalue())
+        self.assertFalse((self.root / "vendor").exists())
+
+    def test_integrity_mismatch(self):
+        self.content = b"tampered"
+        with self.assertRaises(CommandError):
+            call_command("vendor_static", stdout=StringIO())
+        self.assertFalse((self.root / "vendor").exists())
@@ -0,0 +1,147 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from todo_list.models import OwnerTimestamp, Project, Task
+from todo_list.tests.utils import (
+    QueryBudgetMixin,
+    create_user,
+    create_project,
+    create_task,
+)
+
+
+class TimestampsTestCase(TestCase):
+    """Test propagation of updated_at from tasks to projects and owners"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+
+    def timestamps(self) -> tuple:
+        return (
+            Project.objects.get(id=self.project.id).updated_at,
+            OwnerTimestamp.objects.get(owner=self.user).updated_at,
+            )
+
+    def assertTouched(self, before):
+        project, owner = self.timestamps()
+        self.assertGreater(project, before[0])
+        self.assertGreater(owner, before[1])
+
+    def test_owner_timestamp_created_with_user(self):
+        self.assertTrue(OwnerTimestamp.objects.filter(owner=self.user).exists())
+
+    def test_queryset_update(self):
+        before = self.timestamps()
+        Task.objects.filter(id=self.task.id).update(content="Changed")
+        self.assertTouched(before)
+
+    def test_change_priority_and_toggle(self):
+        task_updated_at = self.task.updated_at
+        before = self.timestamps()
+        Task.objects.change_priority(self.task.id, self.user.id, 1)
+        Task.objects.toggle_completed(self.task.id, self.project.id)
+        self.assertTouched(before)
+        self.assertGreater(Task.objects.get(id=self.task.id).updated_at, task_updated_at)
+
+    def test_task_delete(self):
+        before = self.timestamps()
+        Task.objects.filter(id=self.task.id).delete()
+        self.assertTouched(before)
+
+    def test_project_create_and_delete(self):
+        before = self.timestamps()[1]
+        project = create_project(2, self.user)
+        created = self.timestamps()[1]
+        self.assertGreater(created, before)
+        project.delete()
+        self.assertGreater(self.timestamps()[1], created)
+
+
+class ConditionalGetTestCase(QueryBudgetMixin, TestCase):
+    """Test ETag and Last-Modified of project list and task pages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+        cls.headers = {"HX-Request": 'true'}
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_projects(self, **headers):
+        return self.client.get(reverse('projects:projects_list'), headers=headers)
+
+    def test_validators(self):
+        response = self.get_projects()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response.headers)
+        self.assertIn("Last-Modified", response.headers)
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        self.assertIn("HX-Request", response.headers["Vary"])
+
+    def test_not_modified(self):
+        etag = self.get_projects().headers["ETag"]
+        # session, user, timestamp
+        with self.assertQueryBudget(3):
+            response = self.get_projects(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertTemplateNotUsed(response, 'todo_list/project_list.html')
+
+    def test_if_modified_since(self):
+        last_modified = self.get_projects().headers["Last-Modified"]
+        response = self.get_projects(**{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_renders_again(self):
+        etag = self.get_projects().headers["ETag"]
+        self.client.post(
+            reverse('projects:task_completed', kwargs={"pk": self.task.id}),
+            headers=self.headers,
+            )
+        response = self.get_projects(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_messages_render_again(self):
+        etag = self.get_projects().headers["ETag"]
+        response = self.client.post(
+            reverse('account_change_password'),
+            data={"oldpassword": '1234', "password1": 'Qwer12345679', "password2": 'Qwer12345679'},
+            )
+        self.assertRedirects(response, reverse('projects:projects_list'), fetch_redirect_response=False)
+        response = self.get_projects(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Password successfully changed")
+        # The page with the message is not reused either
+        self.assertNotIn("ETag", response.headers)
+
+    @override_settings(COMPACT_TASK_ROWS=False)
+    def test_first_etag_with_csrf_tokens(self):
+        # Rows with forms create the CSRF secret while the response renders
+        url = reverse('projects:task_list', kwargs={"project_id": self.project.id})
+        data = {"priority": 10, "rank": 0, "after": 0}
+        etag = self.client.get(url, data, headers=self.headers).headers["ETag"]
+        response = self.client.get(url, data, headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_htmx_has_own_etag(self):
+        self.assertNotEqual(
+            self.get_projects().headers["ETag"],
+            self.get_projects(**self.headers).headers["ETag"],
+            )
+
+    def test_task_page(self):
+        url = reverse('projects:task_list', kwargs={"project_id": self.project.id})
+        data = {"priority": 10, "rank": 0, "after": 0}
+        etag = self.client.get(url, data, headers=self.headers).headers["ETag"]
+        response = self.client.get(url, data, headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        Task.objects.filter(id=self.task.id).update(priority=5)
+        response = self.client.get(url, data, headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from todo_list import events
+from todo_list.models import Task
+from todo_list.tests.utils import create_user, create_project, create_task
+
+
+def parse(chunk):
+    """Name and data of one Server-Sent Event"""
+
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+class BrokerTestCase(TestCase):
+    """Test events reach the streams of their owner only"""
+
+    async def test_publish_to_owner(self):
+        broker = events.Broker()
+        first, second, other = broker.subscribe(1), broker.subscribe(1), broker.subscribe(2)
+        broker.publish(1, {"project": 1})
+        self.assertEqual(await first.get_many(1), [{"project": 1}])
+        self.assertEqual(await second.get_many(1), [{"project": 1}])
+        self.assertEqual(await other.get_many(0.01), [])
+
+        for subscription in (first, second, other):
+            broker.unsubscribe(subscription)
+        self.assertEqual(broker.subscriptions, {})
+
+    async def test_overflow(self):
+        broker = events.Broker()
+        subscription = broker.subscribe(1)
+        for i in range(events.QUEUE_SIZE + 1):
+            broker.publish(1, {"project": i})
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(len(await subscription.get_many(1)), events.QUEUE_SIZE)
+
+
+class PublishTestCase(TestCase):
+    """Test write views publish their changes once committed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+        cls.headers = {"HX-Request": 'true', "X-Tab-Id": "tab-1"}
+
+    def test_task_views_publish(self):
+        self.client.force_login(self.user)
+        published = []
+        self.addCleanup(setattr, events.broker, "publish", events.broker.publish)
+        events.broker.publish = lambda owner_id, event: published.append((owner_id, event))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.client.post(reverse('projects:task_completed', kwargs={"pk": self.task.id}), headers=self.headers)
+        self.assertEqual(published, [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(published, [(self.user.id, {"project": self.project.id, "task": self.task.id, "tab": "tab-1"})])
+
+    def test_sync_stream_is_empty(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:events'))
+        self.assertEqual(response.status_code, 204)
+
+
+class RenderSwapsTestCase(TestCase):
+    """Test events are rendered into swaps of the page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+        cls.other = create_project(2, create_user(2))
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    async def test_project_and_task_swaps(self):
+        swaps = await events.render_swaps(self.request, [
+            {"project": self.project.id, "task": self.task.id, "tab": ""},
+        ])
+        self.assertEqual([swap["target"] for swap in swaps], [f"#project-update-{self.project.id}", f"#task-{self.task.id}"])
+        self.assertIn(self.task.content, swaps[1]["html"])
+        # Other tabs get the task counters of the title with it
+        self.assertIn("0/1 done", swaps[0]["html"])
+
+        swaps = await events.render_swaps(self.request, [
+            {"project": self.project.id, "task": self.task.id, "tab": ""},
+            {"project": self.project.id, "task": None, "tab": ""},
+        ])
+        self.assertEqual(len(swaps), 1)
+        self.assertEqual((swaps[0]["target"], swaps[0]["swap"]), (f"#project-{self.project.id}", "outerHTML"))
+        self.assertIn(self.task.content, swaps[0]["html"])
+
+    async def test_missing_is_deleted(self):
+        await Task.objects.filter(id=self.task.id).adelete()
+        swaps = await events.render_swaps(self.request, [
+            {"project": self.project.id, "task": self.task.id, "tab": ""},
+            {"project": self.other.id, "task": None, "tab": ""},
+        ])
+        self.assertEqual(
+            [(swap["target"], swap["swap"]) for swap in swaps],
+            [(f"#project-update-{self.project.id}", "outerHTML"), (f"#project-{self.other.id}", "delete"), (f"#task-{self.task.id}", "delete")],
+        )
+
+
+@override_settings(ROOT_URLCONF='task_manager.asgi_urls', EVENTS_HEARTBEAT=0.05)
+class EventStreamTestCase(TestCase):
+    """Test the live update stream of the ASGI application"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+
+    @asynccontextmanager
+    async def open(self, tab="tab-1"):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('projects:events'), {"tab": tab})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(stream), b"retry: 2000\n\n")
+            yield stream
+        finally:
+            await stream.aclose()
+
+    async def test_not_login_user(self):
+        response = await self.async_client.get(reverse('projects:events'))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_swap_of_other_tab(self):
+        async with self.open() as stream:
+            events.broker.publish(self.user.id, {"project": self.project.id, "task": self.task.id, "tab": "tab-1"})
+            events.broker.publish(self.user.id, {"project": self.project.id, "task": None, "tab": "tab-2"})
+            name, swaps = parse(await anext(stream))
+            self.assertEqual(name, "swap")
+            self.assertEqual([swap["target"] for swap in swaps], [f"#project-{self.project.id}"])
+
+    async def test_own_tab_gets_ping(self):
+        async with self.open() as stream:
+            events.broker.publish(self.user.id, {"project": self.project.id, "task": None, "tab": "tab-1"})
+            self.assertEqual(await anext(stream), b": ping\n\n")
+
+    async def test_refresh_on_change_without_event(self):
+        async with self.open() as stream:
+            await Task.objects.acreate(project=self.project, content="From a job")
+            self.assertEqual(parse(await anext(stream)), ("refresh", {}))
+            self.assertEqual(await anext(stream), b": ping\n\n")
@@ -0,0 +1,165 @@
+from datetime import date, timedelta
+from itertools import product
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from todo_list.filters import (
+    DUE_CHOICES,
+    SORT_CHOICES,
+    STATUS_CHOICES,
+    filter_tasks,
+    sorted_tasks_after,
+)
+from todo_list.models import Task
+from todo_list.pagination import TASKS_PAGE_SIZE
+from todo_list.tests.utils import create_user, create_project, create_task
+
+
+class TaskOwnerTestCase(TestCase):
+    """Test owner of tasks follows their project"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+
+    def test_owner_set_on_create_and_bulk_create(self):
+        task = create_task(1, self.project)
+        bulk = Task.objects.bulk_create([Task(project=self.project, content="Bulk")])[0]
+        self.assertEqual(task.owner_id, self.user.id)
+        self.assertEqual(Task.objects.get(id=bulk.id).owner_id, self.user.id)
+
+    def test_owner_follows_project(self):
+        task = create_task(1, self.project)
+        other = create_project(2, create_user(2))
+        task = Task.objects.get(id=task.id)
+        task.project = other
+        task.save()
+        self.assertEqual(Task.objects.get(id=task.id).owner_id, other.owner_id)
+
+
+class FilterTasksTestCase(TestCase):
+    """Test due windows, status, priority and keyset order of filtered tasks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2030, 6, 15)
+        cls.user = create_user(1)
+        projects = [create_project(i, cls.user) for i in range(2)]
+        cls.tasks = Task.objects.bulk_create(
+            Task(
+                project=projects[i % 2],
+                content=f"Task {i}",
+                priority=i % 4,
+                completed=i % 3 == 0,
+                deadline=cls.today + timedelta(days=i % 11 - 3),
+            )
+            for i in range(40)
+        )
+        Task.objects.create(project=create_project(3, create_user(2)), content="Other", deadline=cls.today)
+
+    def filter(self, due="any", status="all", min_priority=None):
+        return list(filter_tasks(self.user, due, status, min_priority, self.today))
+
+    def test_due_windows(self):
+        windows = {
+            "any": lambda d: True,
+            "overdue": lambda d: d < self.today,
+            "today": lambda d: d == self.today,
+            "week": lambda d: self.today <= d < self.today + timedelta(days=7),
+            "later": lambda d: d >= self.today + timedelta(days=7),
+        }
+        for due, in_window in windows.items():
+            with self.subTest(due=due):
+                expected = {task.id for task in self.tasks if in_window(task.deadline)}
+                self.assertEqual({task.id for task in self.filter(due=due)}, expected)
+
+    def test_status_and_min_priority(self):
+        self.assertTrue(all(not task.completed for task in self.filter(status="open")))
+        self.assertTrue(all(task.completed for task in self.filter(status="completed")))
+        self.assertEqual(len(self.filter(status="open")) + len(self.filter(status="completed")), 40)
+        self.assertEqual(
+            {task.id for task in self.filter(min_priority=2)},
+            {task.id for task in self.tasks if task.priority >= 2},
+        )
+
+    def test_pages_follow_sort_order(self):
+        for sort, key in [
+            ("deadline", lambda task: (task.deadline, task.id)),
+            ("priority", lambda task: (-task.priority, task.deadline, task.id)),
+        ]:
+            with self.subTest(sort=sort):
+                queryset = filter_tasks(self.user, "any", "all", None, self.today)
+                pages, last = [], None
+                while True:
+                    cursor = (last.priority, last.deadline, last.id) if last else (None, None, None)
+                    page = list(sorted_tasks_after(queryset, sort, *cursor)[:7])
+                    if not page:
+                        break
+                    pages.extend(page)
+                    last = page[-1]
+                self.assertEqual(pages, sorted(self.tasks, key=key))
+
+    def test_every_combination_uses_owner_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite query plans")
+        choices = [[value for value, _ in choices] for choices in (DUE_CHOICES, STATUS_CHOICES, SORT_CHOICES)]
+        for (due, status, sort), min_priority in product(product(*choices), [None, 2]):
+            with self.subTest(due=due, status=status, sort=sort, min_priority=min_priority):
+                queryset = filter_tasks(self.user, due, status, min_priority, self.today)
+                task = self.tasks[0]
+                queryset = sorted_tasks_after(queryset, sort, task.priority, task.deadline, task.id)
+                self.assertIn("USING INDEX task_owner_", queryset[:10].explain())
+
+
+class TaskFilterViewTestCase(TestCase):
+    """Test filtered task view"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        today = timezone.localdate()
+        cls.overdue = Task.objects.bulk_create(
+            Task(project=cls.project, content=f"Overdue {i}", deadline=today - timedelta(days=1))
+            for i in range(TASKS_PAGE_SIZE + 1)
+        )
+        cls.done = Task.objects.create(
+            project=cls.project, content="Done", completed=True, deadline=today - timedelta(days=1),
+            )
+        cls.headers = {"HX-Request": 'true'}
+
+    def test_filter_not_login_user(self):
+        response = self.client.get(reverse('projects:task_filter'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_filter_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:task_filter'), {"due": "overdue"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "todo_list/task_filter.html")
+        self.assertEqual(response.context["tasks"], self.overdue[:TASKS_PAGE_SIZE])
+        self.assertNotContains(response, f'id="filtered-task-{self.done.id}"')
+
+    def test_filter_next_page(self):
+        self.client.force_login(self.user)
+        last = self.overdue[TASKS_PAGE_SIZE - 1]
+        response = self.client.get(
+            reverse('projects:task_filter'),
+            {"due": "overdue", "deadline": last.deadline, "after": last.id},
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "todo_list/partials/filtered_tasks.html")
+        self.assertEqual(response.context["tasks"], self.overdue[TASKS_PAGE_SIZE:])
+        self.assertIsNone(response.context["next_task"])
+
+    def test_filter_bad_request(self):
+        self.client.force_login(self.user)
+        for data in [{"due": "soon"}, {"min_priority": 11}, {"after": 1}, {"sort": "priority", "after": 1, "deadline": "2030-01-01"}]:
+            with self.subTest(data=data):
+                response = self.client.get(reverse('projects:task_filter'), data)
+                self.assertEqual(response.status_code, 400)
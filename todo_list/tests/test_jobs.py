@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from todo_list import jobs, search
+from todo_list.filters import filter_tasks
+from todo_list.models import Job, Project, Task
+from todo_list.tests.utils import create_projects_with_tasks, create_user
+
+
+class JobQueueTestCase(TestCase):
+    """Test claiming and running jobs"""
+
+    def setUp(self):
+        self.calls = []
+        handlers = {
+            "record": lambda job, **arguments: self.calls.append((job.id, arguments)),
+            "fail": lambda job: 1 / 0,
+        }
+        patcher = mock.patch.dict(jobs.HANDLERS, handlers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unknown_job(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue("unknown")
+
+    def test_jobs_run_in_order(self):
+        first = jobs.enqueue("record", number=1)
+        second = jobs.enqueue("record", number=2)
+        self.assertEqual(jobs.run_next().id, first.id)
+        self.assertEqual(jobs.run_next().id, second.id)
+        self.assertIsNone(jobs.run_next())
+        self.assertEqual(self.calls, [(first.id, {"number": 1}), (second.id, {"number": 2})])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (Job.DONE, 1))
+        self.assertLessEqual(first.created_at, first.started_at)
+        self.assertLessEqual(first.started_at, first.finished_at)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        jobs.enqueue("fail")
+        job = jobs.run_next()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn("ZeroDivisionError", job.error)
+        self.assertIsNone(job.finished_at)
+        self.assertGreater(job.run_after, timezone.now() + jobs.RETRY_DELAY - timedelta(seconds=5))
+        # Not before its delay
+        self.assertIsNone(jobs.run_next())
+
+        self.assertEqual(jobs.retry_delay(3), jobs.RETRY_DELAY * 4)
+        for attempts in range(2, jobs.MAX_ATTEMPTS + 1):
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            job = jobs.run_next()
+            self.assertEqual(job.attempts, attempts)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertIsNone(jobs.run_next())
+
+    def test_stale_running_job_is_claimed_again(self):
+        job = jobs.enqueue("record")
+        self.assertEqual(jobs.claim().id, job.id)
+        self.assertIsNone(jobs.claim())
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1))
+        claimed = jobs.claim()
+        self.assertEqual((claimed.id, claimed.attempts), (job.id, 2))
+
+    def test_stale_job_fails_after_max_attempts(self):
+        job = jobs.enqueue("record")
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            attempts=jobs.MAX_ATTEMPTS,
+            heartbeat_at=timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1),
+            )
+        self.assertIsNone(jobs.claim())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(self.calls, [])
+
+
+class DeleteProjectTestCase(TestCase):
+    """Test projects are hidden at once and purged by a job"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project, cls.other = create_projects_with_tasks(2, cls.user, tasks_per_project=10)
+        cls.headers = {"HX-Request": 'true'}
+
+    def delete(self):
+        self.client.force_login(self.user)
+        return self.client.post(
+            reverse('projects:projects_delete', kwargs={"pk": self.project.id}),
+            headers=self.headers,
+            )
+
+    def test_project_is_hidden_at_once(self):
+        response = self.delete()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 10)
+
+        response = self.client.get(reverse('projects:projects_list'))
+        self.assertEqual([project.id for project in response.context["projects"]], [self.other.id])
+        tasks = search.search_tasks(self.user, "task", offset=0, limit=100)
+        self.assertEqual({task.project_id for task in tasks}, {self.other.id})
+        tasks = filter_tasks(self.user, "any", "all", None, timezone.localdate())
+        self.assertEqual({task.project_id for task in tasks}, {self.other.id})
+
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.arguments, job.total), ("purge_project", {"project_id": self.project.id}, 10))
+
+    def test_job_purges_tasks_in_batches(self):
+        self.delete()
+        with mock.patch.object(jobs, "PURGE_BATCH_SIZE", 3), \
+                mock.patch.object(Task.objects, "purge", wraps=Task.objects.purge) as purge:
+            job = jobs.run_next()
+        self.assertEqual(purge.call_count, 4)
+        self.assertEqual((job.status, job.progress), (Job.DONE, 10))
+        self.assertFalse(Project.all_objects.filter(id=self.project.id).exists())
+        self.assertFalse(Task.objects.filter(project_id=self.project.id).exists())
+        self.assertEqual(Task.objects.filter(project=self.other).count(), 10)
+
+    def test_purge_runs_twice(self):
+        self.delete()
+        job = Job.objects.get()
+        jobs.purge_project(job, self.project.id)
+        jobs.purge_project(job, self.project.id)
+        self.assertFalse(Project.all_objects.filter(id=self.project.id).exists())
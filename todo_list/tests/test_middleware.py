@@ -0,0 +1,56 @@
+import json
+import pstats
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from todo_list.tests.utils import create_user, create_projects_with_tasks
+
+
+MIDDLEWARE = ['todo_list.middleware.ProfilingMiddleware', *settings.MIDDLEWARE]
+
+
+@override_settings(MIDDLEWARE=MIDDLEWARE, PROFILING_SAMPLE_RATE=0.0)
+class ProfilingMiddlewareTestCase(TestCase):
+    """Test per request profiling middleware"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        create_projects_with_tasks(3, cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_server_timing(self):
+        with self.assertLogs("todo_list.profiling", level="INFO") as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('projects:projects_list'))
+        count = len(queries.captured_queries)
+        timing = dict(
+            metric.strip().split(";", 1) for metric in response["Server-Timing"].split(",")
+            )
+        self.assertEqual(set(timing), {"db", "tpl", "view", "total"})
+        self.assertIn(f'desc="{count} queries"', timing["db"])
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], reverse('projects:projects_list'))
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], count)
+        self.assertGreater(record["template_ms"], 0)
+        self.assertGreaterEqual(record["total_ms"], record["view_ms"])
+        self.assertIsNone(record["profile"])
+
+    def test_sampled_profile(self):
+        with TemporaryDirectory() as directory:
+            with self.settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_DIR=directory):
+                with self.assertLogs("todo_list.profiling", level="INFO") as logs:
+                    self.client.get(reverse('projects:projects_list'))
+            path = json.loads(logs.records[0].getMessage())["profile"]
+            self.assertTrue(path.startswith(directory))
+            stats = pstats.Stats(path)
+        self.assertTrue(stats.total_calls)
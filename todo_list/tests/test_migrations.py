@@ -0,0 +1,34 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+
+class TriggerMigrationsTestCase(TransactionTestCase):
+    """Test tasks can be written at earlier migrations, whose triggers predate later columns"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("todo_list", target)])
+        return executor.loader.project_state([("todo_list", target)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes("todo_list"))
+
+    def write_tasks(self, apps):
+        User = apps.get_model("auth", "User")
+        Project = apps.get_model("todo_list", "Project")
+        Task = apps.get_model("todo_list", "Task")
+        user = User.objects.create(username="migrations")
+        project = Project.objects.create(owner=user, name="Project")
+        task = Task.objects.create(project=project, owner=user, content="Task", deadline=timezone.localdate())
+        Task.objects.filter(pk=task.pk).update(content="Changed")
+        Task.objects.filter(pk=task.pk).delete()
+
+    def test_before_deleted_at(self):
+        self.write_tasks(self.migrate("0006_task_owner"))
+
+    def test_reversed_to_before_deleted_at(self):
+        self.migrate("0007_jobs")
+        self.write_tasks(self.migrate("0006_task_owner"))
@@ -2,7 +2,12 @@ from django.test import TestCase
 from django.urls import reverse
 
 from todo_list.models import Project
-from todo_list.tests.utils import create_user, create_project
+from todo_list.pagination import PROJECTS_PAGE_SIZE
+from todo_list.tests.utils import (
+    create_user,
+    create_project,
+    create_projects_with_tasks,
+)
 
 
 class ProjectListViewTestCase(TestCase):
@@ -45,6 +50,45 @@ class ProjectListViewTestCase(TestCase):
                 self.assertContains(response, project.name)
 
 
+class ProjectListPaginationTestCase(TestCase):
+    """Test cursor pagination of projects"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.projects = create_projects_with_tasks(PROJECTS_PAGE_SIZE + 5, cls.user)
+        cls.headers = {"HX-Request": 'true'}
+
+    def test_first_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:projects_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['projects'], self.projects[:PROJECTS_PAGE_SIZE])
+        self.assertEqual(response.context['next_project'], self.projects[PROJECTS_PAGE_SIZE - 1])
+        self.assertContains(response, f'?after={self.projects[PROJECTS_PAGE_SIZE - 1].id}')
+
+    def test_next_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('projects:projects_list'),
+            data={"after": self.projects[PROJECTS_PAGE_SIZE - 1].id},
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'todo_list/partials/project_page.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(response.context['projects'], self.projects[PROJECTS_PAGE_SIZE:])
+        self.assertIsNone(response.context['next_project'])
+
+    def test_invalid_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('projects:projects_list'),
+            data={"after": "abc"},
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 400)
+
 
 class ProjectCreateViewTestCase(TestCase):
     """Test create project"""
@@ -0,0 +1,102 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from todo_list.forms import BulkTaskForm
+from todo_list.models import Project, Task
+from todo_list.pagination import PROJECTS_PAGE_SIZE
+from todo_list.tests.utils import (
+    QueryBudgetMixin,
+    create_user,
+    create_projects_with_tasks,
+)
+
+
+PROJECT_COUNTS = [1, 100, 1000]
+
+
+class ViewsQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Test that views run a constant number of queries whatever account size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for count in PROJECT_COUNTS:
+            user = create_user(count)
+            create_projects_with_tasks(count, user)
+            cls.users[count] = user
+        cls.headers = {"HX-Request": 'true'}
+
+    def test_projects_list(self):
+        # session, user, timestamp, projects, tasks
+        for count, user in self.users.items():
+            self.client.force_login(user)
+            with self.subTest(projects=count):
+                with self.assertQueryBudget(5):
+                    response = self.client.get(reverse('projects:projects_list'))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    len(response.context['projects']),
+                    min(count, PROJECTS_PAGE_SIZE),
+                    )
+
+    def test_create_project(self):
+        # session, user, insert
+        for count, user in self.users.items():
+            self.client.force_login(user)
+            with self.subTest(projects=count):
+                with self.assertQueryBudget(3):
+                    response = self.client.post(
+                        reverse('projects:projects_create'),
+                        data={"name": "test text"},
+                        headers=self.headers,
+                        )
+                self.assertEqual(response.status_code, 200)
+
+    def test_create_task(self):
+        # project, session, user, savepoint, insert, counters,
+        # release savepoint, counters read back, tasks
+        for count, user in self.users.items():
+            self.client.force_login(user)
+            project = Project.objects.filter(owner=user).last()
+            with self.subTest(projects=count):
+                with self.assertQueryBudget(9):
+                    response = self.client.post(
+                        reverse('projects:task_create',
+                                kwargs={"project_id": project.id},
+                                ),
+                        data={"content": "test text"},
+                        headers=self.headers,
+                        )
+                self.assertEqual(response.status_code, 200)
+
+    def test_update_priority(self):
+        # session, user, update, tasks
+        for count, user in self.users.items():
+            self.client.force_login(user)
+            task = Task.objects.filter(project__owner=user, priority=0).last()
+            with self.subTest(projects=count):
+                with self.assertQueryBudget(4):
+                    response = self.client.post(
+                        reverse('projects:task_priority',
+                                kwargs={"pk": task.id}),
+                        data={"priority": 1},
+                        headers=self.headers,
+                        )
+                self.assertEqual(response.status_code, 200)
+
+    def test_bulk_complete(self):
+        # session, user, savepoint, project ids, update, recount,
+        # release savepoint, projects, tasks
+        for count, user in self.users.items():
+            self.client.force_login(user)
+            tasks = list(Task.objects
+                         .filter(project__owner=user)
+                         .values_list("id", flat=True)[:BulkTaskForm.MAX_TASKS])
+            with self.subTest(projects=count):
+                with self.assertQueryBudget(9):
+                    response = self.client.post(
+                        reverse('projects:task_bulk'),
+                        data={"tasks": tasks, "operation": "complete"},
+                        headers=self.headers,
+                        )
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,192 @@
+import re
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from todo_list import jobs
+from todo_list.cache import task_list_cache
+from todo_list.models import Job, Task
+from todo_list.tests.utils import create_project, create_task, create_user
+
+
+class TaskRankTestCase(TestCase):
+    """Test tasks are ranked in their order of creation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+
+    def test_created_task(self):
+        task = create_task(1, self.project)
+        self.assertEqual(task.rank, task.id * Task.RANK_GAP)
+        task.refresh_from_db()
+        self.assertEqual(task.rank, task.id * Task.RANK_GAP)
+
+    def test_bulk_created_tasks(self):
+        tasks = Task.objects.bulk_create(Task(project=self.project, content=f"Task {i}") for i in range(3))
+        self.assertEqual([task.rank for task in tasks], [task.id * Task.RANK_GAP for task in tasks])
+        self.assertEqual(
+            list(Task.objects.values_list("rank", flat=True)),
+            [task.id * Task.RANK_GAP for task in tasks],
+            )
+
+    def test_rank_between(self):
+        self.assertEqual(Task.rank_between(None, None), Task.RANK_GAP)
+        self.assertEqual(Task.rank_between(None, 10), 10 - Task.RANK_GAP)
+        self.assertEqual(Task.rank_between(10, None), 10 + Task.RANK_GAP)
+        self.assertEqual(Task.rank_between(10, 20), 15)
+        self.assertIsNone(Task.rank_between(10, 11))
+
+
+class TaskMoveTestCase(TestCase):
+    """Test moving a task between two others"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.other_project = create_project(2, cls.user)
+        cls.tasks = Task.objects.bulk_create(
+            Task(project=cls.project, content=f"Task {i}", priority=i // 3) for i in range(6)
+        )
+        cls.other_task = create_task(1, cls.other_project)
+
+    def order(self):
+        return list(Task.objects.filter(project=self.project).values_list("id", flat=True))
+
+    def test_move_writes_one_row(self):
+        first, second, third = self.tasks[:3]
+        with CaptureQueriesContext(connection) as context:
+            task, crowded = Task.objects.move(first.id, self.user.id, second.id, third.id)
+        writes = [query["sql"] for query in context.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(writes), 1)
+        self.assertFalse(crowded)
+        # Priority 1 tasks come first
+        self.assertEqual(self.order()[3:], [second.id, first.id, third.id])
+
+    def test_move_to_edges(self):
+        first, second, third = self.tasks[:3]
+        Task.objects.move(third.id, self.user.id, None, first.id)
+        self.assertEqual(self.order()[3:], [third.id, first.id, second.id])
+        Task.objects.move(third.id, self.user.id, second.id, None)
+        self.assertEqual(self.order()[3:], [first.id, second.id, third.id])
+
+    def test_move_takes_priority_of_neighbour(self):
+        task = self.tasks[0]
+        above = self.tasks[4]
+        moved, _ = Task.objects.move(task.id, self.user.id, above.id, None)
+        self.assertEqual(moved.priority, 1)
+        self.assertEqual(self.order(), [self.tasks[i].id for i in (3, 4, 0, 5, 1, 2)])
+
+    def test_move_between_priorities_keeps_own(self):
+        # Between the last of priority 1 and the first of priority 0
+        task = self.tasks[2]
+        moved, _ = Task.objects.move(task.id, self.user.id, self.tasks[5].id, self.tasks[0].id)
+        self.assertEqual(moved.priority, 0)
+        self.assertEqual(self.order()[3:], [task.id, self.tasks[0].id, self.tasks[1].id])
+
+    def test_missing_or_foreign_tasks(self):
+        task = self.tasks[0]
+        self.assertIsNone(Task.objects.move(task.id, self.user.id, 0, None))
+        self.assertIsNone(Task.objects.move(task.id, self.user.id, self.other_task.id, None))
+        self.assertIsNone(Task.objects.move(task.id, create_user(2).id, self.tasks[1].id, None))
+
+    def test_crowded_spot(self):
+        first, second, third = self.tasks[:3]
+        Task.objects.filter(pk=second.pk).update(rank=first.rank + Task.REBALANCE_GAP)
+        _, crowded = Task.objects.move(third.id, self.user.id, first.id, second.id)
+        self.assertTrue(crowded)
+        self.assertEqual(self.order()[3:], [first.id, third.id, second.id])
+
+    def test_no_rank_left_rebalances(self):
+        first, second, third = self.tasks[:3]
+        Task.objects.filter(pk=second.pk).update(rank=first.rank + 1)
+        task, _ = Task.objects.move(third.id, self.user.id, first.id, second.id)
+        self.assertEqual(self.order()[3:], [first.id, third.id, second.id])
+        ranks = list(Task.objects.filter(project=self.project, priority=0).values_list("rank", flat=True))
+        self.assertEqual(ranks, [Task.RANK_GAP, 2 * Task.RANK_GAP - Task.RANK_GAP // 2, 2 * Task.RANK_GAP])
+        self.assertEqual(task.rank, ranks[1])
+
+
+class RebalanceJobTestCase(TestCase):
+    """Test rebalance jobs are queued once and keep the order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.tasks = Task.objects.bulk_create(Task(project=cls.project, content=f"Task {i}") for i in range(3))
+        Task.objects.filter(pk=cls.tasks[0].pk).update(rank=cls.tasks[2].rank + 1)
+
+    def test_queued_once(self):
+        job = jobs.queue_rebalance(self.project.id, 0)
+        self.assertIsNone(jobs.queue_rebalance(self.project.id, 0))
+        self.assertIsNotNone(jobs.queue_rebalance(self.project.id, 1))
+        self.assertEqual(job.arguments, {"project_id": self.project.id, "priority": 0})
+
+    def test_job_keeps_order(self):
+        order = list(Task.objects.values_list("id", flat=True))
+        jobs.queue_rebalance(self.project.id, 0)
+        with mock.patch.object(task_list_cache, "bump") as bump:
+            job = jobs.run_next()
+        self.assertEqual((job.status, job.progress), (Job.DONE, 3))
+        bump.assert_called_once_with(self.project.id)
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), order)
+        self.assertEqual(
+            list(Task.objects.values_list("rank", flat=True)),
+            [Task.RANK_GAP, 2 * Task.RANK_GAP, 3 * Task.RANK_GAP],
+            )
+
+
+class TaskMoveViewTestCase(TestCase):
+    """Test the view tasks are dropped on"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.tasks = Task.objects.bulk_create(Task(project=cls.project, content=f"Task {i}") for i in range(3))
+        cls.headers = {"HX-Request": 'true'}
+
+    def move(self, task, headers=None, **data):
+        self.client.force_login(self.user)
+        return self.client.post(
+            reverse('projects:task_move', kwargs={"pk": task.id}),
+            data=data,
+            headers=self.headers if headers is None else headers,
+            )
+
+    def test_placed_before_next_task(self):
+        first, second, third = self.tasks
+        response = self.move(first, after=second.id, before=third.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'hx-swap-oob="beforebegin:#task-{third.id}"')
+        self.assertEqual(len(re.findall(r'id="task-\d+"', response.content.decode())), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_crowded_spot_queues_rebalance(self):
+        first, second, third = self.tasks
+        Task.objects.filter(pk=third.pk).update(rank=second.rank + 2)
+        response = self.move(first, after=second.id, before=third.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Job.objects.get().name, "rebalance_ranks")
+
+    def test_not_htmx(self):
+        response = self.move(self.tasks[0], headers={}, after=self.tasks[1].id)
+        self.assertEqual(response.status_code, 405)
+
+    def test_bad_neighbours(self):
+        task = self.tasks[0]
+        self.assertEqual(self.move(task).status_code, 400)
+        self.assertEqual(self.move(task, after=task.id).status_code, 400)
+        self.assertEqual(self.move(task, after=self.tasks[1].id, before=self.tasks[1].id).status_code, 400)
+
+    def test_other_users_task(self):
+        other = create_project(2, create_user(2))
+        task = create_task(1, other)
+        self.assertEqual(self.move(task, after=self.tasks[0].id).status_code, 404)
+        self.assertEqual(self.move(self.tasks[0], after=task.id).status_code, 404)
@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from todo_list import search
+from todo_list.models import Project, Task
+from todo_list.pagination import SEARCH_PAGE_SIZE
+from todo_list.tests.utils import create_user, create_project, create_task
+
+
+class SearchTasksTestCase(TestCase):
+    """Test full-text search index and ranking"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = Project.objects.create(owner=cls.user, name="Garden")
+        cls.other_project = Project.objects.create(owner=cls.user, name="Kitchen")
+        cls.water = Task.objects.create(project=cls.project, content="Water the tomatoes")
+        cls.buy = Task.objects.create(project=cls.other_project, content="Buy tomato seeds")
+        cls.user2 = create_user(2)
+        cls.neighbour = Task.objects.create(
+            project=create_project(2, cls.user2),
+            content="Water tomatoes of the neighbour",
+            )
+
+    def search(self, query):
+        return search.search_tasks(self.user, query, offset=0, limit=10)
+
+    def test_prefix_words_of_owner(self):
+        self.assertEqual(self.search("tomat"), [self.water, self.buy])
+        self.assertEqual(self.search("water tomatoes"), [self.water])
+        self.assertEqual(self.search("kitchen"), [self.buy])
+
+    def test_owner_is_part_of_match(self):
+        self.assertEqual(search.search_tasks(self.user2, "tomat", offset=0, limit=10), [self.neighbour])
+        # Words don't match the owner column
+        self.assertEqual(self.search(str(self.user.id)), [])
+
+    def test_syntax_is_not_passed_through(self):
+        for query in ['"', "tomato OR", "NEAR(", "*", "a:* & !b", ""]:
+            with self.subTest(query=query):
+                self.search(query)
+
+    def test_index_follows_writes(self):
+        Task.objects.filter(id=self.water.id).update(content="Weed the beds")
+        self.assertEqual(self.search("tomato"), [self.buy])
+        self.assertEqual(self.search("weed"), [self.water])
+
+        Project.objects.filter(id=self.project.id).update(name="Allotment")
+        self.assertEqual(self.search("allotment"), [self.water])
+        self.assertEqual(self.search("garden"), [])
+
+        Task.objects.filter(id=self.buy.id).update(project=self.project)
+        self.assertEqual(self.search("allotment"), [self.water, self.buy])
+
+        self.project.delete()
+        self.assertEqual(self.search("allotment"), [])
+
+    def test_install_restores_missing_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite triggers")
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER todo_list_task_search_insert")
+        task = create_task(3, self.project)
+        search.install(connection)
+        self.assertEqual(self.search("number 3"), [task])
+
+
+class TaskSearchViewTestCase(TestCase):
+    """Test search view"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.tasks = [create_task(i, cls.project) for i in range(SEARCH_PAGE_SIZE + 1)]
+        cls.headers = {"HX-Request": 'true'}
+
+    def test_search_not_login_user(self):
+        response = self.client.get(reverse('projects:task_search'), {"q": "task"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_search_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:task_search'), {"q": "task"})
+        self.assertTemplateUsed(response, 'todo_list/search.html')
+        self.assertEqual(len(response.context['tasks']), SEARCH_PAGE_SIZE)
+        self.assertContains(response, "page=2")
+
+    def test_next_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('projects:task_search'),
+            {"q": "task", "page": 2},
+            headers=self.headers,
+            )
+        self.assertTemplateNotUsed(response, 'todo_list/search.html')
+        self.assertEqual(len(response.context['tasks']), 1)
+        self.assertIsNone(response.context['next_page'])
+
+    def test_invalid_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:task_search'), {"q": "task", "page": 0})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,145 @@
+import gzip
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from todo_list import staticfiles
+from todo_list.middleware import StaticFilesMiddleware, accepted_encodings
+from todo_list.templatetags.vendor import is_vendored
+
+
+STYLESHEET = ".row { color: red; }\n" * 50
+
+MANIFEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "todo_list.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+
+
+class CollectedStaticTestCase(SimpleTestCase):
+    """Test collectstatic with hashed and compressed files and serving them"""
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = Path(directory.name, "static")
+        self.root = Path(directory.name, "root")
+        (self.source / "css").mkdir(parents=True)
+        (self.source / "css" / "site.css").write_text(STYLESHEET)
+        (self.source / "small.js").write_text("htmx.logAll();\n")
+        settings = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATIC_URL="/static/",
+            STORAGES=MANIFEST_STORAGES,
+            )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command("collectstatic", interactive=False, verbosity=0, stdout=StringIO())
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse("view", status=404))
+
+    def get(self, path, accept_encoding=""):
+        request = RequestFactory().get(path, headers={"Accept-Encoding": accept_encoding})
+        return self.middleware(request)
+
+    def test_compressed_variants(self):
+        name = staticfiles_storage.stored_name("css/site.css")
+        self.assertNotEqual(name, "css/site.css")
+        self.assertEqual(gzip.decompress((self.root / f"{name}.gz").read_bytes()).decode(), STYLESHEET)
+        self.assertEqual((self.root / f"{name}.br").exists(), staticfiles.brotli is not None)
+        # Too small to be worth it
+        small = staticfiles_storage.stored_name("small.js")
+        self.assertFalse((self.root / f"{small}.gz").exists())
+
+    def test_brotli_is_optional(self):
+        with mock.patch.object(staticfiles, "brotli", None):
+            self.assertEqual(set(staticfiles.compress(STYLESHEET.encode())), {"gzip"})
+
+    def test_hashed_file_is_immutable(self):
+        response = self.get(f"/static/{staticfiles_storage.stored_name('css/site.css')}", "gzip, deflate")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)).decode(), STYLESHEET)
+
+    def test_identity_when_not_accepted(self):
+        for accept_encoding in ("", "gzip;q=0", "deflate"):
+            response = self.get(f"/static/{staticfiles_storage.stored_name('css/site.css')}", accept_encoding)
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(b"".join(response.streaming_content).decode(), STYLESHEET)
+
+    def test_unhashed_file_is_revalidated(self):
+        response = self.get("/static/css/site.css", "gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+
+    def test_other_paths_reach_views(self):
+        for path in ("/static/missing.css", "/static/../manage.py", "/projects/"):
+            self.assertEqual(self.get(path).content, b"view")
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("gzip, deflate, br;q=0.5"), {"gzip", "deflate", "br"})
+        self.assertEqual(accepted_encodings("br;q=0, GZIP;q=0.0, identity"), {"identity"})
+        self.assertEqual(accepted_encodings(""), set())
+
+
+class VendorTagsTestCase(SimpleTestCase):
+    """Test vendored assets are linked locally, others from the CDN"""
+
+    template = Template("{% load vendor %}{% vendor_script 'vendor/htmx/htmx.min.js' %}")
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = Path(directory.name)
+        settings = override_settings(STATICFILES_DIRS=[self.source], STATIC_URL="/static/")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        is_vendored.cache_clear()
+        self.addCleanup(is_vendored.cache_clear)
+
+    def test_cdn_until_vendored(self):
+        html = self.template.render(Context())
+        cdn_path, integrity = staticfiles.VENDOR_FILES["vendor/htmx/htmx.min.js"]
+        self.assertEqual(
+            html,
+            f'<script src="{staticfiles.CDN_URL}{cdn_path}" integrity="{integrity}" crossorigin="anonymous"></script>',
+            )
+
+    def test_vendored(self):
+        (self.source / "vendor" / "htmx").mkdir(parents=True)
+        (self.source / "vendor" / "htmx" / "htmx.min.js").write_text("")
+        html = self.template.render(Context())
+        self.assertEqual(html, '<script src="/static/vendor/htmx/htmx.min.js"></script>')
+
+    def test_cdn_without_integrity(self):
+        files = {"vendor/htmx/htmx.min.js": ("htmx.org@2.0.6/dist/htmx.min.js", None)}
+        with mock.patch.dict(staticfiles.VENDOR_FILES, files):
+            self.assertEqual(
+                self.template.render(Context()),
+                f'<script src="{staticfiles.CDN_URL}htmx.org@2.0.6/dist/htmx.min.js"></script>',
+                )
+
+    def test_icons_are_linked(self):
+        html = Template("{% load vendor %}{% vendor_stylesheet 'vendor/bootstrap-icons/bootstrap-icons.min.css' %}")
+        self.assertIn("bootstrap-icons.min.css", html.render(Context()))
+
+    def test_check(self):
+        files = {"vendor/htmx/htmx.min.js": ("htmx.org@2.0.6/dist/htmx.min.js", None)}
+        with mock.patch.dict(staticfiles.VENDOR_FILES, files, clear=True):
+            self.assertEqual(
+                [message.id for message in staticfiles.check_vendor_files(None)],
+                ["todo_list.W001", "todo_list.W002"],
+                )
+            (self.source / "vendor" / "htmx").mkdir(parents=True)
+            (self.source / "vendor" / "htmx" / "htmx.min.js").write_text("")
+            self.assertEqual([message.id for message in staticfiles.check_vendor_files(None)], ["todo_list.W002"])
@@ -1,7 +1,16 @@
-from django.test import TestCase
+import re
+from datetime import date
+from unittest.mock import patch
+
+from django.template import Context, Template
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
-from todo_list.models import Project, Task
+from todo_list.management.commands.bench_render import Command as BenchRenderCommand
+from todo_list.models import Project, Task, TaskQuerySet
+from todo_list.pagination import TASKS_PAGE_SIZE, split_task_with_next, task_with_next
+from todo_list.templatetags.task_rows import ROW_URLS
 from todo_list.tests.utils import create_user, create_project, create_task
 
 
@@ -25,6 +34,64 @@ class TaskListTestCase(TestCase):
                 with self.subTest(task=task):
                     self.assertContains(response, task.content)
 
+class TaskListViewTestCase(TestCase):
+    """Test cursor pagination of tasks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        Task.objects.bulk_create(
+            Task(project=cls.project, content=f"Test task number {i}", priority=i % 3)
+            for i in range(TASKS_PAGE_SIZE + 5)
+        )
+        cls.tasks = list(cls.project.tasks.order_by("-priority", "rank", "id"))
+        user2 = create_user(2)
+        cls.project2 = create_project(2, user2)
+        create_task(1, cls.project2)
+        cls.headers = {"HX-Request": 'true'}
+
+    def test_first_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:projects_list'))
+        project = response.context['projects'][0]
+        self.assertEqual(project.task_page, self.tasks[:TASKS_PAGE_SIZE])
+        self.assertEqual(project.next_task, self.tasks[TASKS_PAGE_SIZE - 1])
+
+    def test_next_page(self):
+        self.client.force_login(self.user)
+        last = self.tasks[TASKS_PAGE_SIZE - 1]
+        response = self.client.get(
+            reverse('projects:task_list', kwargs={"project_id": self.project.id}),
+            data={"priority": last.priority, "rank": last.rank, "after": last.id},
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'todo_list/partials/task_page.html')
+        self.assertEqual(response.context['tasks'], self.tasks[TASKS_PAGE_SIZE:])
+        self.assertIsNone(response.context['next_task'])
+
+    def test_next_page_not_owner_user(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('projects:task_list', kwargs={"project_id": self.project2.id}),
+            data={"priority": 10, "rank": 0, "after": 0},
+            headers=self.headers,
+            )
+        self.assertEqual(response.context['tasks'], [])
+
+    def test_next_page_without_htmx(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('projects:task_list', kwargs={"project_id": self.project.id}),
+            data={"priority": 0, "rank": 0, "after": 0},
+            )
+        self.assertRedirects(
+            response,
+            reverse('projects:projects_list'),
+            target_status_code=200,
+            )
+
 
 class TaskCreateViewTestCase(TestCase):
     """Test create task"""
@@ -76,7 +143,7 @@ class TaskCreateViewTestCase(TestCase):
                 self.assertIsNotNone(Task.objects.filter(content=content).first())
                 if header:
                     self.assertEqual(response.status_code, 200)
-                    self.assertTemplateUsed(response, "todo_list/task_list.html")
+                    self.assertTemplateUsed(response, "todo_list/partials/placed_task.html")
                     self.assertTemplateUsed(response, "todo_list/task_form.html")
                 else:
                     self.assertRedirects(
@@ -302,10 +369,132 @@ class TaskPriorityUpdateViewTestCase(TestCase):
                 if header:
                     self.assertEqual(response.status_code, 200)
                     self.assertEqual(self.task.priority, 1)
-                    self.assertTemplateUsed(response, 'todo_list/task_list.html')
+                    self.assertTemplateUsed(response, 'todo_list/partials/placed_task.html')
                 else:
                     self.assertEqual(response.status_code, 405)
 
+    def test_update_task_out_of_range(self):
+        self.client.force_login(self.user)
+        for priority, change, error in [(10, 1, "Priority is maximum"),
+                                        (0, -1, "Priority is minimum")]:
+            with self.subTest(priority=priority, change=change):
+                Task.objects.filter(id=self.task.id).update(priority=priority)
+                response = self.client.post(
+                    reverse('projects:task_priority',
+                            kwargs={"pk": self.task.id}),
+                    data={"priority": change},
+                    headers=self.headers[0],
+                    )
+                self.task.refresh_from_db()
+                self.assertEqual(self.task.priority, priority)
+                self.assertContains(response, error)
+
+    def test_update_task_by_more_than_one(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('projects:task_priority',
+                    kwargs={"pk": self.task.id}),
+            data={"priority": 5},
+            headers=self.headers[0],
+            )
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.priority, 0)
+        self.assertContains(response, "Priority can be changed by one")
+
+    def test_change_priority_without_returning(self):
+        with patch.object(TaskQuerySet, "_can_return_from_update", return_value=False):
+            updated = Task.objects.change_priority(self.task.id, self.user.id, 1)
+            self.assertEqual(updated, (1, self.task.project_id, self.task.rank))
+            self.assertIsNone(Task.objects.change_priority(self.task2.id, self.user.id, 1))
+
+
+class PlacedTaskTestCase(TestCase):
+    """Test created and moved tasks come back as one row placed out of band"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        Task.objects.bulk_create(
+            Task(project=cls.project, content=f"Test task number {i}", priority=i % 3)
+            for i in range(TASKS_PAGE_SIZE + 5)
+        )
+        cls.tasks = list(cls.project.tasks.order_by("-priority", "rank", "id"))
+        cls.headers = {"HX-Request": 'true'}
+
+    def change_priority(self, task, change):
+        return self.client.post(
+            reverse('projects:task_priority', kwargs={"pk": task.id}),
+            data={"priority": change},
+            headers=self.headers,
+            )
+
+    def assertPlacedBefore(self, response, target):
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'hx-swap-oob="beforebegin:{target}"')
+        self.assertEqual(len(re.findall(r'id="task-\d+"', response.content.decode())), 1)
+
+    def test_task_with_next(self):
+        task = self.tasks[10]
+        rows = list(task_with_next(self.project.id, task.priority, task.rank, task.id))
+        self.assertEqual(split_task_with_next(rows, task.id), (task, self.tasks[11]))
+        last = self.tasks[-1]
+        rows = list(task_with_next(self.project.id, last.priority, last.rank, last.id))
+        self.assertEqual(split_task_with_next(rows, last.id), (last, None))
+        self.assertEqual(split_task_with_next(rows, 0), (None, None))
+
+    def test_moved_before_next_task(self):
+        self.client.force_login(self.user)
+        task = self.tasks[-1]
+        response = self.change_priority(task, 1)
+        # Last of priority 1 now, so it goes before the first of priority 0
+        first_of_lower = next(task for task in self.tasks if task.priority == 0)
+        self.assertPlacedBefore(response, f"#task-{first_of_lower.id}")
+
+    def test_moved_to_end(self):
+        self.client.force_login(self.user)
+        task = self.tasks[-1]
+        self.change_priority(task, 1)
+        response = self.change_priority(task, -1)
+        self.assertPlacedBefore(response, f"#tasks-end-{self.project.id}")
+
+    def test_created_task(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('projects:task_create', kwargs={"project_id": self.project.id}),
+            data={"content": "New task"},
+            headers=self.headers,
+            )
+        self.assertPlacedBefore(response, f"#tasks-end-{self.project.id}")
+        self.assertContains(response, f'id="task-form-{self.project.id}"')
+
+    def test_errors_retarget_task_list(self):
+        self.client.force_login(self.user)
+        task = self.tasks[0]
+        Task.objects.filter(id=task.id).update(priority=Task.MAX_PRIORITY)
+        response = self.change_priority(task, 1)
+        self.assertEqual(response["HX-Retarget"], f"#test-{self.project.id}")
+        self.assertEqual(response["HX-Reswap"], "outerHTML")
+
+        response = self.client.post(
+            reverse('projects:task_create', kwargs={"project_id": self.project.id}),
+            data={"content": ""},
+            headers=self.headers,
+            )
+        self.assertEqual(response["HX-Retarget"], f"#test-{self.project.id}")
+
+    def test_end_of_list(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:projects_list'))
+        self.assertNotContains(response, f'id="tasks-end-{self.project.id}"')
+        last = self.tasks[TASKS_PAGE_SIZE - 1]
+        response = self.client.get(
+            reverse('projects:task_list', kwargs={"project_id": self.project.id}),
+            data={"priority": last.priority, "rank": last.rank, "after": last.id},
+            headers=self.headers,
+            )
+        self.assertContains(response, f'id="tasks-end-{self.project.id}"')
+
 
 class ProjectDeleteViewTestCase(TestCase):
     """Test delete task"""
@@ -363,3 +552,297 @@ class ProjectDeleteViewTestCase(TestCase):
                         reverse('projects:projects_list'),
                         target_status_code=200,
                         )
+
+
+class TaskBulkViewTestCase(TestCase):
+    """Test bulk operations on tasks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.other_project = create_project(2, cls.user)
+        cls.tasks = [create_task(i, cls.project) for i in range(3)]
+        user2 = create_user(2)
+        cls.project2 = create_project(3, user2)
+        cls.task2 = create_task(3, cls.project2)
+        cls.ids = [task.id for task in cls.tasks] + [cls.task2.id]
+        cls.headers = {"HX-Request": 'true'}
+
+    def bulk(self, headers=None, **data):
+        return self.client.post(
+            reverse('projects:task_bulk'),
+            data={"tasks": self.ids, **data},
+            headers=headers or self.headers,
+            )
+
+    def test_bulk_not_login_user(self):
+        response = self.bulk(operation="delete")
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Task.objects.filter(id__in=self.ids).exists())
+
+    def test_bulk_operations(self):
+        self.client.force_login(self.user)
+        operations = [
+            ({"operation": "complete"}, {"completed": True}),
+            ({"operation": "uncomplete"}, {"completed": False}),
+            ({"operation": "set_priority", "priority": 7}, {"priority": 7}),
+            ({"operation": "set_deadline", "deadline": "2030-01-02"},
+             {"deadline": date(2030, 1, 2)}),
+            ({"operation": "move", "project": self.other_project.id},
+             {"project_id": self.other_project.id}),
+        ]
+        for data, changes in operations:
+            with self.subTest(**data):
+                response = self.bulk(**data)
+                self.assertEqual(response.status_code, 200)
+                self.assertTemplateUsed(response, 'todo_list/partials/bulk_result.html')
+                self.assertContains(response, 'hx-swap-oob="true"')
+                for task in self.tasks:
+                    task.refresh_from_db()
+                    for field, value in changes.items():
+                        self.assertEqual(getattr(task, field), value)
+                self.task2.refresh_from_db()
+                self.assertEqual(self.task2.project_id, self.project2.id)
+                self.assertFalse(self.task2.completed)
+                self.assertEqual(self.task2.priority, 0)
+
+    def test_bulk_delete(self):
+        self.client.force_login(self.user)
+        response = self.bulk(operation="delete", headers={"X": "1"})
+        self.assertRedirects(
+            response,
+            reverse('projects:projects_list'),
+            target_status_code=200,
+            )
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+        self.assertTrue(Task.objects.filter(id=self.task2.id).exists())
+
+    def test_bulk_invalid(self):
+        self.client.force_login(self.user)
+        for data in [{"operation": "set_priority"},
+                     {"operation": "set_priority", "priority": 11},
+                     {"operation": "move", "project": self.project2.id},
+                     {"operation": "drop"}]:
+            with self.subTest(**data):
+                response = self.bulk(**data)
+                self.assertEqual(response.status_code, 200)
+                self.assertTemplateUsed(response, 'todo_list/partials/bulk_errors.html')
+                self.assertContains(response, 'role="alert"')
+                self.assertEqual(response["HX-Retarget"], "#bulk-errors")
+                self.assertEqual(response["HX-Reswap"], "outerHTML")
+        self.assertFalse(Task.objects.filter(project=self.project2, completed=True).exists())
+
+    def test_bulk_invalid_without_htmx(self):
+        self.client.force_login(self.user)
+        response = self.bulk(operation="drop", headers={"X": "1"})
+        self.assertContains(response, 'role="alert"', status_code=400)
+        self.assertNotIn("HX-Retarget", response)
+
+    def test_projects_list_has_bulk_errors(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:projects_list'))
+        self.assertContains(response, 'id="bulk-errors"')
+        self.assertNotContains(response, 'role="alert"')
+
+
+class TaskCountersTestCase(TestCase):
+    """Test denormalized task counters of projects"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.other_project = create_project(2, cls.user)
+        cls.headers = {"HX-Request": 'true'}
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.tasks = [create_task(i, self.project) for i in range(3)]
+
+    def assertCounts(self, project, tasks, completed):
+        project.refresh_from_db()
+        self.assertEqual((project.task_count, project.completed_count), (tasks, completed))
+
+    def post(self, name, task, **data):
+        return self.client.post(
+            reverse(f'projects:{name}', kwargs={"pk": task.id}),
+            data=data,
+            headers=self.headers,
+            )
+
+    def test_create_and_delete(self):
+        self.assertCounts(self.project, 3, 0)
+        self.client.post(
+            reverse('projects:task_create', kwargs={"project_id": self.project.id}),
+            data={"content": "new"},
+            headers=self.headers,
+            )
+        self.assertCounts(self.project, 4, 0)
+        self.post('task_delete', self.tasks[0])
+        self.assertCounts(self.project, 3, 0)
+
+    def test_responses_refresh_title_counts(self):
+        progress = f'<small class="fs-6 ms-3" id="project-progress-{self.project.id}" hx-swap-oob="true">{{}} done</small>'
+        response = self.post('task_completed', self.tasks[0])
+        self.assertContains(response, progress.format("1/3"), html=True)
+        response = self.client.post(
+            reverse('projects:task_create', kwargs={"project_id": self.project.id}),
+            data={"content": "new"},
+            headers=self.headers,
+            )
+        self.assertContains(response, progress.format("1/4"), html=True)
+        response = self.post('task_delete', self.tasks[0])
+        self.assertContains(response, progress.format("0/3"), html=True)
+
+    def test_toggle_completed(self):
+        self.post('task_completed', self.tasks[0])
+        self.assertCounts(self.project, 3, 1)
+        self.post('task_completed', self.tasks[0])
+        self.assertCounts(self.project, 3, 0)
+
+    def test_save_moves_and_completes(self):
+        task = Task.objects.get(id=self.tasks[0].id)
+        task.completed = True
+        task.save()
+        self.assertCounts(self.project, 3, 1)
+        task.project = self.other_project
+        task.save()
+        self.assertCounts(self.project, 2, 0)
+        self.assertCounts(self.other_project, 1, 1)
+        task.delete()
+        self.assertCounts(self.other_project, 0, 0)
+
+    def test_bulk(self):
+        ids = [task.id for task in self.tasks[:2]]
+        for data, counts in [
+            ({"operation": "complete"}, {self.project: (3, 2)}),
+            ({"operation": "move", "project": self.other_project.id},
+             {self.project: (1, 0), self.other_project: (2, 2)}),
+            ({"operation": "delete"}, {self.other_project: (0, 0)}),
+        ]:
+            with self.subTest(**data):
+                self.client.post(
+                    reverse('projects:task_bulk'),
+                    data={"tasks": ids, **data},
+                    headers=self.headers,
+                    )
+                for project, (tasks, completed) in counts.items():
+                    self.assertCounts(project, tasks, completed)
+
+    def test_cascade_delete_project(self):
+        self.client.post(
+            reverse('projects:projects_delete', kwargs={"pk": self.project.id}),
+            headers=self.headers,
+            )
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+        self.assertCounts(self.other_project, 0, 0)
+
+
+class TaskRowTagTestCase(TestCase):
+    """Test task_row template tag"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.task = create_task(1, cls.project)
+
+    def render(self, **context):
+        return Template("{% load task_rows %}{% task_row task %}").render(
+            Context({"task": self.task, **context})
+            )
+
+    @override_settings(COMPACT_TASK_ROWS=False)
+    def test_urls(self):
+        html = self.render()
+        # Drops are posted to the URL of the container, see reorder.js
+        for name in set(ROW_URLS.values()) - {"projects:task_move"}:
+            self.assertIn(f'"{reverse(name, kwargs={"pk": self.task.id})}"', html)
+        self.assertIn(f'id="task-{self.task.id}"', html)
+        self.assertEqual(html.count(f'hx-target="#task-{self.task.id}"'), 4)
+
+    @override_settings(COMPACT_TASK_ROWS=False)
+    def test_csrf_input(self):
+        self.assertNotIn("csrfmiddlewaretoken", self.render())
+        html = self.render(csrf_token="token")
+        self.assertEqual(
+            html.count('<input type="hidden" name="csrfmiddlewaretoken" value="token">'), 5
+            )
+
+    @override_settings(COMPACT_TASK_ROWS=False)
+    def test_same_as_url_and_csrf_tags(self):
+        baseline = BenchRenderCommand().baseline_template()
+        self.assertHTMLEqual(
+            self.render(csrf_token="token"),
+            baseline.render({"tasks": [self.task], "csrf_token": "token"}),
+            )
+
+    @override_settings(COMPACT_TASK_ROWS=True)
+    def test_compact_row(self):
+        html = self.render(csrf_token="token")
+        self.assertIn(f'data-task="{self.task.id}"', html)
+        self.assertNotIn("csrfmiddlewaretoken", html)
+        self.assertNotIn("hx-", html)
+        self.assertLess(len(html), len(self.render(csrf_token="token", compact_rows=False)) / 2)
+
+    def test_row_urls(self):
+        html = Template("{% load task_rows %}<main {% task_row_urls %}>").render(Context())
+        for key, name in ROW_URLS.items():
+            url = reverse(name, kwargs={"pk": self.task.id}).replace(str(self.task.id), "{id}")
+            self.assertIn(f'data-task-url-{key}="{url}"', html)
+
+    @override_settings(COMPACT_TASK_ROWS=True)
+    def test_projects_page_delegates_actions(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:projects_list'))
+        self.assertContains(response, f'data-task="{self.task.id}"')
+        self.assertContains(response, 'data-task-urls')
+        self.assertContains(response, 'todo_list/task_rows.js')
+        self.assertContains(response, '<meta name="csrf-token"')
+
+
+class TaskOfDeletedProjectTestCase(TestCase):
+    """Test tasks of a project being deleted are not found by task views"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.project = create_project(1, cls.user)
+        cls.tasks = [create_task(i, cls.project) for i in range(2)]
+        # Hidden, its purge job didn't run yet
+        Project.objects.filter(pk=cls.project.pk).update(deleted_at=timezone.now())
+        cls.headers = {"HX-Request": 'true'}
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_task_views_not_found(self):
+        task, other = self.tasks
+        requests = [
+            ("get", 'task_update', {}),
+            ("post", 'task_update', {"content": "Changed", "priority": 1}),
+            ("post", 'task_completed', {}),
+            ("post", 'task_priority', {"priority": 1}),
+            ("post", 'task_move', {"after": other.id}),
+            ("post", 'task_delete', {}),
+        ]
+        for method, name, data in requests:
+            with self.subTest(name=name, method=method):
+                response = getattr(self.client, method)(
+                    reverse(f'projects:{name}', kwargs={"pk": task.id}),
+                    data=data,
+                    headers=self.headers,
+                    )
+                self.assertEqual(response.status_code, 404)
+        task.refresh_from_db()
+        self.assertEqual((task.content, task.completed, task.priority), ("Test task number 0", False, 0))
+
+    def test_bulk_skips_tasks(self):
+        response = self.client.post(
+            reverse('projects:task_bulk'),
+            data={"tasks": [task.id for task in self.tasks], "operation": "complete"},
+            headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(project=self.project, completed=True).exists())
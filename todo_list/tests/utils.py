@@ -1,17 +1,29 @@
+from contextlib import contextmanager
+from functools import cache
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
 
 from todo_list.models import Project, Task
 
 
 
+@cache
+def hashed_password(password: str) ->str:
+    """Hash once per test run, hashing is slow on purpose"""
+
+    return make_password(password)
+
 def create_user(number: int) ->User:
     """Create user for test. Number is just for creating unique one"""
 
     user: User = get_user_model()
-    return user.objects.create_user(
+    return user.objects.create(
             email=f'test{number}@mail.com',
-            password='1234',
+            password=hashed_password('1234'),
             username=f'test{number}',
             )
 
@@ -26,4 +38,35 @@ def create_task(number: int, project: Project) ->Task:
     return Task.objects.create(
         project=project,
         content=f"Test task number {number}"
-    )
\ No newline at end of file
+    )
+
+def create_projects_with_tasks(count: int, user: User, tasks_per_project: int = 2) ->list[Project]:
+    """Create many projects with tasks for test in a few queries"""
+
+    projects = Project.objects.bulk_create(
+        Project(owner=user, name=f'Test project{i}') for i in range(count)
+    )
+    Task.objects.bulk_create(
+        Task(project=project, content=f"Test task number {i}", priority=i)
+        for project in projects
+        for i in range(tasks_per_project)
+    )
+    Project.objects.filter(owner=user).recount()
+    return projects
+
+
+class QueryBudgetMixin:
+    """TestCase mixin that fails when code runs more queries than declared"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int, using: str = DEFAULT_DB_ALIAS):
+        context = CaptureQueriesContext(connections[using])
+        with context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = "\n".join(
+                f"{i}. {query['sql']}"
+                for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} queries executed, budget is {budget}:\n{queries}")
@@ -0,0 +1,172 @@
+"""Propagation of `updated_at` from tasks to projects to owners.
+
+Database triggers set `Project.updated_at` when tasks of the project
+change and `OwnerTimestamp.updated_at` when projects of the owner change,
+so queryset updates, bulk operations and cascading deletes are covered
+without extra queries. `Task.updated_at` is set by the statements
+changing tasks.
+
+Projects being deleted are not touched, purging their tasks would
+otherwise update the project and its owner once per task.
+
+SQLite timestamps set by triggers have millisecond precision. SQLite drops triggers
+together with their table, so `install` also runs after every `migrate`
+to the latest migration (see apps.py). It also can't rename a rebuilt
+table while triggers of other tables use it, migrations rebuilding these
+tables drop the triggers first. Migrations keep their own copy of the
+SQL, it has to match the schema of their time.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+# Timestamps only go forward, so two changes within the clock resolution
+# still give different validators
+SQLITE_NOW = (
+    "max(strftime('%Y-%m-%d %H:%M:%f', 'now'), "
+    "strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'))"
+)
+POSTGRESQL_NOW = "GREATEST(clock_timestamp(), updated_at + interval '1 microsecond')"
+
+SQLITE_TRIGGERS = {
+    "todo_list_task_touch_insert": f"""
+        CREATE TRIGGER todo_list_task_touch_insert
+        AFTER INSERT ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = {SQLITE_NOW} WHERE id = new.project_id;
+        END
+    """,
+    "todo_list_task_touch_update": f"""
+        CREATE TRIGGER todo_list_task_touch_update
+        AFTER UPDATE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = {SQLITE_NOW}
+            WHERE id IN (old.project_id, new.project_id) AND deleted_at IS NULL;
+        END
+    """,
+    "todo_list_task_touch_delete": f"""
+        CREATE TRIGGER todo_list_task_touch_delete
+        AFTER DELETE ON todo_list_task
+        BEGIN
+            UPDATE todo_list_project SET updated_at = {SQLITE_NOW}
+            WHERE id = old.project_id AND deleted_at IS NULL;
+        END
+    """,
+    "todo_list_project_touch_insert": f"""
+        CREATE TRIGGER todo_list_project_touch_insert
+        AFTER INSERT ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = {SQLITE_NOW}
+            WHERE owner_id = new.owner_id;
+        END
+    """,
+    "todo_list_project_touch_update": f"""
+        CREATE TRIGGER todo_list_project_touch_update
+        AFTER UPDATE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = {SQLITE_NOW}
+            WHERE owner_id IN (old.owner_id, new.owner_id);
+        END
+    """,
+    "todo_list_project_touch_delete": f"""
+        CREATE TRIGGER todo_list_project_touch_delete
+        AFTER DELETE ON todo_list_project
+        BEGIN
+            UPDATE todo_list_ownertimestamp SET updated_at = {SQLITE_NOW}
+            WHERE owner_id = old.owner_id;
+        END
+    """,
+}
+
+POSTGRESQL_TRIGGERS = {
+    "todo_list_task_touch": f"""
+        CREATE OR REPLACE FUNCTION todo_list_task_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_project SET updated_at = {POSTGRESQL_NOW}
+                WHERE id = OLD.project_id AND deleted_at IS NULL;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.project_id <> OLD.project_id) THEN
+                UPDATE todo_list_project SET updated_at = {POSTGRESQL_NOW} WHERE id = NEW.project_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_task_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_task
+        FOR EACH ROW EXECUTE FUNCTION todo_list_task_touch();
+    """,
+    "todo_list_project_touch": f"""
+        CREATE OR REPLACE FUNCTION todo_list_project_touch() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = {POSTGRESQL_NOW}
+                WHERE owner_id = OLD.owner_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.owner_id <> OLD.owner_id) THEN
+                UPDATE todo_list_ownertimestamp SET updated_at = {POSTGRESQL_NOW}
+                WHERE owner_id = NEW.owner_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER todo_list_project_touch
+        AFTER INSERT OR UPDATE OR DELETE ON todo_list_project
+        FOR EACH ROW EXECUTE FUNCTION todo_list_project_touch();
+    """,
+}
+
+
+def install(connection) -> None:
+    """Create missing triggers"""
+
+    if connection.vendor == "sqlite":
+        triggers = SQLITE_TRIGGERS
+        exists = "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN ({})"
+    elif connection.vendor == "postgresql":
+        triggers = POSTGRESQL_TRIGGERS
+        exists = "SELECT tgname FROM pg_trigger WHERE tgname IN ({})"
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(exists.format(", ".join(["%s"] * len(triggers))), list(triggers))
+        existing = {name for name, in cursor.fetchall()}
+        for name in triggers:
+            if name not in existing:
+                cursor.execute(triggers[name])
+
+
+def uninstall(connection) -> None:
+    """Drop triggers"""
+
+    if connection.vendor == "sqlite":
+        statements = [f"DROP TRIGGER IF EXISTS {name}" for name in SQLITE_TRIGGERS]
+    elif connection.vendor == "postgresql":
+        statements = [
+            "DROP TRIGGER IF EXISTS todo_list_task_touch ON todo_list_task",
+            "DROP TRIGGER IF EXISTS todo_list_project_touch ON todo_list_project",
+            "DROP FUNCTION IF EXISTS todo_list_task_touch()",
+            "DROP FUNCTION IF EXISTS todo_list_project_touch()",
+        ]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+@contextmanager
+def suspended(connection):
+    """Stop propagation while inserting rows that set their own timestamps.
+
+    Like `search.suspended`, in one transaction with the inserts.
+    """
+
+    with transaction.atomic(using=connection.alias):
+        uninstall(connection)
+        yield
+        install(connection)
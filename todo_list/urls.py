@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name ='projects'
 
@@ -10,9 +10,18 @@ urlpatterns = [
     path('delete/<int:pk>/', views.ProjectDeleteView.as_view(), name='projects_delete'),
     path('update/<int:pk>/', views.ProjectUpdateView.as_view(), name='projects_update'),
 
+    path('<int:project_id>/tasks/', views.TaskListView.as_view(), name='task_list'),
     path('<int:project_id>/task/create/', views.TaskCreateView.as_view(), name='task_create'),
     path('task/delete/<int:pk>/', views.TaskDeleteView.as_view(), name='task_delete'),
     path('task/update/<int:pk>/', views.TaskUpdateView.as_view(), name='task_update'),
     path('task/completed/<int:pk>/', views.TaskCompletedUpdateView.as_view(), name='task_completed'),
     path('task/priority/<int:pk>/', views.TaskPriorityUpdateView.as_view(), name='task_priority'),
+    path('task/move/<int:pk>/', views.TaskMoveView.as_view(), name='task_move'),
+    path('task/bulk/', views.TaskBulkView.as_view(), name='task_bulk'),
+    path('search/', views.TaskSearchView.as_view(), name='task_search'),
+    path('tasks/', views.TaskFilterView.as_view(), name='task_filter'),
+    path('events/', views.EventStreamView.as_view(), name='events'),
+
+    path('api/projects/', api.ProjectExportView.as_view(), name='api_projects'),
+    path('api/tasks/', api.TaskExportView.as_view(), name='api_tasks'),
 ]
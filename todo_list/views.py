@@ -1,27 +1,97 @@
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, HttpResponseNotFound, HttpResponseNotAllowed
-from django.db.models import F
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotFound,
+    HttpResponseNotAllowed,
+)
 from django.forms import ValidationError
 from django.shortcuts import render, redirect
+from django.db import transaction
 from django.urls import reverse_lazy
+from django.utils import timezone
 
 from .models import Project, Task
-from .forms import PriorityTaskForm, TaskForm, ProjectForm
+from .forms import (
+    PriorityTaskForm,
+    TaskForm,
+    ProjectForm,
+    ProjectCursorForm,
+    TaskCursorForm,
+    TaskMoveForm,
+    BulkTaskForm,
+    TaskSearchForm,
+    TaskFilterForm,
+)
+from .pagination import (
+    PROJECTS_PAGE_SIZE,
+    TASKS_PAGE_SIZE,
+    SEARCH_PAGE_SIZE,
+    projects_after,
+    tasks_after,
+    task_with_next,
+    split_task_with_next,
+    split_page,
+    set_task_pages,
+    prefetch_task_page,
+)
+from .cache import task_list_cache, set_task_list_fragments
+from .search import search_tasks
+from .filters import filter_tasks, sorted_tasks_after
+from .jobs import delete_project, queue_rebalance
+from .events import publish
+from .conditional import not_modified, owner_updated_at, project_updated_at, set_validators
+
+
+def render_project_progress(request, project_id: int) -> HttpResponse:
+    """Task counters in the title of project, swapped out of band"""
+
+    project = Project.objects.only("task_count", "completed_count").filter(pk=project_id).first()
+    if project is None:
+        return HttpResponse(status=200)
+    return render(request, "todo_list/partials/project_progress.html", {"project": project, "oob": True})
 
 
 class ProjectListView(LoginRequiredMixin, ListView):
+    """List of projects paginated by cursor on project id.
+
+    Next pages are requested by htmx with `?after=<last project id>`
+    and rendered without the rest of the page. Unchanged pages are
+    answered with 304, see conditional.py.
+    """
     model = Project
     context_object_name = 'projects'
 
+    def get(self, request, *args, **kwargs):
+        self.cursor_form = ProjectCursorForm(request.GET)
+        if not self.cursor_form.is_valid():
+            return HttpResponseBadRequest()
+        updated_at = owner_updated_at(request.user)
+        response = not_modified(request, updated_at)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validators(request, response, updated_at)
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.filter(owner=self.request.user)
+        queryset = super().get_queryset().filter(owner=self.request.user)
+        queryset = projects_after(queryset, self.cursor_form.cleaned_data['after'])
+        return queryset[:PROJECTS_PAGE_SIZE + 1]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        projects, next_project = split_page(list(context['projects']), PROJECTS_PAGE_SIZE)
+        context['projects'] = set_task_list_fragments(self.request, projects)
+        context['next_project'] = next_project
         return context
 
+    def get_template_names(self):
+        if (self.request.headers.get("HX-Request") == "true" and
+             self.cursor_form.cleaned_data['after'] is not None
+             ):
+            return ["todo_list/partials/project_page.html"]
+        return super().get_template_names()
+
 
 class ProjectCreateView(LoginRequiredMixin, CreateView):
     form_class = ProjectForm
@@ -39,9 +109,15 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
         form.instance.owner = self.request.user
         if self.request.headers.get("HX-Request") == "true":
             self.object = form.save()
+            publish(self.request, self.object.id)
+            # New project has no tasks, so there is nothing to query for
+            self.object.prefetched_tasks = []
+            set_task_pages([self.object])
             return render(self.request, 'todo_list/project.html', self.get_context_data())
         else:
-            return super().form_valid(form)
+            response = super().form_valid(form)
+            publish(self.request, self.object.id)
+            return response
 
 
 class ProjectUpdateView(LoginRequiredMixin, UpdateView):
@@ -72,12 +148,16 @@ class ProjectUpdateView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         if self.request.headers.get("HX-Request") == "true":
             self.object = form.save()
+            publish(self.request, self.object.id)
             return render(self.request, self.get_template_names(), self.get_context_data())
         else:
-            return super().form_valid(form)
+            response = super().form_valid(form)
+            publish(self.request, self.object.id)
+            return response
 
 
 class ProjectDeleteView(LoginRequiredMixin, DeleteView):
+    """Hide project at once, its tasks are deleted by a job, see jobs.py"""
     model = Project
     http_method_names = ['post']
     success_url = reverse_lazy('projects:projects_list')
@@ -87,7 +167,8 @@ class ProjectDeleteView(LoginRequiredMixin, DeleteView):
         return queryset.filter(owner=self.request.user)
     
     def form_valid(self, form):
-        super().form_valid(form)
+        delete_project(self.object)
+        publish(self.request, self.object.id)
         if self.request.headers.get("HX-Request") == "true":
             return HttpResponse(status=200)
         else:
@@ -96,6 +177,11 @@ class ProjectDeleteView(LoginRequiredMixin, DeleteView):
     
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
+    """Create task of project.
+
+    htmx gets the empty form back and the row of the new task out of band,
+    so the response doesn't grow with the project.
+    """
     fields = ['content']
     model = Task
     success_url = reverse_lazy('projects:projects_list')
@@ -109,7 +195,7 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
     
     def get(self, request, *args, **kwargs):
         if (self.project is None or
-             self.project.owner != self.request.user
+             self.project.owner_id != self.request.user.id
              ):
             return HttpResponseNotFound()
         if request.headers.get("HX-Request") == "true":
@@ -122,24 +208,84 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
             return redirect('projects:projects_list')
     
     def form_valid(self, form):
-        if self.project.owner != self.request.user:
+        if self.project.owner_id != self.request.user.id:
             return HttpResponseNotFound()
         form.instance.project = self.project
-        if self.request.headers.get("HX-Request") == "true":
+        # Insert and counter update are one write transaction
+        with transaction.atomic():
             self.object = form.save()
-            context = self.get_context_data()
-            context['project'] = self.project
-            return render(self.request, "todo_list/task_list.html", context)
+        publish(self.request, self.project.id)
+        if self.request.headers.get("HX-Request") == "true":
+            # Counters were changed by the insert
+            self.project.refresh_from_db(fields=["task_count", "completed_count"])
+            task, next_task = split_task_with_next(
+                list(task_with_next(self.project.id, self.object.priority, self.object.rank, self.object.id)),
+                self.object.id,
+                )
+            context = {"project": self.project, "task": task, "next_task": next_task}
+            return render(self.request, "todo_list/partials/created_task.html", context)
         else:
-            return super().form_valid(form)
+            return redirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        if self.project is None or self.project.owner_id != self.request.user.id:
+            return HttpResponseNotFound()
+        context = {"project": prefetch_task_page(self.project), "form": form}
+        response = render(self.request, self.template_name, context)
+        # Errors are shown above the tasks instead of in the form
+        response["HX-Retarget"] = f"#test-{self.project.id}"
+        response["HX-Reswap"] = "outerHTML"
+        return response
     
+
+
+class TaskListView(LoginRequiredMixin, ListView):
+    """Next page of project tasks after `?priority=<p>&rank=<r>&after=<id>` cursor"""
+    model = Task
+    context_object_name = 'tasks'
+    template_name = "todo_list/partials/task_page.html"
+
+    def get(self, request, *args, **kwargs):
+        if request.headers.get("HX-Request") != "true":
+            return redirect('projects:projects_list')
+        self.cursor_form = TaskCursorForm(request.GET)
+        if not self.cursor_form.is_valid():
+            return HttpResponseBadRequest()
+        updated_at = project_updated_at(self.kwargs['project_id'], request.user)
+        if updated_at is None:
+            return super().get(request, *args, **kwargs)
+        response = not_modified(request, updated_at)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validators(request, response, updated_at)
+
+    def get_queryset(self):
+        queryset = super().get_queryset().of_owner(self.request.user).filter(
+            project_id=self.kwargs['project_id'],
+            )
+        queryset = tasks_after(
+            queryset,
+            self.cursor_form.cleaned_data['priority'],
+            self.cursor_form.cleaned_data['rank'],
+            self.cursor_form.cleaned_data['after'],
+            )
+        return queryset[:TASKS_PAGE_SIZE + 1]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tasks'], context['next_task'] = split_page(list(context['tasks']), TASKS_PAGE_SIZE)
+        context['project_id'] = self.kwargs['project_id']
+        return context
+
     
 class BaseUpdateView(LoginRequiredMixin, UpdateView):
     model = Task
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        return queryset.filter(project__owner=self.request.user)
+        return (queryset
+                .of_owner(self.request.user)
+                .select_related("project"))
     
     
 class TaskUpdateView(BaseUpdateView):
@@ -149,10 +295,7 @@ class TaskUpdateView(BaseUpdateView):
     template_name = "todo_list/task_list.html"
 
     def get(self, request, *args, **kwargs):
-        task = Task.objects.filter(
-            pk=self.kwargs['pk'],
-            project__owner=self.request.user
-            ).first()
+        task = Task.objects.of_owner(self.request.user).filter(pk=self.kwargs['pk']).first()
         if task is None:
             return HttpResponseNotFound()
         if request.headers.get("HX-Request") == "true":
@@ -167,11 +310,14 @@ class TaskUpdateView(BaseUpdateView):
     def form_valid(self, form):
         if self.request.headers.get("HX-Request") == "true":
             self.object = form.save()
+            publish(self.request, self.object.project_id, self.object.id)
             context = self.get_context_data()
             context['project'] = self.object.project
             return render(self.request, 'todo_list/partials/one_task.html', context)
         else:
-            return super().form_valid(form)
+            response = super().form_valid(form)
+            publish(self.request, self.object.project_id, self.object.id)
+            return response
     
 
 class TaskCompletedUpdateView(BaseUpdateView):
@@ -180,34 +326,107 @@ class TaskCompletedUpdateView(BaseUpdateView):
     
     def form_valid(self, form):
         if self.request.headers.get("HX-Request") == "true":
-            task = self.get_object()
-            Task.objects.filter(id=task.id).update(completed=~F("completed"))
-            return HttpResponse(status=200)
+            task = self.object
+            Task.objects.toggle_completed(task.id, task.project_id)
+            # Queryset update sends no signals
+            task_list_cache.bump(task.project_id)
+            publish(self.request, task.project_id, task.id)
+            return render_project_progress(self.request, task.project_id)
         else:
             return HttpResponseNotAllowed(permitted_methods='hx-post')
     
 
 class TaskPriorityUpdateView(BaseUpdateView):
+    """Change priority of task by one with a single UPDATE.
+
+    Ownership and range of priority are checked by the UPDATE itself,
+    task is loaded only to report an error. htmx deletes the row and gets
+    it back out of band at its new place, see partials/placed_task.html.
+    """
     http_method_names = ['post']
     form_class = PriorityTaskForm
     template_name = "todo_list/task_list.html"
 
+    def post(self, request, *args, **kwargs):
+        if request.headers.get("HX-Request") != "true":
+            return super().post(request, *args, **kwargs)
+        # Not bound to the task, which is only loaded on errors
+        form = PriorityTaskForm(request.POST)
+        if not form.is_valid():
+            self.object = self.get_object()
+            return self.form_invalid(form)
+        updated = Task.objects.change_priority(
+            self.kwargs['pk'],
+            self.request.user.id,
+            form.cleaned_data['priority'],
+            )
+        if updated is None:
+            self.object = self.get_object()
+            form.add_out_of_range_error()
+            return self.form_invalid(form)
+        priority, project_id, rank = updated
+        # Raw UPDATE sends no signals
+        task_list_cache.bump(project_id)
+        publish(self.request, project_id)
+        task, next_task = split_task_with_next(
+            list(task_with_next(project_id, priority, rank, self.kwargs['pk'])),
+            self.kwargs['pk'],
+            )
+        if task is None:
+            return HttpResponse(status=200)
+        return render(self.request, "todo_list/partials/placed_task.html", {"task": task, "next_task": next_task})
+
     def form_valid(self, form):
-        
-        if self.request.headers.get("HX-Request") == "true":
-            task = self.get_object()
-            task.priority += form.cleaned_data['priority']
-            task.save()
-            return render(self.request, self.get_template_names(), self.get_context_data())
-        else:
-            return HttpResponseNotAllowed(permitted_methods='hx-post')
+        return HttpResponseNotAllowed(permitted_methods='hx-post')
+
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        # Errors are shown above the tasks instead of deleting the row
+        response["HX-Retarget"] = f"#test-{self.object.project_id}"
+        response["HX-Reswap"] = "outerHTML"
+        return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['project'] = self.get_object().project
+        context['project'] = prefetch_task_page(self.object.project)
         return context
 
     
+class TaskMoveView(LoginRequiredMixin, View):
+    """Drop task between two others, see TaskQuerySet.move.
+
+    Like a priority change, htmx deletes the row and gets it back out of
+    band at its new place.
+    """
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        if request.headers.get("HX-Request") != "true":
+            return HttpResponseNotAllowed(permitted_methods='hx-post')
+        form = TaskMoveForm(request.POST, task_id=self.kwargs['pk'])
+        if not form.is_valid():
+            return HttpResponseBadRequest()
+        moved = Task.objects.move(
+            self.kwargs['pk'],
+            request.user.id,
+            form.cleaned_data['after'],
+            form.cleaned_data['before'],
+            )
+        if moved is None:
+            return HttpResponseNotFound()
+        task, crowded = moved
+        if crowded:
+            queue_rebalance(task.project_id, task.priority)
+        # Raw UPDATE sends no signals
+        task_list_cache.bump(task.project_id)
+        publish(request, task.project_id)
+        _, next_task = split_task_with_next(
+            list(task_with_next(task.project_id, task.priority, task.rank, task.id)),
+            task.id,
+            )
+        return render(request, "todo_list/partials/placed_task.html", {"task": task, "next_task": next_task})
+
+
 class TaskDeleteView(LoginRequiredMixin, DeleteView):
     model = Task
     http_method_names = ['post']
@@ -215,12 +434,137 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        return queryset.filter(project__owner=self.request.user)
+        return queryset.of_owner(self.request.user)
     
     def form_valid(self, form):
         super().form_valid(form)
+        publish(self.request, self.object.project_id, self.object.id)
         if self.request.headers.get("HX-Request") == "true":
-            return HttpResponse(status=200)
+            return render_project_progress(self.request, self.object.project_id)
         else:
             success_url = self.get_success_url()
-            return redirect(success_url)
\ No newline at end of file
+            return redirect(success_url)
+
+
+class TaskBulkView(LoginRequiredMixin, FormView):
+    """Apply one operation to many tasks of the user in a single request.
+
+    htmx requests get changed projects back as out-of-band swaps.
+    """
+    http_method_names = ['post']
+    form_class = BulkTaskForm
+    template_name = "todo_list/partials/bulk_result.html"
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['owner'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        count, project_ids = form.save()
+        # Queryset updates send no signals
+        task_list_cache.bump(*project_ids)
+        for project_id in project_ids:
+            publish(self.request, project_id)
+        if self.request.headers.get("HX-Request") == "true":
+            projects = list(Project.objects.filter(
+                id__in=project_ids,
+                owner=self.request.user,
+                ).order_by("id"))
+            context = {
+                "projects": set_task_list_fragments(self.request, projects),
+                "count": count,
+            }
+            return render(self.request, self.template_name, context)
+        else:
+            return redirect('projects:projects_list')
+
+    def form_invalid(self, form):
+        response = render(self.request, "todo_list/partials/bulk_errors.html", {"form": form})
+        if self.request.headers.get("HX-Request") == "true":
+            # Errors are shown above the projects, htmx swaps only 2xx
+            response["HX-Retarget"] = "#bulk-errors"
+            response["HX-Reswap"] = "outerHTML"
+        else:
+            response.status_code = 400
+        return response
+
+
+class TaskSearchView(LoginRequiredMixin, View):
+    """Tasks of the user matching `?q=`, best matches first.
+
+    htmx requests get only the results, next pages are requested
+    with `?q=<query>&page=<n>` when the end of results is revealed.
+    """
+
+    def get(self, request, *args, **kwargs):
+        form = TaskSearchForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest()
+        query = form.cleaned_data['q']
+        page = form.cleaned_data['page'] or 1
+        tasks, next_task = split_page(
+            search_tasks(
+                request.user,
+                query,
+                offset=(page - 1) * SEARCH_PAGE_SIZE,
+                limit=SEARCH_PAGE_SIZE + 1,
+                ),
+            SEARCH_PAGE_SIZE,
+            )
+        context = {
+            "query": query,
+            "tasks": tasks,
+            "next_page": page + 1 if next_task and page < form.MAX_PAGE else None,
+        }
+        if request.headers.get("HX-Request") == "true":
+            return render(request, "todo_list/partials/search_results.html", context)
+        return render(request, "todo_list/search.html", context)
+
+
+class TaskFilterView(LoginRequiredMixin, View):
+    """Tasks of all projects of the user by due window, status and priority.
+
+    Pages are read by keyset on the sort order, see filters.py. htmx
+    requests get only the rows, next pages are requested with the filters
+    and `?priority=<p>&deadline=<d>&after=<id>` of the last task.
+    """
+
+    def get(self, request, *args, **kwargs):
+        form = TaskFilterForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest()
+        data = form.cleaned_data
+        tasks = filter_tasks(
+            request.user,
+            due=data["due"],
+            status=data["status"],
+            min_priority=data["min_priority"],
+            today=timezone.localdate(),
+            )
+        tasks = sorted_tasks_after(
+            tasks, data["sort"], data["priority"], data["deadline"], data["after"],
+            )
+        tasks, next_task = split_page(
+            list(tasks.select_related("project")[:TASKS_PAGE_SIZE + 1]),
+            TASKS_PAGE_SIZE,
+            )
+        context = {
+            "form": form,
+            "tasks": tasks,
+            "next_task": next_task,
+        }
+        if request.headers.get("HX-Request") == "true":
+            return render(request, "todo_list/partials/filtered_tasks.html", context)
+        return render(request, "todo_list/task_filter.html", context)
+
+
+class EventStreamView(LoginRequiredMixin, View):
+    """Live updates are streamed by the ASGI application only, see events.py.
+
+    An endless response would hold a WSGI worker, 204 tells EventSource
+    not to reconnect.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(status=204)